@@ -0,0 +1,16 @@
+from django.urls import path
+from coder_app.async_views import (AsyncBaseInfoView, AsyncBusinessProfileView, AsyncLoginView,
+                                   AsyncOfferDetailView, AsyncProfileView)
+from Coder.urls import urlpatterns as wsgi_urlpatterns
+
+# URLs of the ASGI entry point: logins and the read-heavy views are served by async views,
+# every other URL is the same as under WSGI. Patterns are matched in order, so the async
+# views take precedence. They pass writes on to the synchronous views.
+urlpatterns = [
+    path('api/login/', AsyncLoginView.as_view(), name='async-login'),
+    path('api/profiles/business/<int:user_id>/', AsyncBusinessProfileView.as_view(), name='async-business-profile'),
+    path('api/profile/<int:user_id>/', AsyncProfileView.as_view(), name='async-profile'),
+    path('api/offers/<int:id>/', AsyncOfferDetailView.as_view(), name='async-offer-detail'),
+    path('api/base-info/', AsyncBaseInfoView.as_view(), name='async-base-info'),
+    *wsgi_urlpatterns,
+]
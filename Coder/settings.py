@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -8,6 +9,9 @@ DEBUG = True
 
 ALLOWED_HOSTS = ['127.0.0.1', 'localhost']  
 
+# Set while the test suite runs
+TESTING = sys.argv[1:2] == ['test']
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -23,6 +27,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'coder_app.middleware.ASGIURLconfMiddleware',
+    'coder_app.middleware.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -43,6 +49,9 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 ROOT_URLCONF = 'Coder.urls'
+# Requests through the ASGI handler are resolved with this URLconf, which routes logins and
+# the read-heavy views to async views (see ASGIURLconfMiddleware)
+ASGI_ROOT_URLCONF = 'Coder.asgi_urls'
 
 TEMPLATES = [
     {
@@ -62,13 +71,135 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Coder.wsgi.application'
 
+# postgresql requires psycopg, and its connection pool psycopg[pool], to be installed.
+DATABASE_ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+DATABASE_ENGINE = os.getenv('DATABASE_ENGINE', 'sqlite')
+# Connections are pooled (postgresql only) or kept open for this many seconds; 0 closes them after every request
+DATABASE_POOL = DATABASE_ENGINE == 'postgresql' and os.getenv('DATABASE_POOL', 'false').lower() == 'true'
+DATABASE_CONN_MAX_AGE = 0 if DATABASE_POOL else int(os.getenv('DATABASE_CONN_MAX_AGE', 60))
+
+DATABASE_OPTIONS = {
+    'sqlite': {
+        # Seconds a connection waits for a lock before failing with "database is locked"
+        'timeout': int(os.getenv('DATABASE_BUSY_TIMEOUT', 20)),
+        # Transactions take the write lock when they begin, so they wait for each other instead of
+        # failing when a reading transaction tries to write
+        'transaction_mode': 'IMMEDIATE',
+        # WAL lets reads run during a write; NORMAL syncs at checkpoints instead of every commit
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))}",
+        ]),
+    },
+    'postgresql': {
+        'pool': {
+            'min_size': int(os.getenv('DATABASE_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DATABASE_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.getenv('DATABASE_POOL_TIMEOUT', 10)),
+        },
+    } if DATABASE_POOL else {},
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': DATABASE_ENGINES[DATABASE_ENGINE],
+        'NAME': os.getenv('DATABASE_NAME', BASE_DIR / 'db.sqlite3' if DATABASE_ENGINE == 'sqlite' else 'coderr'),
+        'USER': os.getenv('DATABASE_USER', ''),
+        'PASSWORD': os.getenv('DATABASE_PASSWORD', ''),
+        'HOST': os.getenv('DATABASE_HOST', ''),
+        'PORT': os.getenv('DATABASE_PORT', ''),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        # Persistent connections are checked before they are reused in a new request
+        'CONN_HEALTH_CHECKS': os.getenv('DATABASE_CONN_HEALTH_CHECKS', 'true').lower() == 'true',
+        'OPTIONS': DATABASE_OPTIONS[DATABASE_ENGINE],
     }
 }
 
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_DEFAULT_LOCATIONS = {
+    'locmem': 'coderr',
+    'file': str(BASE_DIR / 'cache'),
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND]),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+
+# Seconds API responses are cached; 0 disables the response cache
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Request instrumentation: requests slower or with more queries than the budget are logged
+REQUEST_INSTRUMENTATION_ENABLED = os.getenv('REQUEST_INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+REQUEST_TIME_BUDGET_MS = int(os.getenv('REQUEST_TIME_BUDGET_MS', 500))
+REQUEST_QUERY_BUDGET = int(os.getenv('REQUEST_QUERY_BUDGET', 50))
+# Number of times the same normalized statement may run in one request before it is reported as N+1
+DUPLICATE_QUERY_THRESHOLD = int(os.getenv('DUPLICATE_QUERY_THRESHOLD', 5))
+# URL names that are not recorded
+INSTRUMENTATION_EXCLUDED_VIEWS = ('metrics',)
+# Bearer token for scraping /api/_metrics/ without a staff account
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'coder_app.instrumentation': {
+            'handlers': ['console'],
+            # Budget and N+1 warnings of test requests would only clutter the test output
+            'level': 'ERROR' if TESTING else os.getenv('INSTRUMENTATION_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# Logins verify passwords in the hashing pool below, through Django's authenticate()
+AUTHENTICATION_BACKENDS = ['coder_app.backends.PooledModelBackend']
+
+# Password hashing: PASSWORD_HASHER picks the algorithm of new hashes. The other hashers only verify
+# existing hashes, which are replaced with the preferred one on the next successful login.
+# argon2 requires argon2-cffi and bcrypt requires bcrypt to be installed.
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'coder_app.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + [
+    # Verify hashes created with Django's default hashers before the tuned one was configured
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+# PBKDF2 iterations of new hashes; unset keeps Django's default
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', 0)) or None
+if TESTING:
+    # Tests create and log in many users; a full-cost hash would dominate their run time
+    PASSWORD_HASH_ITERATIONS = 1000
+
+# Threads that create and verify password hashes, and the number of logins that may wait for one
+# before further logins are throttled
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASHING_QUEUE = int(os.getenv('PASSWORD_HASHING_QUEUE', 32))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -88,7 +219,7 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'coder_app.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -116,3 +247,16 @@ REST_FRAMEWORK = {
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+
+# Seconds the base info statistics are served from the cache before the counter tables are read again
+BASE_INFO_CACHE_TIMEOUT = int(os.getenv('BASE_INFO_CACHE_TIMEOUT', 60))
+
+# Maximum number of orders that can be created or moved with one bulk request
+BULK_ORDER_LIMIT = int(os.getenv('BULK_ORDER_LIMIT', 100))
+
+# Token authentication cache: seconds a principal stays in the shared cache and in each process,
+# and the number of principals each process keeps. The process timeout bounds how long a logout
+# on another process goes unnoticed.
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', 300))
+TOKEN_CACHE_LOCAL_TIMEOUT = int(os.getenv('TOKEN_CACHE_LOCAL_TIMEOUT', 30))
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 1024))
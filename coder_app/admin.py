@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import BusinessProfile, CustomerProfile, Order, Offer, OfferDetail, Review
+from .models import (BusinessProfile, CustomerProfile, Order, OrderEvent, Offer, OfferDetail, Review,
+                     RatingSummary)
 from django.utils.html import format_html
 
 class CustomerProfileAdmin(admin.ModelAdmin):
@@ -92,6 +93,19 @@ class OfferDetailAdmin(admin.ModelAdmin):
     list_filter = ('offer_type',)
     ordering = ('offer',)
 
+class RatingSummaryAdmin(admin.ModelAdmin):
+    # Read-only admin interface for the denormalized RatingSummary model
+    list_display = ('business_user', 'review_count', 'rating_sum', 'updated_at')
+    search_fields = ('business_user__username',)
+    readonly_fields = ('review_count', 'rating_sum', 'star_1', 'star_2', 'star_3', 'star_4', 'star_5')
+
+class OrderEventAdmin(admin.ModelAdmin):
+    # Read-only admin interface for the append-only OrderEvent log
+    list_display = ('id', 'order', 'from_status', 'to_status', 'actor', 'created_at')
+    list_filter = ('to_status',)
+    readonly_fields = ('order', 'from_status', 'to_status', 'actor', 'created_at')
+    ordering = ('-created_at',)
+
 # Register the models with their custom admin interfaces
 admin.site.register(BusinessProfile, BusinessProfileAdmin)
 admin.site.register(CustomerProfile, CustomerProfileAdmin)
@@ -99,3 +113,5 @@ admin.site.register(Order, OrderAdmin)
 admin.site.register(Offer, OfferAdmin)
 admin.site.register(OfferDetail, OfferDetailAdmin)
 admin.site.register(Review, ReviewAdmin)
+admin.site.register(RatingSummary, RatingSummaryAdmin)
+admin.site.register(OrderEvent, OrderEventAdmin)
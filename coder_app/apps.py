@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoderAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'coder_app'
+
+    def ready(self):
+        # Registers the signal handlers that keep derived data in sync.
+        from coder_app import signals  # noqa: F401
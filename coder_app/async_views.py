@@ -0,0 +1,230 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import (AuthenticationFailed, NotAuthenticated, PermissionDenied, Throttled,
+                                       ValidationError)
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+from rest_framework.views import exception_handler
+from coder_app import views
+from coder_app.authentication import CachedTokenAuthentication
+from coder_app.mixins import FieldSelectionMixin
+from coder_app.serializers import BusinessProfileSerializer, LoginSerializer, OfferSerializer
+from utils.aggregates import aload_business_aggregates
+from utils.cache import acache_response, business_profile_tags, offer_detail_tags
+from utils.conditional import aconditional_get, offer_validators
+from utils.functions import aget_offer_or_none, aget_user_with_profiles, build_profile_response, get_profile_data
+from utils.instrumentation import timing_serialization
+from utils.profile_helpers import is_provider
+from utils.statistics import aget_base_info_statistics
+from utils.utils import aauthenticate_user, acreate_token_for_user
+
+# Views served by the ASGI entry point (Coder.asgi_urls). They return the same data as their
+# synchronous counterparts in views.py, but do not hold a thread while waiting, and read
+# independent rows concurrently with asyncio.gather.
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    # Logs in a user like LoginView. The password is verified in the hashing pool while the
+    # event loop keeps serving other requests.
+
+    async def post(self, request):
+        # Apply the same anonymous rate limit as the DRF views
+        throttle = AnonRateThrottle()
+        if not await sync_to_async(throttle.allow_request)(request, self):
+            return throttled_response(Throttled(wait=throttle.wait()))
+
+        # Deserialize and validate the incoming data
+        serializer = LoginSerializer(data=parse_request_data(request))
+        if not serializer.is_valid():
+            return JsonResponse({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Authenticate the user using the provided credentials
+            user = await aauthenticate_user(
+                serializer.validated_data['username'], serializer.validated_data['password']
+            )
+        except ValidationError as e:
+            # Return an error response if authentication fails
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Throttled as e:
+            # Return an error response if too many logins are waiting for the hashing pool
+            return throttled_response(e)
+
+        # Create a token for the authenticated user
+        token_key = await acreate_token_for_user(user)
+        return JsonResponse({
+            'token': token_key,
+            'user_id': user.id,
+            'username': user.username,
+            # The role is joined with the user, so this needs no query
+            'profile_type': "business" if is_provider(user) else "customer",
+        }, status=status.HTTP_200_OK)
+
+
+def parse_request_data(request):
+    """
+    Returns the JSON body of a request, or its form data.
+    """
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+    return request.POST
+
+def throttled_response(exception):
+    """
+    Builds the 429 response DRF returns for a Throttled exception.
+    """
+    response = JsonResponse({'detail': str(exception.detail)}, status=exception.status_code)
+    if exception.wait is not None:
+        response['Retry-After'] = str(int(exception.wait) or 1)
+    return response
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+    # Base of the async read views. Authentication, permissions and throttling run like in APIView,
+    # in a single hop to the sync thread, and the returned DRF responses are rendered as JSON.
+    # Requests other than GET are passed on to the synchronous `sync_view`.
+    sync_view = None
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await sync_to_async(self.sync_view.as_view())(request, *args, **kwargs)
+
+        self.request = request = Request(request)
+        try:
+            await sync_to_async(self.initial)(request)
+            response = await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(response)
+
+    def initial(self, request):
+        """
+        Authenticates the request and checks the permissions and throttles.
+        """
+        request.user, request.auth = self.authenticate(request)
+        for permission in [permission_class() for permission_class in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                raise NotAuthenticated() if not request.user.is_authenticated else PermissionDenied()
+        for throttle in [throttle_class() for throttle_class in self.throttle_classes]:
+            if not throttle.allow_request(request, self):
+                raise Throttled(throttle.wait())
+
+    def authenticate(self, request):
+        """
+        Returns the user and token of the first authenticator that accepts the request.
+        """
+        for authenticator in [authentication_class() for authentication_class in self.authentication_classes]:
+            user_auth = authenticator.authenticate(request)
+            if user_auth is not None:
+                return user_auth
+        return AnonymousUser(), None
+
+    def handle_exception(self, exc):
+        """
+        Converts an exception into the response DRF would return for it.
+        """
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            exc.auth_header = self.authentication_classes[0]().authenticate_header(self.request)
+        response = exception_handler(exc, {'view': self, 'request': self.request})
+        if response is None:
+            raise exc
+        return response
+
+    def finalize_response(self, response):
+        """
+        Sets up DRF responses to be rendered as JSON by the handler.
+        """
+        if isinstance(response, Response):
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = response.accepted_renderer.media_type
+            response.renderer_context = {'view': self, 'request': self.request}
+        return response
+
+
+class AsyncBaseInfoView(AsyncAPIView):
+    # Serves the statistics of BaseInfoView; the counters and the rating summary are read concurrently.
+    sync_view = views.BaseInfoView
+    permission_classes = [AllowAny]
+
+    async def get(self, request):
+        try:
+            # Fetch the statistics from the cache or the counter tables
+            data = await aget_base_info_statistics()
+            return Response(data, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncOfferDetailView(FieldSelectionMixin, AsyncAPIView):
+    # Serves the offer of OfferDetailView; the offer and its details are read concurrently.
+    sync_view = views.OfferDetailView
+
+    def get_validator_querysets(self, request, id, **kwargs):
+        # The offer, its provider's profile and aggregates provide the ETag and Last-Modified validators
+        return offer_validators(id)
+
+    @aconditional_get
+    @acache_response('offer', tags=offer_detail_tags)
+    async def get(self, request, id):
+        selection = self.get_field_selection()  # Fields and expansions requested by the client
+        offer = await aget_offer_or_none(id, selection)
+        if offer:
+            serializer = OfferSerializer(offer, context=self.get_serializer_context())
+            with timing_serialization(request):
+                data = serializer.data
+            return Response(data, status=status.HTTP_200_OK)
+        return Response({"error": "Offer not found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class AsyncBusinessProfileView(AsyncAPIView):
+    # Serves the profile of BusinessProfileView. The user with both profiles, the rating summary
+    # and the order counter only depend on the user id, so they are read concurrently.
+    sync_view = views.BusinessProfileView
+
+    @acache_response('business_profile', tags=business_profile_tags)
+    async def get(self, request, user_id):
+        context = {}
+        user, _ = await asyncio.gather(aget_user_with_profiles(user_id), aload_business_aggregates(context, user_id))
+        if user is None:
+            raise ValidationError({'error': 'User not found.'})
+
+        business_profile = getattr(user, 'business_profile', None)
+        if business_profile is None:
+            return Response({"error": "Business profile not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(BusinessProfileSerializer(business_profile, context=context).data, status=status.HTTP_200_OK)
+
+
+class AsyncProfileView(AsyncAPIView):
+    # Serves the profile of ProfileView. The aggregates are only needed for providers, so they
+    # are read once the user is known, both at the same time.
+    sync_view = views.ProfileView
+
+    async def get(self, request, user_id):
+        user = await aget_user_with_profiles(user_id)
+        if user is None:
+            raise ValidationError({'error': 'User not found.'})
+
+        context = {}
+        if is_provider(user):
+            await aload_business_aggregates(context, user.id)
+        profile_type, profile_data = get_profile_data(user, context)
+        profile_image = profile_data.get("profile_image") if profile_type == 'business' else profile_data.get("file")
+        return Response(build_profile_response(user, profile_type, profile_data, profile_image), status=status.HTTP_200_OK)
@@ -0,0 +1,21 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from utils.token_cache import get_principal
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that resolves tokens from an in-process LRU cache backed
+    by the shared cache. A cache hit costs no query; the user is rebuilt from the
+    cached principal, which also carries the user's profile type and id.
+    """
+    def authenticate_credentials(self, key):
+        principal = get_principal(key)
+        if principal is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        user = principal.build_user()
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return (user, Token(key=key, user=user))
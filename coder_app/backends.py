@@ -0,0 +1,38 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from utils.login import check_user_password, get_login_queryset, password_pool
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend that verifies passwords in the hashing pool and replaces outdated hashes after
+    a successful login. The user is loaded with the role joined, so the login response's profile
+    type costs no query. aauthenticate awaits the pool instead of blocking the event loop.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = get_login_queryset(username).first()
+        is_correct, new_hash = password_pool.run(check_user_password, user.password if user else None, password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        if new_hash:
+            User.objects.filter(pk=user.pk).update(password=new_hash)
+            user.password = new_hash
+        return user
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = await get_login_queryset(username).afirst()
+        is_correct, new_hash = await password_pool.arun(check_user_password, user.password if user else None, password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        if new_hash:
+            await User.objects.filter(pk=user.pk).aupdate(password=new_hash)
+            user.password = new_hash
+        return user
@@ -1,11 +1,12 @@
 from django_filters import rest_framework as filters
-from coder_app.models import Offer
-from django.db.models import Q
+from coder_app.models import Offer, Order
+from utils.search import search_offers
 
 class OfferFilter(filters.FilterSet):
-    min_price = filters.NumberFilter(field_name="price", lookup_expr="gte")
-    max_price = filters.NumberFilter(field_name="price", lookup_expr="lte")
-    max_delivery_time = filters.NumberFilter(field_name="delivery_time_in_days", lookup_expr="lte")
+    # Filter on the materialized variant minimums, so each filter is a range scan on an indexed column
+    min_price = filters.NumberFilter(field_name="min_price", lookup_expr="gte")
+    max_price = filters.NumberFilter(field_name="min_price", lookup_expr="lte")
+    max_delivery_time = filters.NumberFilter(field_name="min_delivery_time", lookup_expr="lte")
     search = filters.CharFilter(method="filter_search")
 
     class Meta:
@@ -13,6 +14,17 @@ class OfferFilter(filters.FilterSet):
         fields = ["min_price","max_price","max_delivery_time",'price']
 
     def filter_search(self, queryset, name, value):
-        return queryset.filter(
-            Q(title__icontains=value) | Q(description__icontains=value)
-        )
+        # Serves the search from the full-text index; best matches come first unless an ordering is requested.
+        queryset = search_offers(queryset, value)
+        if 'search_rank' in queryset.query.annotations and not self.request.query_params.get('ordering'):
+            queryset = queryset.order_by('search_rank', '-created_at')
+        return queryset
+
+class OrderFilter(filters.FilterSet):
+    status = filters.ChoiceFilter(choices=Order.STATUS_CHOICES)
+    # Accepts created_at_after and created_at_before as dates or date-times
+    created_at = filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = Order
+        fields = ['status', 'created_at']
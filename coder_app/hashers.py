@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with the iteration count from PASSWORD_HASH_ITERATIONS, or Django's default
+    if it is not set. It keeps the pbkdf2_sha256 algorithm name, so existing hashes still
+    verify, and hashes with a different count are rehashed on the next successful login.
+    """
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
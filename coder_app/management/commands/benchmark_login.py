@@ -0,0 +1,44 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from utils.benchmark import run_login_benchmark, save_report
+
+
+class Command(BaseCommand):
+    help = "Sends a burst of logins for the seeded users and reports login requests per second per core."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Number of measured logins.")
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help="Logins in flight at once (default: PASSWORD_HASHING_WORKERS).",
+        )
+        parser.add_argument(
+            '--asgi',
+            action='store_true',
+            help="Send the logins through the ASGI handler and the async login view instead of WSGI.",
+        )
+        parser.add_argument('--output', help="Also write the report to this JSON file.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("At least one request is required.")
+        if options['concurrency'] is not None and options['concurrency'] < 1:
+            raise CommandError("The concurrency must be at least 1.")
+        try:
+            report = run_login_benchmark(
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+                use_asgi=options['asgi'],
+                log=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['requests_per_second']} logins/s, {report['requests_per_second_per_core']} per core."
+        ))
+        if options['output']:
+            save_report(report, options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}."))
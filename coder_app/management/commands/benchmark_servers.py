@@ -0,0 +1,41 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from utils.benchmark import run_server_benchmark, save_report
+
+
+class Command(BaseCommand):
+    help = "Sends the same bursts of reads through WSGI to the sync views and through ASGI to the async views."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Number of measured requests per endpoint and server.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Requests in flight at once.")
+        parser.add_argument(
+            '--no-response-cache',
+            action='store_true',
+            help="Disable the response cache, so every request reaches the database.",
+        )
+        parser.add_argument('--output', help="Also write the report to this JSON file.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("At least one request is required.")
+        if options['concurrency'] < 1:
+            raise CommandError("The concurrency must be at least 1.")
+        try:
+            report = run_server_benchmark(
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+                use_response_cache=not options['no_response_cache'],
+                log=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(report, indent=2))
+        for name, result in report['endpoints'].items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: ASGI serves {result['asgi_to_wsgi_throughput']}x the requests per second of WSGI."
+            ))
+        if options['output']:
+            save_report(report, options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from utils.benchmark import compare_reports, load_report
+from coder_app.management.commands.run_benchmark import print_comparison
+
+
+class Command(BaseCommand):
+    help = "Compares two benchmark reports and lists the metrics that regressed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help="Report of the earlier run.")
+        parser.add_argument('current', help="Report of the later run.")
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.1,
+            help="Relative latency or memory increase that counts as a regression (default 0.1).",
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help="Exit with an error if any metric regressed.",
+        )
+
+    def handle(self, *args, **options):
+        rows = compare_reports(load_report(options['baseline']), load_report(options['current']), options['threshold'])
+        print_comparison(self, rows)
+        regressions = [row for row in rows if row[5]]
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} metrics regressed.")
+        self.stdout.write(self.style.SUCCESS(f"{len(regressions)} of {len(rows)} metrics regressed."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from utils.rating_summary import find_rating_summary_drift, rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the rating summaries from the reviews or checks them for drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only report summaries that differ from the reviews, without changing them.",
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.check_drift()
+            return
+        count = rebuild_rating_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating summaries for {count} business users."))
+
+    def check_drift(self):
+        """
+        Prints every summary that does not match the reviews and fails if any are found.
+        """
+        drift = find_rating_summary_drift()
+        for scope, stored, expected in drift:
+            self.stdout.write(f"{scope}: stored {stored}, expected {expected}")
+        if drift:
+            raise CommandError(f"{len(drift)} rating summaries have drifted. Run without --check to rebuild them.")
+        self.stdout.write(self.style.SUCCESS("Rating summaries match the reviews."))
@@ -0,0 +1,75 @@
+import os
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from utils.benchmark import compare_reports, load_report, run_benchmark, save_report
+
+
+class Command(BaseCommand):
+    help = "Requests every API endpoint against the seeded data and records latency, queries and memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help="Measured requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=2, help="Unmeasured requests per endpoint.")
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            dest='endpoints',
+            help="Only benchmark the URL with this name. Can be repeated.",
+        )
+        parser.add_argument('--output', help="Path of the JSON report (default: benchmarks/<timestamp>.json).")
+        parser.add_argument('--compare', metavar='BASELINE', help="Compare the run with a previous report.")
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.1,
+            help="Relative latency or memory increase that counts as a regression (default 0.1).",
+        )
+        parser.add_argument(
+            '--no-response-cache',
+            action='store_true',
+            help="Disable the response cache to measure uncached responses.",
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help="Exit with an error if the comparison finds regressions.",
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("At least one iteration is required.")
+        baseline = load_report(options['compare']) if options['compare'] else None
+
+        cache_settings = {'RESPONSE_CACHE_TIMEOUT': 0} if options['no_response_cache'] else {}
+        with override_settings(**cache_settings):
+            try:
+                report = run_benchmark(
+                    iterations=options['iterations'],
+                    warmup=options['warmup'],
+                    only=options['endpoints'],
+                    log=self.stdout.write,
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        output = options['output'] or os.path.join('benchmarks', f"{datetime.now():%Y%m%d-%H%M%S}.json")
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        save_report(report, output)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {output}."))
+
+        if baseline is not None:
+            rows = compare_reports(baseline, report, options['threshold'])
+            print_comparison(self, rows)
+            regressions = [row for row in rows if row[5]]
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} metrics regressed.")
+
+
+def print_comparison(command, rows):
+    """
+    Prints a comparison table and highlights regressed metrics.
+    """
+    for name, metric, before, after, change, regressed in rows:
+        line = f"{name:<24} {metric:<15} {before:>12} -> {after:<12} {change:+.1%}"
+        command.stdout.write(command.style.ERROR(line) if regressed else line)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from utils.benchmark import benchmark_users_exist, clear_benchmark_data, seed_benchmark_data
+
+
+class Command(BaseCommand):
+    help = "Seeds large volumes of users, offers, orders and reviews for benchmarks using bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=100, help="Number of business users.")
+        parser.add_argument('--customers', type=int, default=1000, help="Number of customers.")
+        parser.add_argument('--offers', type=int, default=1000, help="Number of offers, each with three variants.")
+        parser.add_argument('--orders', type=int, default=10000, help="Number of orders.")
+        parser.add_argument('--reviews', type=int, default=5000, help="Number of reviews.")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per INSERT statement.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed, so runs produce the same data.")
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help="Delete previously seeded benchmark data first. This may take a while on large datasets.",
+        )
+
+    def handle(self, *args, **options):
+        if options['providers'] < 1 or options['customers'] < 1:
+            raise CommandError("At least one provider and one customer are required.")
+        if benchmark_users_exist():
+            if not options['clear']:
+                raise CommandError("Benchmark data already exists. Use --clear to replace it.")
+            self.stdout.write("Deleting previous benchmark data...")
+            clear_benchmark_data()
+
+        created = seed_benchmark_data(
+            providers=options['providers'],
+            customers=options['customers'],
+            offers=options['offers'],
+            orders=options['orders'],
+            reviews=options['reviews'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        summary = ', '.join(f"{count} {name}" for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}."))
@@ -0,0 +1,114 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from utils.instrumentation import (QueryRecorder, get_instrumentation_setting, is_over_budget,
+                                   log_request, metrics_registry, recording_queries)
+
+
+class ASGIURLconfMiddleware:
+    """
+    Resolves requests that come in through the ASGI handler with ASGI_ROOT_URLCONF, which routes
+    logins and the read-heavy views to async views. Requests through WSGI keep ROOT_URLCONF.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = settings.ASGI_ROOT_URLCONF
+        # Under ASGI this returns the coroutine of the next middleware, which the handler awaits
+        return self.get_response(request)
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Records the view, SQL query count and time, serialization and render time and
+    response size of every request, feeds them into the metrics registry and logs
+    requests that exceed the budget or repeat the same query (N+1).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_instrumentation_setting('REQUEST_INSTRUMENTATION_ENABLED', True):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._serialization_time = request._render_time = None
+        started = time.perf_counter()
+        with recording_queries(recorder):
+            response = self.get_response(request)
+        return self.record_request(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not get_instrumentation_setting('REQUEST_INSTRUMENTATION_ENABLED', True):
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._serialization_time = request._render_time = None
+        started = time.perf_counter()
+        # Sync views and the async ORM run their queries in the sync thread shared by all requests;
+        # sync_to_async carries this request's context there, so only its own queries are recorded
+        with recording_queries(recorder):
+            response = await self.get_response(request)
+        return self.record_request(request, response, recorder, time.perf_counter() - started)
+
+    def record_request(self, request, response, recorder, duration):
+        """
+        Feeds the request into the metrics registry and logs it if it exceeds the budget.
+        """
+        view = self.get_view_name(request)
+        if view is None:
+            return response
+
+        sample = {
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration': duration,
+            'queries': recorder.count,
+            'sql_duration': recorder.duration,
+            # Set by the views around serializer.data; None for responses that were not serialized
+            'serialization': request._serialization_time,
+            'render': request._render_time,
+            # Streamed bodies are produced after the middleware returns, so their size is unknown
+            'size': None if response.streaming else len(response.content),
+            'duplicates': recorder.duplicates(get_instrumentation_setting('DUPLICATE_QUERY_THRESHOLD', 5)),
+        }
+        sample['over_budget'] = is_over_budget(sample)
+        metrics_registry.record(sample)
+        log_request(sample)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook; time the rendering of the body
+        started = time.perf_counter()
+
+        def record_render_time(rendered):
+            request._render_time = time.perf_counter() - started
+
+        response.add_post_render_callback(record_render_time)
+        return response
+
+    def get_view_name(self, request):
+        """
+        Returns the URL name of the resolved view, or None for unresolved and excluded URLs.
+        """
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.view_name in get_instrumentation_setting('INSTRUMENTATION_EXCLUDED_VIEWS', ()):
+            return None
+        return match.view_name
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.3 on 2026-10-17 05:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+STAR_FIELDS = {1: 'star_1', 2: 'star_2', 3: 'star_3', 4: 'star_4', 5: 'star_5'}
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    # Fills the summaries from the reviews that already exist.
+    Review = apps.get_model('coder_app', 'Review')
+    RatingSummary = apps.get_model('coder_app', 'RatingSummary')
+    GlobalRatingSummary = apps.get_model('coder_app', 'GlobalRatingSummary')
+    counters = {'review_count': Count('id'), 'rating_sum': Sum('rating')}
+    counters.update({field: Count('id', filter=Q(rating=star)) for star, field in STAR_FIELDS.items()})
+
+    rows = Review.objects.order_by().values('business_user_id').annotate(**counters)
+    RatingSummary.objects.bulk_create([
+        RatingSummary(
+            business_user_id=row.pop('business_user_id'),
+            **{key: value or 0 for key, value in row.items()}
+        )
+        for row in rows
+    ])
+    totals = Review.objects.aggregate(**counters)
+    GlobalRatingSummary.objects.create(pk=1, **{key: value or 0 for key, value in totals.items()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('coder_app', '0018_rename_file_businessprofile_profile_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlobalRatingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('star_1', models.IntegerField(default=0)),
+                ('star_2', models.IntegerField(default=0)),
+                ('star_3', models.IntegerField(default=0)),
+                ('star_4', models.IntegerField(default=0)),
+                ('star_5', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RatingSummary',
+            fields=[
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('star_1', models.IntegerField(default=0)),
+                ('star_2', models.IntegerField(default=0)),
+                ('star_3', models.IntegerField(default=0)),
+                ('star_4', models.IntegerField(default=0)),
+                ('star_5', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
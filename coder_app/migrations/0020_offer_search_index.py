@@ -0,0 +1,55 @@
+from django.db import migrations
+
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS coder_app_offer_search "
+    "USING fts5(title, description, details, features, tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO coder_app_offer_search (rowid, title, description, details, features) "
+    "SELECT o.id, o.title, o.description, "
+    "COALESCE((SELECT group_concat(d.variant_title || ' ' || COALESCE(d.additional_details, ''), ' ') "
+    "FROM coder_app_offerdetail d WHERE d.offer_id = o.id), ''), "
+    "COALESCE((SELECT group_concat(f.value, ' ') FROM coder_app_offerdetail d, json_each(d.features) f "
+    "WHERE d.offer_id = o.id), '') "
+    "FROM coder_app_offer o",
+]
+
+POSTGRES_CREATE = [
+    "CREATE TABLE IF NOT EXISTS coder_app_offer_search ("
+    "offer_id bigint PRIMARY KEY REFERENCES coder_app_offer (id) ON DELETE CASCADE, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS coder_app_offer_search_document_gin "
+    "ON coder_app_offer_search USING GIN (document)",
+    "INSERT INTO coder_app_offer_search (offer_id, document) "
+    "SELECT o.id, "
+    "setweight(to_tsvector('simple', o.title), 'A') || "
+    "setweight(to_tsvector('simple', o.description), 'C') || "
+    "setweight(to_tsvector('simple', COALESCE((SELECT string_agg(d.variant_title || ' ' || "
+    "COALESCE(d.additional_details, ''), ' ') FROM coder_app_offerdetail d WHERE d.offer_id = o.id), '')), 'B') || "
+    "setweight(to_tsvector('simple', COALESCE((SELECT string_agg(f.value, ' ') FROM coder_app_offerdetail d, "
+    "jsonb_array_elements_text(d.features) f WHERE d.offer_id = o.id), '')), 'B') "
+    "FROM coder_app_offer o",
+]
+
+CREATE_STATEMENTS = {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}
+
+
+def create_search_index(apps, schema_editor):
+    # Creates and fills the full-text index for the database in use; other databases fall back to icontains.
+    for statement in CREATE_STATEMENTS.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_STATEMENTS:
+        schema_editor.execute("DROP TABLE IF EXISTS coder_app_offer_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coder_app', '0019_rating_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
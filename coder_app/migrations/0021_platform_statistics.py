@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:01
+
+from django.db import migrations, models
+
+
+def backfill_platform_statistics(apps, schema_editor):
+    # Counts the offers and business profiles that already exist.
+    Offer = apps.get_model('coder_app', 'Offer')
+    BusinessProfile = apps.get_model('coder_app', 'BusinessProfile')
+    PlatformStatistics = apps.get_model('coder_app', 'PlatformStatistics')
+    PlatformStatistics.objects.create(
+        pk=1, offer_count=Offer.objects.count(), business_profile_count=BusinessProfile.objects.count()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coder_app', '0020_offer_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offer_count', models.IntegerField(default=0)),
+                ('business_profile_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_platform_statistics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:31
+
+from django.db import migrations, models
+from django.db.models import F, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_offer_minimums(apps, schema_editor):
+    # Fills the minimums of existing offers from their variants in a single UPDATE.
+    Offer = apps.get_model('coder_app', 'Offer')
+    OfferDetail = apps.get_model('coder_app', 'OfferDetail')
+
+    def variant_minimum(field):
+        return Subquery(
+            OfferDetail.objects.filter(offer_id=OuterRef('pk')).order_by()
+            .values('offer_id').annotate(minimum=Min(field)).values('minimum')
+        )
+
+    Offer.objects.update(
+        min_price=Coalesce(variant_minimum('variant_price'), F('price')),
+        min_delivery_time=Coalesce(variant_minimum('delivery_time_in_days'), F('delivery_time_in_days')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coder_app', '0021_platform_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='min_delivery_time',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='min_price',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_offer_minimums, migrations.RunPython.noop),
+    ]
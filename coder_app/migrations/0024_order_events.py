@@ -0,0 +1,67 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:37
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import Counter
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_order_counters(apps, schema_editor):
+    # Counts the existing orders per provider, customer, offer and customer and offer.
+    Order = apps.get_model('coder_app', 'Order')
+    OrderStatusCounter = apps.get_model('coder_app', 'OrderStatusCounter')
+    groupings = {
+        ('user_id',): lambda row: f"customer:{row['user_id']}",
+        ('offer_id',): lambda row: f"offer:{row['offer_id']}",
+        ('user_id', 'offer_id'): lambda row: f"customer:{row['user_id']}:offer:{row['offer_id']}",
+        ('business_user_id',): lambda row: f"provider:{row['business_user_id']}" if row['business_user_id'] else None,
+    }
+    counters = Counter()
+    for fields, build_key in groupings.items():
+        for row in Order.objects.order_by().values(*fields, 'status').annotate(count=Count('id')):
+            key = build_key(row)
+            if key:
+                counters[key, row['status']] += row['count']
+    OrderStatusCounter.objects.bulk_create(
+        [OrderStatusCounter(key=key, status=status, count=count) for (key, status), count in counters.items()],
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coder_app', '0023_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20, null=True)),
+                ('to_status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_events', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='coder_app.order')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('key', 'status'), name='order_counter_key_status_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_order_counters, migrations.RunPython.noop),
+    ]
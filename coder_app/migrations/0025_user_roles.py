@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_user_roles(apps, schema_editor):
+    # Stores the profile type of existing users; a business profile wins, as it did when both tables were probed.
+    UserRole = apps.get_model('coder_app', 'UserRole')
+    BusinessProfile = apps.get_model('coder_app', 'BusinessProfile')
+    CustomerProfile = apps.get_model('coder_app', 'CustomerProfile')
+
+    business_ids = set(BusinessProfile.objects.values_list('user_id', flat=True))
+    customer_ids = set(CustomerProfile.objects.values_list('user_id', flat=True)) - business_ids
+    UserRole.objects.bulk_create(
+        [UserRole(user_id=user_id, profile_type='business') for user_id in business_ids]
+        + [UserRole(user_id=user_id, profile_type='customer') for user_id in customer_ids],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('coder_app', '0024_order_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRole',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='role', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('profile_type', models.CharField(choices=[('business', 'Business'), ('customer', 'Customer')], db_index=True, max_length=20)),
+            ],
+        ),
+        migrations.RunPython(backfill_user_roles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from rest_framework.response import Response
+from utils.field_selection import FULL_SELECTION, get_field_selection
+from utils.instrumentation import timing_serialization
+
+
+class FieldSelectionMixin:
+    """
+    Reads `?fields=` and `?expand=` on GET requests and passes the selection
+    to the serializer context. Views use it to trim their queryset plan.
+    """
+    def get_field_selection(self):
+        """
+        Returns the selection of the current request; writes always use the full representation.
+        """
+        if self.request.method != 'GET':
+            return FULL_SELECTION
+        if not hasattr(self, '_field_selection'):
+            self._field_selection = get_field_selection(self.request.query_params)
+        return self._field_selection
+
+    def get_serializer_context(self):
+        # Adds the selection to the context of the parent view, if it has one
+        parent = getattr(super(), 'get_serializer_context', None)
+        context = parent() if parent else {}
+        context['field_selection'] = self.get_field_selection()
+        return context
+
+
+class TimedListMixin:
+    """
+    Lists like ListModelMixin, but records the time spent in `serializer.data`
+    as the serialization time of the request.
+    """
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(queryset if page is None else page, many=True)
+        with timing_serialization(request):
+            data = serializer.data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
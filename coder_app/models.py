@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 class Offer(models.Model):
@@ -11,14 +11,17 @@ class Offer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="offers")
+    # Smallest price and delivery time over the offer's variants, kept up to date when the offer or its details change
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, db_index=True, editable=False)
+    min_delivery_time = models.IntegerField(null=True, blank=True, db_index=True, editable=False)
 
-    def min_price(self):
-        # Returns the price of the offer.
-        return self.price
-
-    def min_delivery_time(self):
-        # Returns the delivery time of the offer in days.
-        return self.delivery_time_in_days
+    class Meta:
+        indexes = [
+            # A provider's offers, newest first
+            models.Index(fields=['user', '-created_at'], name='offer_user_created_idx'),
+            # The default offer list ordering
+            models.Index(fields=['-created_at', 'min_price'], name='offer_created_price_idx'),
+        ]
 
     def __str__(self):
         # Returns the string representation of the offer.
@@ -43,6 +46,24 @@ class Review(models.Model):
     class Meta:
         # Orders reviews by creation date in descending order.
         ordering = ['-created_at']
+        indexes = [
+            # The duplicate check before a review is created
+            models.Index(fields=['business_user', 'reviewer'], name='review_business_reviewer_idx'),
+            # The default review list ordering and its cursor
+            models.Index(fields=['-updated_at', '-id'], name='review_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remembers the loaded business user and rating, so a save can move the rating between summaries.
+        instance = super().from_db(db, field_names, values)
+        instance.saved_rating_key = (instance.__dict__.get('business_user_id'), instance.__dict__.get('rating'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The post_save signals update the rating summaries in the same transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         # Returns a string representation of the review, including reviewer and business user.
@@ -58,6 +79,8 @@ class OfferDetail(models.Model):
     additional_details = models.TextField(null=True, blank=True)
     offer_type = models.CharField(max_length=50, choices=[('basic', 'Basic'), ('standard', 'Standard'), ('premium', 'Premium')], null=True, blank=True)
     features = models.JSONField(default=list)
+    # Only serves as an ETag validator of the offer, whose own updated_at keeps meaning the offer's fields
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         # Returns the string representation of the offer detail.
@@ -65,6 +88,8 @@ class OfferDetail(models.Model):
 
 class BusinessProfile(models.Model):
     # Represents a business profile associated with a user.
+    PROFILE_TYPE = 'business'
+
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='business_profile')
     company_name = models.CharField(max_length=255)
     company_address = models.TextField()
@@ -75,25 +100,72 @@ class BusinessProfile(models.Model):
     working_hours = models.CharField(max_length=255, blank=True, null=True)
     email = models.EmailField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also moves when the user row changes, so ETags of responses embedding the user change with it
+    updated_at = models.DateTimeField(auto_now=True)
     profile_image = models.ImageField(upload_to='profile_images/', blank=True, null=True)
 
+    def save(self, *args, **kwargs):
+        # Stores the user's role together with a new profile.
+        save_profile_with_role(self, super().save, *args, **kwargs)
+
     def __str__(self):
         # Returns the company name as the string representation.
         return self.company_name
 
 class CustomerProfile(models.Model):
     # Represents a customer profile associated with a user.
+    PROFILE_TYPE = 'customer'
+
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='customer_profile')
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     date_of_birth = models.DateField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also moves when the user row changes, so ETags of responses embedding the user change with it
+    updated_at = models.DateTimeField(auto_now=True)
     file = models.ImageField(upload_to='profile_images/', null=True, blank=True)
 
+    def save(self, *args, **kwargs):
+        # Stores the user's role together with a new profile.
+        save_profile_with_role(self, super().save, *args, **kwargs)
+
     def __str__(self):
         # Returns the full name of the customer.
         return f"{self.first_name} {self.last_name}"
 
+class UserRole(models.Model):
+    # Holds the profile type of a user, so it can be read without probing both profile tables.
+    PROFILE_TYPE_CHOICES = [
+        ('business', 'Business'),
+        ('customer', 'Customer'),
+    ]
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='role')
+    profile_type = models.CharField(max_length=20, choices=PROFILE_TYPE_CHOICES, db_index=True)
+
+    @classmethod
+    def store(cls, profile_type, user_ids, batch_size=None):
+        # Stores the profile type of the users; profiles created one by one and in bulk both end up here.
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, profile_type=profile_type) for user_id in user_ids],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['profile_type'],
+        )
+
+    def __str__(self):
+        # Returns a string representation including the user and the profile type.
+        return f'{self.user_id}: {self.profile_type}'
+
+def save_profile_with_role(profile, save, *args, **kwargs):
+    # Saves a profile; a new profile stores the user's role in the same transaction.
+    created = profile._state.adding
+    with transaction.atomic():
+        save(*args, **kwargs)
+        if created:
+            UserRole.store(profile.PROFILE_TYPE, [profile.user_id])
+
 class Order(models.Model):
     # Represents an order placed by a customer for an offer.
     STATUS_CHOICES = [
@@ -102,6 +174,11 @@ class Order(models.Model):
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled')
     ]
+    # Statuses an order can move to from its current status
+    STATUS_TRANSITIONS = {
+        'pending': ('in_progress', 'cancelled'),
+        'in_progress': ('completed', 'cancelled'),
+    }
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='customer_orders')
     business_user = models.ForeignKey(
@@ -119,11 +196,36 @@ class Order(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     features = models.JSONField(default=list, blank=True)
 
+    class Meta:
+        indexes = [
+            # Order counts per provider, customer and offer by status
+            models.Index(fields=['business_user', 'status'], name='order_business_status_idx'),
+            models.Index(fields=['user', 'status'], name='order_user_status_idx'),
+            models.Index(fields=['offer', 'status'], name='order_offer_status_idx'),
+            # The pending order count of every provider in offer and profile lists
+            models.Index(
+                fields=['business_user'], name='order_in_progress_idx',
+                condition=models.Q(status='in_progress')
+            ),
+        ]
+
+    # The user logged as actor of the next status change; the customer is the actor of the creation
+    event_actor = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remembers the loaded status, so a save can log the change.
+        instance = super().from_db(db, field_names, values)
+        instance.saved_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
         # Sets default values for business_user and features before saving the order.
+        # The post_save signals log the creation or status change in the same transaction.
         self.set_business_user_if_missing()
         self.set_features_from_offer_detail_if_missing()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def set_business_user_if_missing(self):
         # Assigns the business user from the offer if not already set.
@@ -134,3 +236,87 @@ class Order(models.Model):
         # Assigns features from the offer detail if not already set.
         if self.offer_detail_id and not self.features:
             self.features = self.offer_detail_id.features or []
+
+class OrderEvent(models.Model):
+    # Append-only log of an order's status changes; from_status is empty for the creation.
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events')
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, null=True, blank=True)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_events')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+
+    def __str__(self):
+        # Returns a string representation including the order and the transition.
+        return f'Order {self.order_id}: {self.from_status or "-"} -> {self.to_status}'
+
+class OrderStatusCounter(models.Model):
+    # Holds the number of orders per status for a provider, a customer, an offer or a customer's orders of an offer.
+    key = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'status'], name='order_counter_key_status_uniq'),
+        ]
+
+    def __str__(self):
+        # Returns a string representation including the key and the status.
+        return f'{self.key} {self.status}: {self.count}'
+
+class RatingSummaryBase(models.Model):
+    # Holds denormalized review counters so averages do not need an aggregate query.
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    star_1 = models.IntegerField(default=0)
+    star_2 = models.IntegerField(default=0)
+    star_3 = models.IntegerField(default=0)
+    star_4 = models.IntegerField(default=0)
+    star_5 = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STAR_FIELDS = {1: 'star_1', 2: 'star_2', 3: 'star_3', 4: 'star_4', 5: 'star_5'}
+
+    class Meta:
+        abstract = True
+
+    def average_rating(self):
+        # Returns the average rating or None if there are no reviews.
+        return self.rating_sum / self.review_count if self.review_count else None
+
+    def histogram(self):
+        # Returns the number of reviews per star.
+        return {star: getattr(self, field) for star, field in self.STAR_FIELDS.items()}
+
+class RatingSummary(RatingSummaryBase):
+    # Represents the rating counters of a single business user.
+    business_user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary'
+    )
+
+    def __str__(self):
+        # Returns a string representation including the business user.
+        return f'Rating summary for {self.business_user_id}'
+
+class GlobalRatingSummary(RatingSummaryBase):
+    # Represents the rating counters over all reviews. Only the row with pk=1 is used.
+    SINGLETON_ID = 1
+
+    def __str__(self):
+        # Returns a fixed string representation for the singleton row.
+        return 'Global rating summary'
+
+class PlatformStatistics(models.Model):
+    # Holds counters for the landing page statistics. Only the row with pk=1 is used.
+    SINGLETON_ID = 1
+
+    offer_count = models.IntegerField(default=0)
+    business_profile_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        # Returns a fixed string representation for the singleton row.
+        return 'Platform statistics'
@@ -0,0 +1,323 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework import status
+from django.http import StreamingHttpResponse
+from utils.utils import stream_json_array
+from utils.instrumentation import timing_serialization
+from utils.sideloading import attach_included, is_normalized
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPaginationMixin:
+    """
+    Adds an opt-in cursor mode to a page number pagination class.
+
+    The cursor mode is enabled with `?cursor=` (or `?pagination=cursor` for the
+    first page). Pages are selected with a WHERE condition on the last row of the
+    previous page instead of an OFFSET, and the total count is only computed
+    when `?count=true` is passed. The keyset follows the ordering of the queryset,
+    so `?ordering=` is honoured; orderings on computed values are rejected.
+    """
+    # Query parameter holding the encoded position of the last row
+    cursor_query_param = 'cursor'
+    # Ordering used in cursor mode when the queryset has none; must end with a unique field as tie-breaker
+    cursor_ordering = ('-id',)
+    # Invalid cursor message
+    invalid_cursor_message = 'Invalid cursor'
+    # Message for orderings that cannot be used as a keyset, such as the search rank
+    unsupported_ordering_message = 'Cursor pagination is not supported for this ordering; use page numbers instead.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Switches to cursor mode when requested, otherwise keeps the regular behaviour
+        self.cursor_mode = self.is_cursor_requested(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_queryset_by_cursor(queryset, request)
+
+    def get_paginated_response(self, data):
+        # Returns the cursor response in cursor mode, otherwise the regular response
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        response = {'next': self.get_next_cursor_link(), 'results': data}
+        if self.cursor_count is not None:
+            response['count'] = self.cursor_count
+            response['total_pages'] = -(-self.cursor_count // self.cursor_page_size) if self.cursor_page_size else 0
+        return Response(response)
+
+    def is_cursor_requested(self, request):
+        """
+        Returns True if the client asked for cursor pagination.
+        """
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get('pagination') == 'cursor'
+        )
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        """
+        Returns the rows that follow the cursor in the keyset ordering.
+        """
+        self.request = request
+        self.cursor_page_size = self.get_page_size(request)
+        self.keyset_ordering = self.get_keyset_ordering(queryset)
+        self.cursor_count = queryset.count() if self.is_count_requested(request) else None
+        queryset = queryset.order_by(*self.get_cursor_order_by())
+
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param), queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_after_condition(position))
+
+        rows = list(queryset[:self.cursor_page_size + 1])
+        self.has_next = len(rows) > self.cursor_page_size
+        rows = rows[:self.cursor_page_size]
+        self.last_position = [self.get_row_value(rows[-1], field) for field, _ in self.get_cursor_fields()] if rows else None
+        return rows
+
+    def is_count_requested(self, request):
+        """
+        Returns True if the client asked for the total count in cursor mode.
+        """
+        return request.query_params.get('count', '').lower() in ('1', 'true', 'yes')
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Returns the ordering of the queryset with the id as tie-breaker, or the cursor ordering
+        if the queryset has no explicit one. Raises a 400 for orderings that are not model columns.
+        """
+        ordering = [self.get_ordering_name(field) for field in queryset.query.order_by]
+        if not ordering:
+            return self.cursor_ordering
+        for field in ordering:
+            if field is None or not self.is_keyset_field(queryset.model, field.lstrip('-')):
+                raise ValidationError({self.cursor_query_param: [self.unsupported_ordering_message]})
+        if 'id' not in {field.lstrip('-') for field in ordering}:
+            ordering.append('-id')
+        return tuple(ordering)
+
+    def get_ordering_name(self, field):
+        """
+        Returns an ordering entry as a possibly '-'-prefixed name, or None if it is not a plain field reference.
+        """
+        if isinstance(field, OrderBy) and isinstance(field.expression, F):
+            return f"{'-' if field.descending else ''}{field.expression.name}"
+        return field if isinstance(field, str) else None
+
+    def is_keyset_field(self, model, name):
+        """
+        Returns True if the name is a concrete column of the model. Annotations such as the search
+        rank are excluded, because their values cannot be compared across requests.
+        """
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        return field.concrete and not field.is_relation
+
+    def get_cursor_fields(self):
+        """
+        Returns the keyset ordering as (field, descending) pairs.
+        """
+        ordering = getattr(self, 'keyset_ordering', self.cursor_ordering)
+        return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+    def get_cursor_order_by(self):
+        """
+        Returns the ORDER BY expressions. NULL sorts as the smallest value on every database.
+        """
+        return [
+            F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_first=True)
+            for field, descending in self.get_cursor_fields()
+        ]
+
+    def get_after_condition(self, position):
+        """
+        Builds the condition for rows strictly after the given position:
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (field, descending), value in zip(self.get_cursor_fields(), position):
+            condition |= equal & self.get_field_after(field, descending, value)
+            equal &= Q(**{f'{field}__isnull': True}) if value is None else Q(**{field: value})
+        return condition
+
+    def get_field_after(self, field, descending, value):
+        """
+        Returns the condition for a single field being after the value.
+        """
+        if descending:
+            if value is None:
+                return Q(pk__in=[])
+            return Q(**{f'{field}__lt': value}) | Q(**{f'{field}__isnull': True})
+        if value is None:
+            return Q(**{f'{field}__isnull': False})
+        return Q(**{f'{field}__gt': value})
+
+    def get_row_value(self, row, field):
+        """
+        Returns the value of a cursor field for a row.
+        """
+        return getattr(row, field)
+
+    def encode_cursor(self, position):
+        """
+        Encodes a position as an opaque URL-safe string.
+        """
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        payload = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+        return urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, encoded, model):
+        """
+        Decodes a cursor into field values. An empty cursor means the first page.
+        """
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(urlsafe_b64decode(padded.encode()).decode())
+            fields = self.get_cursor_fields()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                None if value is None else model._meta.get_field(field).to_python(value)
+                for (field, _), value in zip(fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_cursor_link(self):
+        """
+        Returns the URL of the next page or None on the last page.
+        """
+        if not self.has_next or self.last_position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'pagination')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_position))
+
+
+class SharedPagination(KeysetPaginationMixin, PageNumberPagination):
+    """
+    Pagination policy shared by all list endpoints: page numbers with an
+    opt-in cursor mode and the same response format everywhere.
+    """
+    # Query parameter to allow the client to customize the page size
+    page_size_query_param = 'page_size'
+
+    # Maximum number of items allowed per page
+    max_page_size = 100
+
+    # Whether lists are paginated when the client does not ask for it
+    paginate_by_default = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Lists that are not paginated by default stay complete unless the client asks for a page
+        if not self.paginate_by_default and not self.is_pagination_requested(request):
+            self.cursor_mode = False
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_pagination_requested(self, request):
+        """
+        Returns True if the client asked for a page number, a page size or a cursor.
+        """
+        return (
+            self.page_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+            or self.is_cursor_requested(request)
+        )
+
+    def get_paginated_response(self, data):
+        # Returns a custom paginated response including additional metadata
+        if self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'count': self.page.paginator.count,  # Total number of items
+            'total_pages': self.page.paginator.num_pages,  # Total number of pages
+            'current_page': self.page.number,  # Current page number
+            'results': data  # Paginated data
+        })
+
+
+class CustomPagination(SharedPagination):
+    # Default number of items per page
+    page_size = 6
+
+    # Keyset for the cursor mode: the default offer ordering with the id as tie-breaker
+    cursor_ordering = ('-created_at', 'min_price', '-id')
+
+
+class ReviewPagination(SharedPagination):
+    page_size = 10
+    max_page_size = 50
+
+    # Reviews stay unpaginated unless the client asks for a page
+    paginate_by_default = False
+
+    # Keyset for the cursor mode: the default review ordering with the id as tie-breaker
+    cursor_ordering = ('-updated_at', '-id')
+
+
+class OrderPagination(SharedPagination):
+    page_size = 20
+
+    # Orders stay unpaginated unless the client asks for a page
+    paginate_by_default = False
+
+    # Newest orders first with the id as tie-breaker
+    cursor_ordering = ('-created_at', '-id')
+
+
+class ProfilePagination(SharedPagination):
+    page_size = 20
+
+    # Profiles stay unpaginated unless the client asks for a page
+    paginate_by_default = False
+
+    # Newest profiles first with the id as tie-breaker
+    cursor_ordering = ('-created_at', '-id')
+
+
+class PaginatedListMixin:
+    """
+    Lets an APIView return a list as a plain response, as a page of the
+    shared pagination policy, or as a streamed JSON array with `?stream=true`.
+    """
+    # Pagination class used for the list
+    pagination_class = SharedPagination
+
+    # Number of rows serialized at once when streaming
+    stream_chunk_size = 500
+
+    def list_response(self, request, queryset, serialize, context=None):
+        """
+        Serializes the queryset with `serialize(items)` in the format requested by the client.
+        If `context` is a normalized serializer context, its included entities are added.
+        """
+        paginator = self.pagination_class()
+        if not queryset.ordered:
+            queryset = queryset.order_by(*paginator.get_cursor_order_by())
+
+        if request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+            return StreamingHttpResponse(
+                stream_json_array(queryset, serialize, self.stream_chunk_size),
+                content_type='application/json'
+            )
+
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        with timing_serialization(request):
+            data = serialize(queryset if page is None else page)
+        if page is not None:
+            response = paginator.get_paginated_response(data)
+        else:
+            response = Response(data, status=status.HTTP_200_OK)
+        if context and is_normalized(context):
+            response.data = attach_included(response.data, context)
+        return response
@@ -0,0 +1,15 @@
+import hmac
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class CanViewMetrics(BasePermission):
+    """
+    Allows staff users, and scrapers that send `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = getattr(settings, 'METRICS_TOKEN', None)
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
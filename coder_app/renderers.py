@@ -0,0 +1,43 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from utils.sideloading import attach_included
+
+
+class NormalizedJSONRenderer(JSONRenderer):
+    # Selected with `?format=normalized`; the view then references embedded entities by id.
+    format = 'normalized'
+
+
+class NormalizedResponseMixin:
+    """
+    Adds the opt-in `?format=normalized` mode to a list view. Rows reference
+    users and profiles by id and a top-level `included` map carries each
+    entity once. Streamed lists are never normalized, since the map would only
+    be complete after the last row.
+    """
+    # The default renderers plus the normalized one
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NormalizedJSONRenderer]
+
+    def is_normalized_response(self):
+        """
+        Returns True if content negotiation picked the normalized format for this request.
+        """
+        if self.request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+            return False
+        return isinstance(getattr(self.request, 'accepted_renderer', None), NormalizedJSONRenderer)
+
+    def get_serializer_context(self):
+        # Flags the context, and keeps it so the included entities can be read after serializing
+        parent = getattr(super(), 'get_serializer_context', None)
+        context = parent() if parent else {}
+        if self.is_normalized_response():
+            context['normalized'] = True
+        self.serializer_context = context
+        return context
+
+    def list(self, request, *args, **kwargs):
+        # Adds the included entities to the list response of generic views
+        response = super().list(request, *args, **kwargs)
+        if self.is_normalized_response():
+            response.data = attach_included(response.data, self.serializer_context)
+        return response
@@ -3,8 +3,14 @@ from rest_framework.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from coder_app.models import Offer, BusinessProfile, CustomerProfile, Order, Review, OfferDetail
-from django.db.models import Avg
 from utils.profile_helpers import get_user_type, get_user_profile_image,create_new_user, create_user_profile
+from utils.aggregates import (load_business_aggregates, load_average_ratings, prime_aggregates_from_offer,
+                              get_average_rating_for, get_pending_orders_for,
+                              load_user_summaries, get_user_summary_for, prime_user_summary)
+from utils.sideloading import is_normalized, include_entity
+from utils.field_selection import get_context_selection
+from utils.order_status import can_transition
+from utils.search import indexing_offers_once
 
 # serializers
 
@@ -33,6 +39,57 @@ class UserProfileSerializer(serializers.ModelSerializer):
         """
         return get_user_profile_image(obj)  
 
+def serialize_user_summary(user):
+    """
+    Serializes a user the way orders embed customers and providers.
+    """
+    return UserProfileSerializer(user).data
+
+class IncludedUserField(serializers.ReadOnlyField):
+    # Outputs the user id and adds the serialized user to the `included` map.
+
+    def to_representation(self, user_id):
+        get_user_summary_for(self.context, user_id, serialize_user_summary)
+        return user_id
+
+class UserSummaryField(serializers.ReadOnlyField):
+    # Outputs the serialized user from the summaries that the list serializer loaded for the whole list.
+
+    def to_representation(self, user_id):
+        return get_user_summary_for(self.context, user_id, serialize_user_summary)
+
+class SideloadedUsersMixin:
+    # Replaces the embedded users with their ids in the normalized format.
+    sideloaded_user_fields = ()
+
+    def get_fields(self):
+        """
+        Swaps the nested user serializers for id references when the context is normalized.
+        """
+        fields = super().get_fields()
+        if is_normalized(self.context):
+            for name in self.sideloaded_user_fields:
+                if name in fields:
+                    fields[name] = IncludedUserField(source=f'{fields[name].source or name}_id')
+        return fields
+
+class DynamicFieldsMixin:
+    # Drops the fields the client did not ask for with ?fields= and collapses the nested fields it did not list in ?expand=.
+    # Maps nested field names to a factory for the field that renders a reference instead
+    collapsed_fields = {}
+
+    def get_fields(self):
+        """
+        Keeps only the selected fields, so unrequested nested serializers and method fields are never evaluated.
+        """
+        fields = super().get_fields()
+        selection = get_context_selection(self.context)
+        fields = {name: field for name, field in fields.items() if field.write_only or selection.includes(name)}
+        for name, collapse in self.collapsed_fields.items():
+            if name in fields and not selection.expands(name):
+                fields[name] = collapse()
+        return fields
+
 class RegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
     repeated_password = serializers.CharField(write_only=True)
@@ -78,8 +135,63 @@ class OfferDetailSerializer(serializers.ModelSerializer):
             'id', 'title', 'price', 'delivery_time_in_days',
             'revisions', 'additional_details', 'offer_type', 'features'
         ]
-        
-class BusinessProfileSerializer(serializers.ModelSerializer):
+
+class BusinessAggregatesListSerializer(serializers.ListSerializer):
+    # Preloads rating and order aggregates for all business users in the list.
+    user_id_attr = 'user_id'
+
+    def to_representation(self, data):
+        """
+        Loads the aggregates of the whole page before serializing the items.
+        """
+        items = list(data.all() if hasattr(data, 'all') else data)
+        self.load_aggregates(items)
+        return super().to_representation(items)
+
+    def load_aggregates(self, items):
+        """
+        Loads average ratings and in-progress order counts into the context.
+        """
+        load_business_aggregates(self.context, [getattr(item, self.user_id_attr) for item in items])
+
+class OfferListSerializer(BusinessAggregatesListSerializer):
+    # Uses the aggregates annotated by the offer queryset plan before falling back to grouped queries.
+
+    def load_aggregates(self, items):
+        """
+        Primes the context from the annotated offers and loads whatever is still missing.
+        """
+        selection = get_context_selection(self.context)
+        embeds_profile = selection.expands('business_profile')
+        # The users are joined with their profiles whenever the user or the business profile is expanded
+        sideloads_user = is_normalized(self.context) and (selection.expands('user') or embeds_profile)
+        for item in items:
+            if embeds_profile:
+                prime_aggregates_from_offer(self.context, item)
+            if sideloads_user:
+                prime_user_summary(self.context, item.user, serialize_user_summary)
+        if embeds_profile:
+            super().load_aggregates(items)
+
+class ReviewListSerializer(BusinessAggregatesListSerializer):
+    # Preloads the average rating of every reviewed business user in the list.
+    user_id_attr = 'business_user_id'
+
+    def load_aggregates(self, items):
+        """
+        Loads only the average ratings into the context.
+        """
+        selection = get_context_selection(self.context)
+        if selection.includes('average_rating'):
+            load_average_ratings(self.context, [getattr(item, self.user_id_attr) for item in items])
+        if is_normalized(self.context):
+            user_ids = {
+                getattr(item, f'{name}_id') for item in items for name in ('business_user', 'reviewer')
+                if selection.expands(name)
+            }
+            load_user_summaries(self.context, user_ids, serialize_user_summary)
+
+class BusinessProfileSerializer(SideloadedUsersMixin, serializers.ModelSerializer):
     user = UserProfileSerializer(read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
@@ -96,19 +208,22 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
             'description', 'tel', 'location', 'working_hours', 'created_at',
             'user', 'avg_rating', 'pending_orders', 'email', 'username', 'profile_image'
         ]
+        list_serializer_class = BusinessAggregatesListSerializer
+
+    sideloaded_user_fields = ('user',)
 
     def get_avg_rating(self, obj):
         """
-        Calculates the average rating for the business profile.
+        Returns the average rating for the business profile.
         """
-        avg = Review.objects.filter(business_user=obj.user).aggregate(Avg('rating'))['rating__avg']
+        avg = get_average_rating_for(self.context, obj.user_id)
         return round(avg, 1) if avg else '-'
 
     def get_pending_orders(self, obj):
         """
-        Retrieves the count of pending orders for the business profile.
+        Returns the count of pending orders for the business profile.
         """
-        return Order.objects.filter(business_user=obj.user, status__in=['in_progress']).count()
+        return get_pending_orders_for(self.context, obj.user_id)
 
     def update(self, instance, validated_data):
         """
@@ -126,10 +241,12 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
 
         return instance
     
-class OfferSerializer(serializers.ModelSerializer):
+class OfferSerializer(DynamicFieldsMixin, SideloadedUsersMixin, serializers.ModelSerializer):
     details = OfferDetailSerializer(many=True)
     user = UserProfileSerializer(read_only=True)
     business_profile = serializers.SerializerMethodField()
+    # Rendered as a JSON number, like the model method this column replaced
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False, read_only=True)
 
     class Meta:
         model = Offer
@@ -138,29 +255,55 @@ class OfferSerializer(serializers.ModelSerializer):
             'min_price', 'min_delivery_time', 'image', 'created_at',
             'updated_at', 'details', 'user', 'business_profile'
         ]
+        list_serializer_class = OfferListSerializer
+
+    sideloaded_user_fields = ('user',)
+    collapsed_fields = {
+        'details': lambda: serializers.PrimaryKeyRelatedField(many=True, read_only=True),
+        'user': lambda: serializers.ReadOnlyField(source='user_id'),
+        'business_profile': lambda: serializers.ReadOnlyField(source='user.business_profile.id'),
+    }
 
     def get_business_profile(self, obj):
         """
         Retrieves the business profile associated with the offer's creator.
-        """
-        return BusinessProfileSerializer(obj.user.business_profile).data if hasattr(obj.user, 'business_profile') else None
+        In the normalized format, the profile is included once and referenced by id.
+        """
+        if not hasattr(obj.user, 'business_profile'):
+            return None
+        prime_aggregates_from_offer(self.context, obj)
+        profile = obj.user.business_profile
+        if is_normalized(self.context):
+            return include_entity(
+                self.context, 'business_profiles', profile.id,
+                lambda: BusinessProfileSerializer(profile, context=self.context).data
+            )
+        return BusinessProfileSerializer(profile, context=self.context).data
 
     def create(self, validated_data):
         """
         Creates a new offer along with its associated details.
         """
         details_data = validated_data.pop('details', [])
-        offer = Offer.objects.create(**validated_data)
-        for detail_data in details_data:
-            OfferDetail.objects.create(offer=offer, **detail_data)
+        # The offer is indexed once, after its details were saved
+        with indexing_offers_once():
+            offer = Offer.objects.create(**validated_data)
+            for detail_data in details_data:
+                OfferDetail.objects.create(offer=offer, **detail_data)
+        # The minimums were recalculated in the database as the details were saved
+        offer.refresh_from_db(fields=['min_price', 'min_delivery_time'])
         return offer
 
     def update(self, instance, validated_data):
         """
         Updates the offer and its associated details.
         """
-        self._update_offer_fields(instance, validated_data)
-        self._update_or_create_details(instance, validated_data.pop('details', []))
+        # The offer is indexed once, after its details were saved
+        with indexing_offers_once():
+            self._update_offer_fields(instance, validated_data)
+            self._update_or_create_details(instance, validated_data.pop('details', []))
+        # The minimums were recalculated in the database as the offer and its details were saved
+        instance.refresh_from_db(fields=['min_price', 'min_delivery_time'])
         return instance
 
     def _update_offer_fields(self, instance, validated_data):
@@ -243,6 +386,14 @@ class OrderSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("The specified OfferDetail does not exist.")
         return value
 
+    def validate_status(self, value):
+        """
+        Validates that an existing order may move to the requested status.
+        """
+        if self.instance is not None and not can_transition(self.instance.status, value):
+            raise serializers.ValidationError(f"Orders cannot move from '{self.instance.status}' to '{value}'.")
+        return value
+
     def create(self, validated_data):
         """
         Creates a new order with the validated data.
@@ -253,12 +404,19 @@ class OrderSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """
         Updates the order instance with the provided validated data.
+        A status change is logged with the requesting user as actor when the order is saved.
         """
-        previous_status = instance.status
+        instance.event_actor = self.get_actor()
         self._update_order_fields(instance, validated_data)
-        self._check_status_change(instance, previous_status)
         return instance
 
+    def get_actor(self):
+        """
+        Returns the user making the request, if the view passed it in the context.
+        """
+        request = self.context.get('request')
+        return request.user if request else None
+
     def _create_order(self, validated_data, offer_detail):
         """
         Helper method for creating an order.
@@ -276,19 +434,55 @@ class OrderSerializer(serializers.ModelSerializer):
             setattr(instance, field, validated_data.get(field, getattr(instance, field)))
         instance.save()
 
-    def _check_status_change(self, instance, previous_status):
+class OrderListSerializer(serializers.ListSerializer):
+    # Serializes every distinct customer and provider of the list once and reuses the result by id.
+
+    def to_representation(self, data):
+        """
+        Loads the user summaries of the whole list before serializing the items.
+        """
+        items = list(data.all() if hasattr(data, 'all') else data)
+        selection = get_context_selection(self.context)
+        user_ids = set()
+        if selection.expands('user_details'):
+            user_ids |= {item.user_id for item in items}
+        if selection.expands('business_user'):
+            user_ids |= {item.offer.user_id for item in items}
+        if user_ids:
+            load_user_summaries(self.context, user_ids, serialize_user_summary)
+        return super().to_representation(items)
+
+class OrderReadSerializer(DynamicFieldsMixin, OrderSerializer):
+    # Read-only order output for lists; embedded users are taken from the preloaded summaries.
+    user_details = UserSummaryField(source='user_id')
+    business_user = UserSummaryField(source='offer.user_id')
+
+    class Meta(OrderSerializer.Meta):
+        list_serializer_class = OrderListSerializer
+
+    collapsed_fields = {
+        'user_details': lambda: serializers.ReadOnlyField(source='user_id'),
+        'business_user': lambda: serializers.ReadOnlyField(source='offer.user_id'),
+    }
+
+    def get_fields(self):
         """
-        Checks if the order status has changed to 'in_progress'.
+        References the embedded users by id in the normalized format; they are added to the `included` map.
         """
-        if previous_status != 'in_progress' and instance.status == 'in_progress':
-            print(f"Order {instance.id} status changed to 'in_progress'.")
+        fields = super().get_fields()
+        if is_normalized(self.context):
+            for name, field in fields.items():
+                if isinstance(field, UserSummaryField):
+                    fields[name] = IncludedUserField(source=field.source)
+        return fields
 
 class CustomerProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomerProfile
-        fields = '__all__'
+        # updated_at only serves as an ETag validator
+        exclude = ['updated_at']
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsMixin, SideloadedUsersMixin, serializers.ModelSerializer):
     business_user = UserProfileSerializer(read_only=True)
     reviewer = UserProfileSerializer(read_only=True)
     average_rating = serializers.SerializerMethodField()
@@ -306,14 +500,19 @@ class ReviewSerializer(serializers.ModelSerializer):
             'id', 'rating', 'description', 'business_user', 'business_user_id',
             'reviewer', 'reviewer_id', 'created_at', 'average_rating'
         ]
+        list_serializer_class = ReviewListSerializer
+
+    sideloaded_user_fields = ('business_user', 'reviewer')
+    collapsed_fields = {
+        'business_user': lambda: serializers.ReadOnlyField(source='business_user_id'),
+        'reviewer': lambda: serializers.ReadOnlyField(source='reviewer_id'),
+    }
 
     def get_average_rating(self, obj):
         """
-        Calculates the average rating for the associated business user.
+        Returns the average rating for the associated business user.
         """
-        return Review.objects.filter(business_user=obj.business_user).aggregate(
-            avg=Avg('rating')
-        )['avg'] or 0.0
+        return get_average_rating_for(self.context, obj.business_user_id) or 0.0
 
     def validate(self, data):
         """
@@ -0,0 +1,184 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from coder_app.models import BusinessProfile, CustomerProfile, Offer, OfferDetail, Order, Review
+from utils.cache import invalidate_tags
+from utils.conditional import touch
+from utils.instrumentation import install_query_recorder
+from utils.offer_minimums import refresh_offer_minimums
+from utils.order_status import record_order_deleted, record_order_saved
+from utils.profile_helpers import clear_user_role
+from utils.rating_summary import record_review_deleted, record_review_saved
+from utils.search import remove_offer_from_index, schedule_offer_indexing
+from utils.token_cache import invalidate_token, invalidate_user_tokens
+from utils.statistics import adjust_platform_counter, invalidate_base_info_statistics
+
+
+@receiver(post_save, sender=Offer)
+def index_saved_offer(sender, instance, **kwargs):
+    # Keeps the search index in sync with the offer's title and description.
+    schedule_offer_indexing(instance.id)
+
+
+@receiver(post_delete, sender=Offer)
+def remove_deleted_offer(sender, instance, **kwargs):
+    # Removes a deleted offer from the search index.
+    remove_offer_from_index(instance.id)
+
+
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def index_changed_offer_detail(sender, instance, **kwargs):
+    # Re-indexes the offer when the titles or features of one of its variants change.
+    schedule_offer_indexing(instance.offer_id)
+
+
+@receiver(post_save, sender=User)
+def touch_profiles_of_saved_user(sender, instance, created, **kwargs):
+    # The user's name and email are embedded next to the profile, so the profile's ETag validator moves with them.
+    if not created:
+        touch(BusinessProfile.objects.filter(user_id=instance.id))
+        touch(CustomerProfile.objects.filter(user_id=instance.id))
+
+
+@receiver(post_save, sender=Offer)
+def refresh_saved_offer_minimums(sender, instance, **kwargs):
+    # Offers without variants use their own price and delivery time as minimums.
+    refresh_offer_minimums(instance.id)
+
+
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def refresh_changed_offer_minimums(sender, instance, **kwargs):
+    # A variant's price or delivery time may change the offer's minimums.
+    refresh_offer_minimums(instance.offer_id)
+
+
+@receiver(post_save, sender=Offer)
+def count_created_offer(sender, instance, created, **kwargs):
+    # Counts new offers for the base info statistics.
+    if created:
+        adjust_platform_counter('offer_count', 1)
+
+
+@receiver(post_delete, sender=Offer)
+def count_deleted_offer(sender, instance, **kwargs):
+    # Removes deleted offers from the base info statistics.
+    adjust_platform_counter('offer_count', -1)
+
+
+@receiver(post_save, sender=BusinessProfile)
+def count_created_business_profile(sender, instance, created, **kwargs):
+    # Counts new business profiles for the base info statistics.
+    if created:
+        adjust_platform_counter('business_profile_count', 1)
+
+
+@receiver(post_delete, sender=BusinessProfile)
+def count_deleted_business_profile(sender, instance, **kwargs):
+    # Removes deleted business profiles from the base info statistics.
+    adjust_platform_counter('business_profile_count', -1)
+
+
+@receiver(post_delete, sender=BusinessProfile)
+@receiver(post_delete, sender=CustomerProfile)
+def remove_user_role(sender, instance, **kwargs):
+    # Removes the stored profile type when the profile is deleted.
+    clear_user_role(instance.user_id, sender.PROFILE_TYPE)
+
+
+@receiver(post_save, sender=Review)
+def summarize_saved_review(sender, instance, created, **kwargs):
+    # Adds a new review to the rating summaries or moves a changed rating.
+    record_review_saved(instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def summarize_deleted_review(sender, instance, **kwargs):
+    # Removes deleted reviews, including those of deleted offers and users, from the rating summaries.
+    record_review_deleted(instance)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_review_statistics(sender, instance, **kwargs):
+    # Review counts and averages come from the rating summaries; only the cached statistics need to go.
+    invalidate_base_info_statistics()
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def invalidate_offer_responses(sender, instance, **kwargs):
+    # Cached offer lists, the offer itself and its owner's responses are outdated.
+    invalidate_tags('offers', f'offer:{instance.id}', f'user:{instance.user_id}' if instance.user_id else None)
+
+
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def invalidate_offer_detail_responses(sender, instance, **kwargs):
+    # Offer details are embedded in offer lists and in the offer itself.
+    invalidate_tags('offers', f'offer:{instance.offer_id}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=BusinessProfile)
+@receiver(post_delete, sender=BusinessProfile)
+@receiver(post_save, sender=CustomerProfile)
+@receiver(post_delete, sender=CustomerProfile)
+def invalidate_user_responses(sender, instance, **kwargs):
+    # Users and their profiles are embedded in offers, reviews and business profiles.
+    user_id = instance.id if sender is User else instance.user_id
+    invalidate_tags(f'user:{user_id}')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_responses(sender, instance, **kwargs):
+    # Review lists are outdated, and so are the average rating of the reviewed provider and the reviewer's dashboard.
+    invalidate_tags('reviews', f'user:{instance.business_user_id}', f'user:{instance.reviewer_id}')
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_order_responses(sender, instance, **kwargs):
+    # The in-progress order count of the provider is part of their business profile; both dashboards show the order.
+    invalidate_tags(f'user:{instance.business_user_id}' if instance.business_user_id else None, f'user:{instance.user_id}')
+
+
+@receiver(post_save, sender=Order)
+def log_saved_order(sender, instance, created, **kwargs):
+    # Logs the creation or a status change and updates the order counters.
+    record_order_saved(instance, created)
+
+
+@receiver(post_delete, sender=Order)
+def count_deleted_order(sender, instance, **kwargs):
+    # Removes deleted orders, including those of deleted offers and users, from the order counters.
+    record_order_deleted(instance)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    # A deleted or rotated token must stop authenticating right away.
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=BusinessProfile)
+@receiver(post_delete, sender=BusinessProfile)
+@receiver(post_save, sender=CustomerProfile)
+@receiver(post_delete, sender=CustomerProfile)
+def invalidate_cached_principals(sender, instance, **kwargs):
+    # Cached principals carry the user's columns and profile type, so they are reloaded after a change.
+    invalidate_user_tokens(instance.id if sender is User else instance.user_id)
+
+
+@receiver(connection_created)
+def record_connection_queries(sender, connection, **kwargs):
+    # Every connection gets the wrapper that feeds queries to the request instrumentation.
+    install_query_recorder(connection)
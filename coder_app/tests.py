@@ -1,3 +1,1422 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, PBKDF2SHA1PasswordHasher
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import Min
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import Throttled
+from rest_framework.test import APIClient
+from coder_app.models import (BusinessProfile, CustomerProfile, Offer, OfferDetail, Order, OrderEvent,
+                              OrderStatusCounter, PlatformStatistics, RatingSummary, Review, UserRole)
+from coder_app.pagination import PaginatedListMixin
+from coder_app.serializers import OfferSerializer, ReviewSerializer
+from utils.benchmark import (clear_benchmark_data, compare_reports, refresh_derived_data, run_benchmark,
+                             seed_benchmark_data, seed_profiles)
+from utils.cache import get_tag_versions
+from utils.instrumentation import metrics_registry
+from utils.login import PasswordHashingPool, aauthenticate
+from utils.order_status import expected_order_counters
+from utils.profile_helpers import is_customer
+from utils.rating_summary import find_rating_summary_drift, get_rating_summary, rebuild_rating_summaries
+from utils.search import rebuild_search_index, search_offers
 
-# Create your tests here.
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class OfferQueryCountTests(TestCase):
+    # Ensures that serializing offers takes a fixed number of queries.
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=cls.customer, first_name='Max', last_name='Muster')
+        for index in range(4):
+            provider = User.objects.create_user(f'provider{index}', password='secret')
+            BusinessProfile.objects.create(user=provider, company_name='Company', company_address='Street 1')
+            for number in range(3):
+                offer = Offer.objects.create(title=f'Offer {index}-{number}', description='Text', user=provider)
+                for offer_type in ['basic', 'standard', 'premium']:
+                    OfferDetail.objects.create(
+                        offer=offer, variant_title=offer_type, variant_price=10, delivery_time_in_days=3,
+                        revision_limit=1, offer_type=offer_type, features=['Logo']
+                    )
+            Review.objects.create(rating=4, description='Good', business_user=provider, reviewer=cls.customer, offer=offer)
+            Order.objects.create(user=cls.customer, offer=offer, offer_detail_id=offer.details.first(), status='in_progress')
+        rebuild_rating_summaries()
+
+    def count_queries(self, url, user=None):
+        """
+        Requests the URL and returns the number of executed queries.
+        """
+        client = APIClient()
+        if user:
+            client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_offer_list_query_count_is_independent_of_page_size(self):
+        small_page = self.count_queries('/api/offers/?page_size=2')
+        large_page = self.count_queries('/api/offers/?page_size=12')
+        self.assertEqual(small_page, large_page)
+        # COUNT for pagination, the offers with users, profiles and aggregates, and the details.
+        self.assertEqual(large_page, 3)
+
+    def test_offer_list_includes_aggregates(self):
+        response = APIClient().get('/api/offers/?page_size=1')
+        business_profile = response.json()['results'][0]['business_profile']
+        self.assertEqual(business_profile['avg_rating'], 4.0)
+        self.assertEqual(business_profile['pending_orders'], 1)
+
+    def test_offer_detail_query_count(self):
+        offer = Offer.objects.first()
+        # ETag validators, then the offer with users, profiles and aggregates, and the details.
+        self.assertEqual(self.count_queries(f'/api/offers/{offer.id}/', self.customer), 3)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class OrderQueryCountTests(TestCase):
+    # Ensures that order lists serialize every distinct user once.
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=cls.provider, company_name='Company', company_address='Street 1')
+        offer = Offer.objects.create(title='Offer', description='Text', user=cls.provider)
+        cls.detail = OfferDetail.objects.create(
+            offer=offer, variant_title='basic', variant_price=10, delivery_time_in_days=3,
+            revision_limit=1, offer_type='basic', features=['Logo']
+        )
+        cls.customers = []
+        for index in range(3):
+            customer = User.objects.create_user(f'customer{index}', password='secret')
+            CustomerProfile.objects.create(user=customer, first_name='Max', last_name='Muster')
+            cls.customers.append(customer)
+
+    def create_orders(self, count):
+        """
+        Creates orders spread over the customers.
+        """
+        for index in range(count):
+            Order.objects.create(user=self.customers[index % 3], offer=self.detail.offer, offer_detail_id=self.detail)
+
+    def count_queries(self):
+        """
+        Requests the provider's order list and returns the number of executed queries.
+        """
+        client = APIClient()
+        client.force_authenticate(self.provider)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_order_list_query_count_is_independent_of_order_count(self):
+        self.create_orders(3)
+        few_orders = self.count_queries()
+        self.create_orders(30)
+        self.assertEqual(self.count_queries(), few_orders)
+
+    def test_order_list_embeds_users(self):
+        self.create_orders(1)
+        client = APIClient()
+        client.force_authenticate(self.provider)
+        order = client.get('/api/orders/').json()[0]
+        self.assertEqual(order['user_details']['username'], 'customer0')
+        self.assertEqual(order['business_user']['type'], 'business')
+        self.assertEqual(order['offer_provider'], 'provider')
+        self.assertEqual(order['offer_price'], '10.00')
+
+    def test_order_list_joins_only_the_selected_columns(self):
+        self.create_orders(3)
+        other_provider = User.objects.create_user('other', password='secret')
+        other_offer = Offer.objects.create(title='Other', description='Secret text', user=other_provider)
+        # An order whose variant belongs to another offer still reads the variant's offer title from the join
+        Order.objects.create(user=self.customers[0], offer=other_offer, offer_detail_id=self.detail)
+        client = APIClient()
+        client.force_authenticate(self.customers[0])
+        with CaptureQueriesContext(connection) as queries:
+            orders = client.get('/api/orders/?fields=id,offer_title,offer_provider').json()
+        self.assertEqual({order['offer_provider'] for order in orders}, {'provider', 'other'})
+        self.assertEqual({order['offer_title'] for order in orders}, {'Offer'})
+        order_queries = [query['sql'] for query in queries if query['sql'].startswith('SELECT "coder_app_order"."id"')]
+        self.assertEqual(len(order_queries), 1)
+        self.assertNotIn('"description"', order_queries[0])
+        self.assertNotIn('"password"', order_queries[0])
+
+    def test_bulk_order_creation_query_count_is_independent_of_batch_size(self):
+        client = APIClient()
+        counts = []
+        for size in (2, 20):
+            # A freshly loaded user, so every request also looks up the user's role
+            client.force_authenticate(User.objects.get(pk=self.customers[0].pk))
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post('/api/orders/bulk/', {'offer_detail_ids': [self.detail.id] * size}, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json()['created'], size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        # The role, the details with their offers, the transaction with the orders, events and
+        # status counters, and the user summaries of the response.
+        self.assertEqual(counts[0], 9)
+
+    def test_bulk_order_creation_reports_unknown_details(self):
+        client = APIClient()
+        client.force_authenticate(self.customers[0])
+        response = client.post('/api/orders/bulk/', {'offer_detail_ids': [self.detail.id, 0]}, format='json')
+        results = response.json()['results']
+        self.assertEqual(results[0]['order']['offer_detail_id'], self.detail.id)
+        self.assertEqual(results[1], {'offer_detail_id': 0, 'error': 'OfferDetail not found.'})
+
+    def test_bulk_status_transition_skips_stale_orders(self):
+        self.create_orders(3)
+        current, stale, invalid = Order.objects.order_by('id')
+        stale_updated_at = stale.updated_at.isoformat()
+        stale.save()
+        Order.objects.filter(id=invalid.id).update(status='completed')
+        client = APIClient()
+        client.force_authenticate(self.provider)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post('/api/orders/bulk-status/', {'status': 'in_progress', 'orders': [
+                {'id': current.id}, {'id': stale.id, 'updated_at': stale_updated_at}, {'id': invalid.id},
+            ]}, format='json')
+        self.assertEqual(response.json()['updated'], [current.id])
+        self.assertEqual([item['id'] for item in response.json()['failed']], [stale.id, invalid.id])
+        self.assertEqual(Order.objects.get(id=current.id).status, 'in_progress')
+        # One SELECT for ownership and status and one UPDATE of the orders.
+        self.assertEqual(len([query for query in queries if '"coder_app_order"' in query['sql']]), 2)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class OfferMinimumsTests(TestCase):
+    # Ensures that the materialized minimums follow the offer's variants.
+
+    def setUp(self):
+        self.provider = User.objects.create_user('provider', password='secret')
+        self.offer = Offer.objects.create(title='Logo', description='Text', price=50, delivery_time_in_days=9, user=self.provider)
+
+    def add_detail(self, price, days, offer_type):
+        return OfferDetail.objects.create(
+            offer=self.offer, variant_title=offer_type, variant_price=price, delivery_time_in_days=days,
+            revision_limit=1, offer_type=offer_type
+        )
+
+    def test_minimums_follow_variant_changes(self):
+        self.offer.refresh_from_db()
+        self.assertEqual((self.offer.min_price, self.offer.min_delivery_time), (50, 9))
+        basic = self.add_detail(20, 7, 'basic')
+        self.add_detail(40, 3, 'premium')
+        self.offer.refresh_from_db()
+        self.assertEqual((self.offer.min_price, self.offer.min_delivery_time), (20, 3))
+        basic.delete()
+        self.offer.refresh_from_db()
+        self.assertEqual((self.offer.min_price, self.offer.min_delivery_time), (40, 3))
+
+    def test_price_filters_use_variant_minimums(self):
+        self.add_detail(20, 7, 'basic')
+        self.add_detail(40, 3, 'premium')
+        client = APIClient()
+        self.assertEqual(client.get('/api/offers/?max_price=25').json()['count'], 1)
+        self.assertEqual(client.get('/api/offers/?min_price=30').json()['count'], 0)
+        self.assertEqual(client.get('/api/offers/?max_delivery_time=3').json()['count'], 1)
+
+    def test_minimums_are_rendered_as_numbers(self):
+        self.add_detail(20, 7, 'basic')
+        offer = APIClient().get('/api/offers/').json()['results'][0]
+        self.assertEqual((offer['min_price'], offer['min_delivery_time']), (20.0, 7))
+
+
+class HotPathIndexTests(TestCase):
+    # Ensures that the hot filter and ordering queries are served from an index.
+
+    def get_plan(self, queryset):
+        """
+        Returns the EXPLAIN output of the queryset. PostgreSQL would scan tiny test tables sequentially, so it is told not to.
+        """
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, *index_names):
+        plan = self.get_plan(queryset)
+        self.assertTrue(any(name in plan for name in index_names), f'No index of {index_names} in:\n{plan}')
+
+    def test_order_counts_use_indexes(self):
+        self.assertUsesIndex(
+            Order.objects.filter(business_user_id=1, status='in_progress'),
+            'order_in_progress_idx', 'order_business_status_idx'
+        )
+        self.assertUsesIndex(Order.objects.filter(business_user_id=1, status='completed'), 'order_business_status_idx')
+        self.assertUsesIndex(Order.objects.filter(user_id=1, status='completed'), 'order_user_status_idx')
+        self.assertUsesIndex(Order.objects.filter(offer_id=1, status='in_progress'), 'order_offer_status_idx')
+
+    def test_review_queries_use_indexes(self):
+        self.assertUsesIndex(Review.objects.filter(business_user_id=1, reviewer_id=2), 'review_business_reviewer_idx')
+        self.assertUsesIndex(Review.objects.order_by('-updated_at', '-id')[:10], 'review_updated_idx')
+
+    def test_offer_orderings_use_indexes(self):
+        self.assertUsesIndex(Offer.objects.filter(user_id=1).order_by('-created_at'), 'offer_user_created_idx')
+        self.assertUsesIndex(Offer.objects.order_by('-created_at', 'min_price')[:6], 'offer_created_price_idx')
+
+
+class OrderStatusCounterTests(TestCase):
+    # Ensures that the order counters follow creations, transitions and deletions.
+
+    def setUp(self):
+        self.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=self.provider, company_name='Company', company_address='Street 1')
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+        self.offer = Offer.objects.create(title='Offer', description='Text', user=self.provider)
+        self.orders = [Order.objects.create(user=self.customer, offer=self.offer) for _ in range(3)]
+
+    def assertCountersMatchOrders(self):
+        counters = {(counter.key, counter.status): counter.count for counter in OrderStatusCounter.objects.exclude(count=0)}
+        self.assertEqual(counters, dict(expected_order_counters()))
+
+    def test_counters_follow_transitions_and_deletions(self):
+        client = APIClient()
+        client.force_authenticate(self.provider)
+        response = client.patch(f'/api/orders/{self.orders[0].id}/', {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        client.patch(f'/api/orders/{self.orders[0].id}/', {'status': 'in_progress'}, format='json')
+        client.post('/api/orders/bulk-status/', {'status': 'in_progress', 'orders': [{'id': self.orders[1].id}]}, format='json')
+        self.assertCountersMatchOrders()
+        self.assertEqual(client.get(f'/api/order-count/{self.offer.id}/').json()['in_progress_count'], 2)
+
+        self.orders[2].delete()
+        self.assertCountersMatchOrders()
+        self.assertEqual(
+            list(OrderEvent.objects.filter(order=self.orders[0]).values_list('from_status', 'to_status', 'actor')),
+            [(None, 'pending', self.customer.id), ('pending', 'in_progress', self.provider.id)]
+        )
+
+    def test_count_views_read_a_single_counter(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        client.get(f'/api/completed-order-count/{self.provider.id}/')
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/completed-order-count/{self.provider.id}/')
+        self.assertEqual(response.json()['completed_order_count'], 0)
+        self.assertEqual([query for query in queries if '"coder_app_order"' in query['sql']], [])
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class DashboardQueryCountTests(TestCase):
+    # Ensures that the dashboard is assembled with a fixed number of queries.
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=cls.provider, company_name='Company', company_address='Street 1')
+        cls.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=cls.customer, first_name='Max', last_name='Muster')
+
+    def add_offers(self, count):
+        """
+        Creates offers with an in-progress order and a review each.
+        """
+        for index in range(count):
+            offer = Offer.objects.create(title=f'Offer {index}', description='Text', user=self.provider)
+            detail = OfferDetail.objects.create(
+                offer=offer, variant_title='basic', variant_price=10, delivery_time_in_days=3,
+                revision_limit=1, offer_type='basic'
+            )
+            order = Order.objects.create(user=self.customer, offer=offer, offer_detail_id=detail)
+            order.status = 'in_progress'
+            order.save()
+            Review.objects.create(rating=5, description='Good', business_user=self.provider, reviewer=self.customer, offer=offer)
+
+    def count_queries(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_dashboard_query_count_is_independent_of_data_size(self):
+        self.add_offers(1)
+        for user in (self.provider, self.customer):
+            few, _ = self.count_queries(user)
+            self.add_offers(6)
+            many, dashboard = self.count_queries(user)
+            self.assertEqual(few, many)
+        self.assertEqual(dashboard['order_counts']['in_progress'], 13)
+
+    def test_provider_dashboard_contains_offer_counts(self):
+        self.add_offers(2)
+        _, dashboard = self.count_queries(self.provider)
+        self.assertEqual([offer['in_progress_count'] for offer in dashboard['offers']], [1, 1])
+        self.assertEqual(dashboard['profile']['profile_data']['pending_orders'], 2)
+        self.assertEqual(len(dashboard['recent_reviews']), 2)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class CachedTokenAuthenticationTests(TestCase):
+    # Ensures that cached tokens skip the token and profile queries and are invalidated on changes.
+
+    def setUp(self):
+        self.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=self.provider, company_name='Company', company_address='Street 1')
+        self.client = APIClient()
+        token = self.client.post('/api/login/', {'username': 'provider', 'password': 'secret'}, format='json').json()['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def get_auth_queries(self):
+        """
+        Requests the completed order count and returns the token and profile queries it ran.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/completed-order-count/{self.provider.id}/')
+        self.assertEqual(response.status_code, 200)
+        tables = ('"authtoken_token"', '"coder_app_businessprofile"', '"coder_app_customerprofile"')
+        return [query['sql'] for query in queries if any(table in query['sql'] for table in tables)]
+
+    def test_cached_token_needs_no_queries(self):
+        self.assertEqual(len(self.get_auth_queries()), 1)
+        self.assertEqual(self.get_auth_queries(), [])
+
+    def test_profile_change_and_logout_invalidate_the_token(self):
+        self.get_auth_queries()
+        self.provider.business_profile.save()
+        self.assertEqual(len(self.get_auth_queries()), 1)
+        self.assertEqual(self.client.post('/api/logout/').status_code, 204)
+        self.assertEqual(self.client.get('/api/orders/').status_code, 401)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class UserRoleTests(TestCase):
+    # Ensures that the stored profile type replaces probing both profile tables.
+
+    def setUp(self):
+        self.client = APIClient()
+        response = self.client.post('/api/registration/', {
+            'username': 'customer', 'email': 'customer@example.com', 'password': 'Secret-123',
+            'repeated_password': 'Secret-123', 'profile_type': 'customer',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.customer = User.objects.get(username='customer')
+        self.client.force_authenticate(self.customer)
+
+    def get_profile_queries(self, url):
+        """
+        Requests a URL and returns the queries it ran against the profile tables.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries
+                if '"coder_app_businessprofile"' in query['sql'] or '"coder_app_customerprofile"' in query['sql']]
+
+    def test_registration_stores_the_role(self):
+        self.assertEqual(UserRole.objects.get(user=self.customer).profile_type, 'customer')
+        self.customer.customer_profile.delete()
+        self.assertFalse(UserRole.objects.filter(user=self.customer).exists())
+
+    def test_bulk_created_profiles_store_roles(self):
+        provider = User.objects.create_user('provider', password='secret')
+        customer = User.objects.create_user('other', password='secret')
+        seed_profiles([provider.id], [customer.id], batch_size=10)
+        roles = dict(UserRole.objects.filter(user__in=[provider, customer]).values_list('user_id', 'profile_type'))
+        self.assertEqual(roles, {provider.id: 'business', customer.id: 'customer'})
+
+    def test_profile_type_needs_no_profile_queries(self):
+        self.assertEqual(self.get_profile_queries(f'/api/completed-order-count/{self.customer.id}/'), [])
+        queries = self.get_profile_queries(f'/api/profile/{self.customer.id}/')
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"coder_app_businessprofile"', queries[0])
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class LoginHashingTests(TestCase):
+    # Ensures that logins verify passwords in the hashing pool and upgrade outdated hashes.
+
+    def setUp(self):
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+        # Stored with a lower cost than the configured one, as after raising PASSWORD_HASH_ITERATIONS
+        User.objects.filter(pk=self.customer.pk).update(password=PBKDF2PasswordHasher().encode('secret', 'salt', 500))
+
+    def test_sync_login_rehashes_outdated_passwords(self):
+        response = APIClient().post('/api/login/', {'username': 'customer', 'password': 'secret'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # WSGI requests keep ROOT_URLCONF
+        self.assertEqual(response.resolver_match.url_name, 'login')
+        self.assertTrue(User.objects.get(pk=self.customer.pk).password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_login_upgrades_hashes_of_django_default_hashers(self):
+        User.objects.filter(pk=self.customer.pk).update(password=PBKDF2SHA1PasswordHasher().encode('secret', 'salt', 500))
+        response = APIClient().post('/api/login/', {'username': 'customer', 'password': 'secret'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(User.objects.get(pk=self.customer.pk).password.startswith('pbkdf2_sha256$1000$'))
+
+    async def test_async_login_matches_the_sync_response(self):
+        client = AsyncClient()
+        response = await client.post(
+            '/api/login/', {'username': 'customer', 'password': 'secret'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.resolver_match.url_name, 'async-login')
+        self.assertEqual(response.json()['profile_type'], 'customer')
+        self.assertEqual(response.json()['user_id'], self.customer.id)
+        password = await User.objects.filter(pk=self.customer.pk).values_list('password', flat=True).aget()
+        self.assertTrue(password.startswith('pbkdf2_sha256$1000$'))
+
+        response = await client.post(
+            '/api/login/', {'username': 'customer', 'password': 'wrong'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_logins_use_the_authentication_backends(self):
+        failed = []
+        def record_failure(sender, credentials, **kwargs):
+            failed.append(credentials['username'])
+        user_login_failed.connect(record_failure)
+        self.addCleanup(user_login_failed.disconnect, record_failure)
+        await User.objects.filter(pk=self.customer.pk).aupdate(is_active=False)
+        user = await aauthenticate(username='customer', password='secret')
+        self.assertIsNone(user)
+        self.assertEqual(failed, ['customer'])
+
+        await User.objects.filter(pk=self.customer.pk).aupdate(is_active=True)
+        user = await aauthenticate(username='customer', password='secret')
+        self.assertEqual(user.backend, 'coder_app.backends.PooledModelBackend')
+        # The role is joined with the user; a query here would fail in the async context
+        self.assertTrue(is_customer(user))
+
+    def test_full_pool_throttles_logins(self):
+        pool = PasswordHashingPool(workers=1, queue_size=0)
+        release = threading.Event()
+        job = pool.submit(release.wait)
+        with self.assertRaises(Throttled):
+            pool.submit(release.wait)
+        release.set()
+        job.result()
+        self.assertTrue(pool.run(lambda: True))
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class AsyncReadViewTests(TestCase):
+    # Ensures that the async read views return the same responses as the sync views.
+
+    def setUp(self):
+        self.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=self.provider, company_name='Company', company_address='Street 1')
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+        self.offer = Offer.objects.create(title='Offer', description='Text', user=self.provider)
+        detail = OfferDetail.objects.create(
+            offer=self.offer, variant_title='basic', variant_price=10, delivery_time_in_days=3,
+            revision_limit=1, offer_type='basic'
+        )
+        order = Order.objects.create(user=self.customer, offer=self.offer, offer_detail_id=detail)
+        order.status = 'in_progress'
+        order.save()
+        Review.objects.create(rating=4, description='Good', business_user=self.provider, reviewer=self.customer, offer=self.offer)
+        self.token = APIClient().post('/api/login/', {'username': 'customer', 'password': 'secret'}, format='json').json()['token']
+
+    def get_sync(self, url):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        return client.get(url)
+
+    async def test_async_views_match_the_sync_views(self):
+        client, headers = AsyncClient(), {'Authorization': f'Token {self.token}'}
+        urls = [
+            '/api/base-info/',
+            f'/api/offers/{self.offer.id}/',
+            f'/api/offers/{self.offer.id}/?fields=id,title',
+            f'/api/offers/{self.offer.id + 1}/',
+            f'/api/profiles/business/{self.provider.id}/',
+            f'/api/profiles/business/{self.customer.id}/',
+            f'/api/profile/{self.provider.id}/',
+            f'/api/profile/{self.customer.id}/',
+            '/api/profile/0/',
+        ]
+        for url in urls:
+            response = await client.get(url, headers=headers)
+            expected = await sync_to_async(self.get_sync)(url)
+            self.assertEqual((response.status_code, response.json()), (expected.status_code, expected.json()), url)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_async_views_authenticate_and_pass_writes_on(self):
+        response = await AsyncClient().get(f'/api/profile/{self.customer.id}/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+        client, headers = AsyncClient(), {'Authorization': f'Token {self.token}'}
+        response = await client.patch(
+            f'/api/profile/{self.customer.id}/', 'first_name=Moritz',
+            content_type='application/x-www-form-urlencoded', headers=headers
+        )
+        self.assertEqual(response.status_code, 200)
+        response = await client.get(f'/api/profile/{self.customer.id}/', headers=headers)
+        self.assertEqual(response.json()['first_name'], 'Moritz')
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class RequestInstrumentationTests(TestCase):
+    # Ensures that the request instrumentation attributes queries and timings to the right request.
+
+    def setUp(self):
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+
+    async def record_samples(self, *urls):
+        """
+        Requests the URLs concurrently and returns the recorded query count per view.
+        """
+        client = AsyncClient()
+        requests = {
+            '/api/login/': lambda: client.post(
+                '/api/login/', {'username': 'customer', 'password': 'secret'}, content_type='application/json'
+            ),
+            '/api/base-info/': lambda: client.get('/api/base-info/'),
+        }
+        cache.clear()
+        with mock.patch.object(metrics_registry, 'record') as record:
+            responses = await asyncio.gather(*(requests[url]() for url in urls))
+        self.assertEqual([response.status_code for response in responses], [200] * len(urls))
+        return {call.args[0]['view']: call.args[0]['queries'] for call in record.call_args_list}
+
+    def record_sample(self, url):
+        """
+        Requests the URL through the sync stack and returns the recorded sample.
+        """
+        with mock.patch.object(metrics_registry, 'record') as record:
+            self.assertEqual(APIClient().get(url).status_code, 200)
+        return record.call_args.args[0]
+
+    def test_serialization_time_covers_serializer_data(self):
+        Offer.objects.create(title='Offer', description='Text', user=self.customer)
+        original = OfferSerializer.to_representation
+
+        def slow_representation(serializer, instance):
+            time.sleep(0.05)
+            return original(serializer, instance)
+
+        with mock.patch.object(OfferSerializer, 'to_representation', slow_representation):
+            sample = self.record_sample('/api/offers/')
+        self.assertGreaterEqual(sample['serialization'], 0.05)
+        self.assertLess(sample['render'], 0.05)
+
+    def test_serialization_and_render_times_are_exported(self):
+        metrics_registry.reset()
+        sample = self.record_sample('/api/offers/')
+        metrics_registry.record(sample)
+        metrics = metrics_registry.render()
+        self.assertIn('coderr_response_serialization_seconds_count{view="offers"} 1', metrics)
+        self.assertIn('coderr_response_render_seconds_count{view="offers"} 1', metrics)
+        # Responses without a serializer, such as the base info, report no serialization time
+        self.assertIsNone(self.record_sample('/api/base-info/')['serialization'])
+
+    async def test_concurrent_requests_count_only_their_own_queries(self):
+        # The first login creates the token, later ones only read it
+        await self.record_samples('/api/login/')
+        login = await self.record_samples('/api/login/')
+        base_info = await self.record_samples('/api/base-info/')
+        self.assertGreater(login['async-login'], 0)
+        self.assertGreater(base_info['async-base-info'], 0)
+        for _ in range(3):
+            self.assertEqual(await self.record_samples('/api/login/', '/api/base-info/'), {**login, **base_info})
+
+
+class DatabaseSettingsTests(TestCase):
+    # Ensures that SQLite connections are configured for concurrent writes.
+
+    def test_sqlite_connections_wait_for_locks(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Only SQLite connections are configured at connection time.')
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone(), (1,))
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone(), (connection.settings_dict['OPTIONS']['timeout'] * 1000,))
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class RatingSummaryTests(TestCase):
+    # Ensures that the rating summaries follow every review write, including cascades.
+
+    def setUp(self):
+        self.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=self.provider, company_name='Company', company_address='Street 1')
+        self.other_provider = User.objects.create_user('other', password='secret')
+        BusinessProfile.objects.create(user=self.other_provider, company_name='Other', company_address='Street 2')
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+        self.offer = Offer.objects.create(title='Offer', description='Text', user=self.provider)
+
+    def add_review(self, rating, reviewer=None, business_user=None):
+        return Review.objects.create(
+            rating=rating, description='Text', business_user=business_user or self.provider,
+            reviewer=reviewer or self.customer, offer=self.offer
+        )
+
+    def assert_summary(self, user, review_count, rating_sum):
+        summary = get_rating_summary(user.id if user else None)
+        self.assertEqual((summary.review_count, summary.rating_sum), (review_count, rating_sum))
+
+    def test_review_writes_update_the_summaries(self):
+        review = self.add_review(5)
+        self.add_review(3)
+        self.assert_summary(self.provider, 2, 8)
+        self.assertEqual(get_rating_summary(self.provider.id).histogram(), {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+
+        review = Review.objects.get(pk=review.pk)
+        review.rating = 1
+        review.save()
+        review.business_user = self.other_provider
+        review.save()
+        self.assert_summary(self.provider, 1, 3)
+        self.assert_summary(self.other_provider, 1, 1)
+        self.assert_summary(None, 2, 4)
+
+        review.delete()
+        self.assert_summary(self.other_provider, 0, 0)
+        self.assert_summary(None, 1, 3)
+        self.assertEqual(find_rating_summary_drift(), [])
+
+    def test_api_review_writes_update_the_summaries(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        response = client.post('/api/reviews/', {
+            'business_user_id': self.provider.id, 'reviewer_id': self.customer.id, 'rating': 4, 'description': 'Good',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        review_id = Review.objects.get().id
+        self.assertEqual(client.patch(f'/api/reviews/{review_id}/', {'rating': 2}, format='json').status_code, 200)
+        self.assert_summary(self.provider, 1, 2)
+        self.assertEqual(client.delete(f'/api/reviews/{review_id}/').status_code, 204)
+        self.assert_summary(self.provider, 0, 0)
+
+    def test_cascade_deletes_update_the_summaries(self):
+        self.add_review(5)
+        self.offer = Offer.objects.create(title='Other offer', description='Text', user=self.other_provider)
+        self.add_review(2, business_user=self.other_provider)
+        Offer.objects.filter(user=self.provider).delete()
+        self.assertEqual(Review.objects.count(), 1)
+        self.assert_summary(self.provider, 0, 0)
+        self.assert_summary(None, 1, 2)
+
+        self.other_provider.delete()
+        self.assertEqual(Review.objects.count(), 0)
+        self.assert_summary(None, 0, 0)
+        self.assertEqual(find_rating_summary_drift(), [])
+
+    def test_rebuild_command_repairs_drift(self):
+        self.add_review(4)
+        RatingSummary.objects.filter(business_user=self.provider).update(review_count=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rating_summaries', '--check', stdout=StringIO())
+        call_command('rebuild_rating_summaries', stdout=StringIO())
+        call_command('rebuild_rating_summaries', '--check', stdout=StringIO())
+        self.assert_summary(self.provider, 1, 4)
+
+
+class BaseInfoStatisticsTests(TestCase):
+    # Ensures that the cached base info statistics follow writes, including cascades.
+
+    def setUp(self):
+        cache.clear()
+        self.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=self.provider, company_name='Company', company_address='Street 1')
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+
+    def get_base_info(self):
+        response = APIClient().get('/api/base-info/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_statistics_follow_writes(self):
+        self.assertEqual(self.get_base_info(), {
+            'offer_count': 0, 'review_count': 0, 'business_profile_count': 1, 'average_rating': 0.0,
+        })
+        offer = Offer.objects.create(title='Offer', description='Text', user=self.provider)
+        Review.objects.create(rating=5, description='Good', business_user=self.provider, reviewer=self.customer, offer=offer)
+        Review.objects.create(rating=4, description='Good', business_user=self.provider, reviewer=self.provider, offer=offer)
+        self.assertEqual(self.get_base_info(), {
+            'offer_count': 1, 'review_count': 2, 'business_profile_count': 1, 'average_rating': 4.5,
+        })
+
+    def test_statistics_follow_cascades(self):
+        offer = Offer.objects.create(title='Offer', description='Text', user=self.provider)
+        Review.objects.create(rating=5, description='Good', business_user=self.provider, reviewer=self.customer, offer=offer)
+        self.assertEqual(self.get_base_info()['review_count'], 1)
+
+        offer.delete()
+        self.assertEqual(self.get_base_info(), {
+            'offer_count': 0, 'review_count': 0, 'business_profile_count': 1, 'average_rating': 0.0,
+        })
+        Offer.objects.create(title='Offer', description='Text', user=self.provider)
+        self.provider.delete()
+        self.assertEqual(self.get_base_info(), {
+            'offer_count': 0, 'review_count': 0, 'business_profile_count': 0, 'average_rating': 0.0,
+        })
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class ConditionalGetTests(TestCase):
+    # Ensures that ETags change when data embedded in a response changes, not only its top-level rows.
+
+    def setUp(self):
+        self.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=self.provider, company_name='Company', company_address='Street 1')
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+        self.other_customer = User.objects.create_user('other', password='secret')
+        CustomerProfile.objects.create(user=self.other_customer, first_name='Erika', last_name='Muster')
+        self.offer = Offer.objects.create(title='Offer', description='Text', user=self.provider)
+        self.detail = OfferDetail.objects.create(
+            offer=self.offer, variant_title='basic', variant_price=10, delivery_time_in_days=3,
+            revision_limit=1, offer_type='basic'
+        )
+        Order.objects.create(user=self.customer, offer=self.offer, offer_detail_id=self.detail)
+        Review.objects.create(rating=5, description='Good', business_user=self.provider, reviewer=self.customer, offer=self.offer)
+
+    def get(self, url, user, etag=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(url, HTTP_IF_NONE_MATCH=etag) if etag else client.get(url)
+
+    def get_etag(self, url, user):
+        """
+        Requests a URL and checks that repeating the request with its ETag returns 304.
+        """
+        etag = self.get(url, user)['ETag']
+        self.assertEqual(self.get(url, user, etag).status_code, 304)
+        return etag
+
+    def test_offer_etag_changes_with_new_reviews(self):
+        url = f'/api/offers/{self.offer.id}/'
+        etag = self.get_etag(url, self.customer)
+        Review.objects.create(rating=1, description='Bad', business_user=self.provider, reviewer=self.other_customer, offer=self.offer)
+        response = self.get(url, self.customer, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['business_profile']['avg_rating'], 3.0)
+
+    def test_offer_etag_changes_with_variants(self):
+        url = f'/api/offers/{self.offer.id}/'
+        etag = self.get_etag(url, self.customer)
+        updated_at = Offer.objects.get(id=self.offer.id).updated_at
+        self.detail.variant_price = 20
+        self.detail.save()
+        response = self.get(url, self.customer, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['details'][0]['price'], '20.00')
+        # The offer's own updated_at only moves with the offer's fields
+        self.assertEqual(Offer.objects.get(id=self.offer.id).updated_at, updated_at)
+
+        etag = response['ETag']
+        self.detail.delete()
+        response = self.get(url, self.customer, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['details'], [])
+
+    def test_order_list_etag_changes_with_embedded_users(self):
+        etag = self.get_etag('/api/orders/', self.provider)
+        self.customer.email = 'max@example.com'
+        self.customer.save()
+        response = self.get('/api/orders/', self.provider, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['user_details']['email'], 'max@example.com')
+
+    def test_review_list_etag_changes_with_other_reviews_of_the_provider(self):
+        url = f'/api/reviews/?reviewer_id={self.customer.id}'
+        etag = self.get_etag(url, self.customer)
+        Review.objects.create(rating=1, description='Bad', business_user=self.provider, reviewer=self.other_customer, offer=self.offer)
+        response = self.get(url, self.customer, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['average_rating'], 3.0)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class OfferSearchTests(TestCase):
+    # Ensures that the offer search matches, ranks and re-indexes offers through the full-text index.
+
+    def setUp(self):
+        provider = User.objects.create_user('provider', password='secret')
+        self.title_match = Offer.objects.create(title='Logo design', description='Branding', user=provider)
+        self.description_match = Offer.objects.create(
+            title='Website', description='Landing page with a logo and a contact form', user=provider
+        )
+        self.feature_match = Offer.objects.create(title='Flyer', description='Print', user=provider)
+        OfferDetail.objects.create(
+            offer=self.feature_match, variant_title='premium', variant_price=10, delivery_time_in_days=3,
+            revision_limit=1, offer_type='premium', features=['Source files']
+        )
+
+    def search(self, value, **params):
+        """
+        Searches the offer list and returns the ids of the results in order.
+        """
+        response = APIClient().get('/api/offers/', {'search': value, 'page_size': 10, **params})
+        self.assertEqual(response.status_code, 200)
+        return [offer['id'] for offer in response.json()['results']]
+
+    def test_search_matches_every_token_as_prefix(self):
+        self.assertEqual(self.search('logo'), [self.title_match.id, self.description_match.id])
+        self.assertEqual(self.search('cont form'), [self.description_match.id])
+        self.assertEqual(self.search('source PREMIUM'), [self.feature_match.id])
+        self.assertEqual(self.search('logo flyer'), [])
+        self.assertEqual(len(self.search('"*')), 3)
+
+    def test_search_ranks_title_matches_first_unless_ordered(self):
+        self.description_match.created_at = self.title_match.created_at + timedelta(days=1)
+        self.description_match.save()
+        self.assertEqual(self.search('logo'), [self.title_match.id, self.description_match.id])
+        self.assertEqual(self.search('logo', ordering='-created_at'), [self.description_match.id, self.title_match.id])
+
+    def test_search_runs_the_match_once(self):
+        plan = search_offers(Offer.objects.all(), 'logo').order_by('search_rank').explain()
+        # The ids come from an uncorrelated subquery, and each offer's rank is read by rowid
+        self.assertIn('LIST SUBQUERY', plan)
+        self.assertIn('VIRTUAL TABLE INDEX 0:=M', plan)
+        with CaptureQueriesContext(connection) as queries:
+            self.search('logo', ordering='-created_at')
+        self.assertFalse(any('bm25' in query['sql'] for query in queries))
+
+    def test_offers_written_with_details_are_indexed_once(self):
+        details = [
+            {'title': offer_type, 'price': 10, 'delivery_time_in_days': 3, 'revisions': 1,
+             'offer_type': offer_type, 'features': ['Vector logo']}
+            for offer_type in ('basic', 'standard', 'premium')
+        ]
+        serializer = OfferSerializer(data={'title': 'Brand', 'description': 'Identity', 'details': details})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with CaptureQueriesContext(connection) as queries:
+            offer = serializer.save(user=self.title_match.user)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT INTO coder_app_offer_search')]), 1)
+        self.assertEqual(self.search('vector'), [offer.id])
+
+    def test_rebuild_restores_the_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM coder_app_offer_search')
+        self.assertEqual(self.search('logo'), [])
+        self.assertEqual(rebuild_search_index(), 3)
+        self.assertEqual(self.search('logo'), [self.title_match.id, self.description_match.id])
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class CursorPaginationTests(TestCase):
+    # Ensures that cursor pages follow the requested ordering and stay stable while rows are added.
+
+    def setUp(self):
+        self.provider = User.objects.create_user('provider', password='secret')
+        self.offers = [self.create_offer(f'Design {index}', price) for index, price in enumerate([30, 10, 50, 20, 40])]
+
+    def create_offer(self, title, price):
+        offer = Offer.objects.create(title=title, description='Logo', user=self.provider)
+        OfferDetail.objects.create(
+            offer=offer, variant_title='basic', variant_price=price, delivery_time_in_days=3,
+            revision_limit=1, offer_type='basic'
+        )
+        return offer
+
+    def get_page(self, url, params=None):
+        response = APIClient().get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def collect(self, params, between_pages=None):
+        """
+        Follows the next links from the first cursor page and returns the ids of all pages.
+        """
+        page = self.get_page('/api/offers/', {'pagination': 'cursor', 'page_size': 2, **params})
+        ids = [offer['id'] for offer in page['results']]
+        while page['next']:
+            if between_pages:
+                between_pages()
+                between_pages = None
+            page = self.get_page(page['next'])
+            ids += [offer['id'] for offer in page['results']]
+        return ids
+
+    def test_cursor_pages_follow_the_requested_ordering(self):
+        by_price = [offer.id for offer in sorted(self.offers, key=lambda offer: offer.details.get().variant_price)]
+        self.assertEqual(self.collect({'ordering': 'min_price'}), by_price)
+        self.assertEqual(self.collect({'ordering': '-min_price'}), by_price[::-1])
+        self.assertEqual(self.collect({}), [offer.id for offer in reversed(self.offers)])
+
+    def test_cursor_pages_are_stable_across_inserts(self):
+        # Each new row sorts before the cursor, so it neither shifts nor repeats the following pages
+        expected = sorted(offer.id for offer in self.offers)
+        self.assertEqual(sorted(self.collect({}, between_pages=lambda: self.create_offer('Newest', 60))), expected)
+        expected = sorted(expected + [Offer.objects.get(title='Newest').id])
+        ids = self.collect({'ordering': 'min_price'}, between_pages=lambda: self.create_offer('Cheapest', 5))
+        self.assertEqual(sorted(ids), expected)
+
+    def test_cursor_pages_orders_and_profiles(self):
+        customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=customer, first_name='Max', last_name='Muster')
+        orders = [Order.objects.create(user=customer, offer=offer, offer_detail_id=offer.details.get()) for offer in self.offers]
+        client = APIClient()
+        client.force_authenticate(customer)
+        ids, url = [], '/api/orders/?pagination=cursor&page_size=2'
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [order['id'] for order in response.json()['results']]
+            url = response.json()['next']
+        self.assertEqual(ids, [order.id for order in reversed(orders)])
+        response = client.get('/api/profiles/customer/', {'pagination': 'cursor'})
+        self.assertEqual([profile['user'] for profile in response.json()['results']], [customer.id])
+
+    def test_cursor_rejects_the_search_rank_ordering(self):
+        response = APIClient().get('/api/offers/', {'search': 'logo', 'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+        ids = self.collect({'search': 'logo', 'ordering': 'min_price'})
+        self.assertEqual(len(ids), len(self.offers))
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=300)
+class ResponseCacheInvalidationTests(TestCase):
+    # Ensures that writes bump the tags of the cached responses that embed the written rows.
+
+    def setUp(self):
+        cache.clear()
+        self.provider = User.objects.create_user('provider', password='secret')
+        self.business_profile = BusinessProfile.objects.create(
+            user=self.provider, company_name='Company', company_address='Street 1'
+        )
+        self.customer = User.objects.create_user('customer', password='secret')
+        self.customer_profile = CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+        self.offer = Offer.objects.create(title='Offer', description='Text', user=self.provider)
+        self.detail = OfferDetail.objects.create(
+            offer=self.offer, variant_title='basic', variant_price=10, delivery_time_in_days=3,
+            revision_limit=1, offer_type='basic'
+        )
+        self.tags = ['offers', 'reviews', f'offer:{self.offer.id}', f'user:{self.provider.id}', f'user:{self.customer.id}']
+
+    def get(self, url):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def bumped_tags(self, write):
+        """
+        Runs the write and returns the tags whose version it changed.
+        """
+        before = get_tag_versions(self.tags)
+        write()
+        after = get_tag_versions(self.tags)
+        return {tag for tag in self.tags if before[tag] != after[tag]}
+
+    def create_review(self):
+        return Review.objects.create(
+            rating=5, description='Good', business_user=self.provider, reviewer=self.customer, offer=self.offer
+        )
+
+    def test_writes_bump_the_tags_of_the_written_rows(self):
+        offer_tags = {'offers', f'offer:{self.offer.id}'}
+        self.assertEqual(self.bumped_tags(self.offer.save), offer_tags | {f'user:{self.provider.id}'})
+        self.assertEqual(self.bumped_tags(self.detail.save), offer_tags)
+        self.assertEqual(
+            self.bumped_tags(self.create_review), {'reviews', f'user:{self.provider.id}', f'user:{self.customer.id}'}
+        )
+        self.assertEqual(self.bumped_tags(self.business_profile.save), {f'user:{self.provider.id}'})
+        self.assertEqual(self.bumped_tags(self.customer_profile.save), {f'user:{self.customer.id}'})
+
+    def test_writes_evict_cached_lists_and_details(self):
+        list_url, detail_url = '/api/offers/', f'/api/offers/{self.offer.id}/'
+        self.get(list_url), self.get(detail_url)
+        # Updates without signals leave the cached responses in place
+        Offer.objects.filter(id=self.offer.id).update(title='Stale')
+        self.assertEqual(self.get(detail_url)['title'], 'Offer')
+
+        self.offer.title = 'Fresh'
+        self.offer.save()
+        self.assertEqual(self.get(list_url)['results'][0]['title'], 'Fresh')
+        self.assertEqual(self.get(detail_url)['title'], 'Fresh')
+
+        self.detail.variant_price = 20
+        self.detail.save()
+        self.assertEqual(self.get(detail_url)['details'][0]['price'], '20.00')
+        self.assertEqual(self.get(list_url)['results'][0]['min_price'], 20.0)
+
+        self.assertEqual(self.get('/api/reviews/'), [])
+        self.create_review()
+        self.assertEqual(len(self.get('/api/reviews/')), 1)
+
+        profile_url = f'/api/profiles/business/{self.provider.id}/'
+        self.get(profile_url)
+        self.business_profile.company_name = 'Renamed'
+        self.business_profile.save()
+        self.assertEqual(self.get(profile_url)['company_name'], 'Renamed')
+
+    def test_invalidation_is_repeated_after_commit(self):
+        detail_url = f'/api/offers/{self.offer.id}/'
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.offer.save()
+            # A response cached between the write and the commit may have been read before the write
+            self.get(detail_url)
+            Offer.objects.filter(id=self.offer.id).update(title='Committed')
+            self.assertEqual(self.get(detail_url)['title'], 'Offer')
+        self.assertTrue(callbacks)
+        self.assertEqual(self.get(detail_url)['title'], 'Committed')
+
+    def test_rolled_back_writes_leave_committed_responses(self):
+        detail_url = f'/api/offers/{self.offer.id}/'
+        self.get(detail_url)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.offer.title = 'Rolled back'
+                self.offer.save()
+                raise RuntimeError
+        # The commit-time bump of the rolled back write is discarded with it
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.get(detail_url)['title'], 'Offer')
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class StreamedListTests(TestCase):
+    # Ensures that streamed lists contain the same rows as the regular lists.
+
+    def setUp(self):
+        self.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=self.provider, company_name='Company', company_address='Street 1')
+        offer = Offer.objects.create(title='Offer', description='Text', user=self.provider)
+        detail = OfferDetail.objects.create(
+            offer=offer, variant_title='basic', variant_price=10, delivery_time_in_days=3,
+            revision_limit=1, offer_type='basic', features=['Logo']
+        )
+        self.customers = []
+        for index in range(3):
+            customer = User.objects.create_user(f'customer{index}', password='secret')
+            CustomerProfile.objects.create(user=customer, first_name='Max', last_name='Muster')
+            for _ in range(index + 1):
+                Order.objects.create(user=customer, offer=offer, offer_detail_id=detail)
+            self.customers.append(customer)
+
+    def get(self, url, user, **params):
+        """
+        Requests the URL and returns the status, content type and decoded body, joining streamed chunks.
+        """
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(url, params)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, response['Content-Type'], json.loads(body)
+
+    def test_streamed_lists_match_the_regular_lists(self):
+        requests = [
+            ('/api/orders/', self.provider, {}),
+            ('/api/orders/', self.provider, {'fields': 'id,status,user_details', 'expand': 'user_details'}),
+            ('/api/user/orders/', self.customers[2], {}),
+            ('/api/profiles/business/', self.provider, {}),
+            ('/api/profiles/customer/', self.provider, {}),
+        ]
+        # Small chunks, so the rows are spread over several chunks
+        with mock.patch.object(PaginatedListMixin, 'stream_chunk_size', 2):
+            for url, user, params in requests:
+                status_code, content_type, streamed = self.get(url, user, stream='true', **params)
+                self.assertEqual((status_code, content_type), (200, 'application/json'))
+                self.assertEqual(streamed, self.get(url, user, **params)[2], url)
+        self.assertEqual(len(streamed), 3)
+
+    def test_streamed_lists_ignore_the_normalized_format(self):
+        _, _, streamed = self.get('/api/orders/', self.provider, stream='true')
+        status_code, content_type, normalized = self.get('/api/orders/', self.provider, stream='true', format='normalized')
+        self.assertEqual((status_code, content_type), (200, 'application/json'))
+        self.assertEqual(normalized, streamed)
+        self.assertEqual(normalized[0]['user_details']['username'], 'customer2')
+        # Without streaming the same request is normalized
+        self.assertIn('included', self.get('/api/orders/', self.provider, format='normalized')[2])
+
+    def test_normalized_format_is_limited_to_lists(self):
+        offer = Offer.objects.get()
+        client = APIClient()
+        client.force_authenticate(self.provider)
+        self.assertEqual(client.get(f'/api/offers/{offer.id}/', {'format': 'normalized'}).status_code, 404)
+        self.assertIn('included', client.get('/api/offers/', {'format': 'normalized'}).json())
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class NormalizedFormatTests(TestCase):
+    # Ensures that normalized lists reference embedded users and profiles by id and include each of them once.
+
+    def setUp(self):
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+        self.providers = []
+        for index in range(2):
+            provider = User.objects.create_user(f'provider{index}', password='secret')
+            BusinessProfile.objects.create(user=provider, company_name=f'Company {index}', company_address='Street 1')
+            for number in range(3):
+                offer = Offer.objects.create(title=f'Offer {number}', description='Text', user=provider)
+                detail = OfferDetail.objects.create(
+                    offer=offer, variant_title='basic', variant_price=10, delivery_time_in_days=3,
+                    revision_limit=1, offer_type='basic'
+                )
+                Order.objects.create(user=self.customer, offer=offer, offer_detail_id=detail)
+            Review.objects.create(rating=4, description='Good', business_user=provider, reviewer=self.customer, offer=offer)
+            self.providers.append(provider)
+
+    def get(self, url, **params):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_offer_list_includes_each_user_and_profile_once(self):
+        regular, regular_queries = self.get('/api/offers/')
+        normalized, normalized_queries = self.get('/api/offers/', format='normalized')
+        rows, included = normalized.json()['results'], normalized.json()['included']
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(set(included['users']), {str(provider.id) for provider in self.providers})
+        self.assertEqual(len(included['business_profiles']), 2)
+        for embedded, row in zip(regular.json()['results'], rows):
+            self.assertEqual(row['user'], embedded['user']['id'])
+            self.assertEqual(included['users'][str(row['user'])], embedded['user'])
+            profile = included['business_profiles'][str(row['business_profile'])]
+            self.assertEqual(profile['company_name'], embedded['business_profile']['company_name'])
+            self.assertEqual(profile['avg_rating'], embedded['business_profile']['avg_rating'])
+        self.assertLess(len(normalized.content), len(regular.content))
+        self.assertLessEqual(normalized_queries, regular_queries)
+
+    def test_unpaginated_lists_are_wrapped_with_the_included_map(self):
+        reviews = self.get('/api/reviews/', format='normalized')[0].json()
+        self.assertEqual(len(reviews['results']), 2)
+        self.assertEqual({review['reviewer'] for review in reviews['results']}, {self.customer.id})
+        self.assertEqual(
+            set(reviews['included']['users']), {str(self.customer.id), *(str(provider.id) for provider in self.providers)}
+        )
+
+        orders = self.get('/api/orders/', format='normalized')[0].json()
+        self.assertEqual(len(orders['results']), 6)
+        self.assertEqual({order['user_details'] for order in orders['results']}, {self.customer.id})
+        self.assertEqual(len(orders['included']['users']), 3)
+
+    def test_paginated_lists_keep_the_page_metadata(self):
+        orders = self.get('/api/orders/', format='normalized', page_size=4)[0].json()
+        self.assertEqual((orders['count'], len(orders['results'])), (6, 4))
+        self.assertIn(str(self.customer.id), orders['included']['users'])
+        # Only the users referenced on the page are included
+        page_providers = {order['business_user'] for order in orders['results']}
+        self.assertEqual(set(orders['included']['users']), {str(self.customer.id), *map(str, page_providers)})
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class SparseFieldsetTests(TestCase):
+    # Ensures that ?fields= and ?expand= trim the representation and the queries behind it.
+
+    def setUp(self):
+        self.provider = User.objects.create_user('provider', password='secret')
+        BusinessProfile.objects.create(user=self.provider, company_name='Company', company_address='Street 1')
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+        self.offer = Offer.objects.create(title='Offer', description='Text', user=self.provider)
+        self.detail = OfferDetail.objects.create(
+            offer=self.offer, variant_title='basic', variant_price=10, delivery_time_in_days=3,
+            revision_limit=1, offer_type='basic'
+        )
+        Order.objects.create(user=self.customer, offer=self.offer, offer_detail_id=self.detail)
+        Review.objects.create(rating=5, description='Good', business_user=self.provider, reviewer=self.customer, offer=self.offer)
+
+    def get(self, url, **params):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), [query['sql'] for query in queries]
+
+    def test_fields_limit_the_representation(self):
+        offers, _ = self.get('/api/offers/', fields='id,title,min_price')
+        self.assertEqual(offers['results'], [{'id': self.offer.id, 'title': 'Offer', 'min_price': 10.0}])
+        offer, _ = self.get(f'/api/offers/{self.offer.id}/', fields='id,title')
+        self.assertEqual(offer, {'id': self.offer.id, 'title': 'Offer'})
+        reviews, _ = self.get('/api/reviews/', fields='id,rating')
+        self.assertEqual(reviews, [{'id': Review.objects.get().id, 'rating': 5}])
+        orders, _ = self.get('/api/orders/', fields='id,status')
+        self.assertEqual(orders, [{'id': Order.objects.get().id, 'status': 'pending'}])
+
+    def test_unexpanded_nested_fields_collapse_to_ids(self):
+        offer = self.get('/api/offers/', expand='details')[0]['results'][0]
+        self.assertEqual(offer['details'][0]['price'], '10.00')
+        self.assertEqual(offer['user'], self.provider.id)
+        self.assertEqual(offer['business_profile'], self.provider.business_profile.id)
+        offer = self.get('/api/offers/', expand='user')[0]['results'][0]
+        self.assertEqual((offer['details'], offer['user']['username']), ([self.detail.id], 'provider'))
+        review = self.get('/api/reviews/', expand='reviewer')[0][0]
+        self.assertEqual((review['reviewer']['username'], review['business_user']), ('customer', self.provider.id))
+        order = self.get('/api/orders/', expand='business_user')[0][0]
+        self.assertEqual((order['user_details'], order['business_user']['username']), (self.customer.id, 'provider'))
+
+    def test_unselected_fields_are_not_evaluated(self):
+        unavailable = mock.Mock(side_effect=AssertionError('evaluated an unselected field'))
+        with mock.patch.object(ReviewSerializer, 'get_average_rating', unavailable), \
+                mock.patch.object(OfferSerializer, 'get_business_profile', unavailable):
+            self.get('/api/reviews/', fields='id,rating')
+            self.get('/api/offers/', fields='id,title')
+        unavailable.assert_not_called()
+
+    def test_lean_requests_drop_joins_and_aggregates(self):
+        _, full_queries = self.get('/api/offers/')
+        _, lean_queries = self.get('/api/offers/', fields='id,title,min_price')
+        self.assertLess(len(lean_queries), len(full_queries))
+        offer_query = next(sql for sql in lean_queries if sql.startswith('SELECT "coder_app_offer"."id"'))
+        self.assertNotIn('JOIN', offer_query)
+        self.assertNotIn('coder_app_orderstatuscounter', offer_query)
+        self.assertFalse(any('coder_app_offerdetail' in sql for sql in lean_queries))
+
+        _, full_queries = self.get('/api/orders/')
+        _, lean_queries = self.get('/api/orders/', fields='id,status')
+        self.assertLess(len(lean_queries), len(full_queries))
+        self.assertFalse(any('"auth_user"' in sql for sql in lean_queries if 'coder_app_order"."id"' in sql))
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class BusinessAggregateTests(TestCase):
+    # Ensures that business profile ratings and pending orders are loaded for the whole page at once.
+
+    def setUp(self):
+        self.customer = User.objects.create_user('customer', password='secret')
+        CustomerProfile.objects.create(user=self.customer, first_name='Max', last_name='Muster')
+        self.providers = []
+
+    def create_provider(self, ratings, in_progress):
+        """
+        Creates a provider with one review per rating and the given number of orders in progress.
+        """
+        index = len(self.providers)
+        provider = User.objects.create_user(f'provider{index}', password='secret')
+        BusinessProfile.objects.create(user=provider, company_name=f'Company {index}', company_address='Street 1')
+        offer = Offer.objects.create(title='Offer', description='Text', user=provider)
+        detail = OfferDetail.objects.create(
+            offer=offer, variant_title='basic', variant_price=10, delivery_time_in_days=3,
+            revision_limit=1, offer_type='basic'
+        )
+        for rating in ratings:
+            reviewer = User.objects.create_user(f'reviewer{index}-{rating}-{Review.objects.count()}', password='secret')
+            Review.objects.create(rating=rating, description='Review', business_user=provider, reviewer=reviewer, offer=offer)
+        for _ in range(in_progress):
+            order = Order.objects.create(user=self.customer, offer=offer, offer_detail_id=detail)
+            order.status = 'in_progress'
+            order.save()
+        Order.objects.create(user=self.customer, offer=offer, offer_detail_id=detail)
+        self.providers.append(provider)
+        return provider
+
+    def get_profiles(self):
+        """
+        Requests the business profile list and returns the profiles by user id and the number of queries.
+        """
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/profiles/business/')
+        self.assertEqual(response.status_code, 200)
+        return {profile['user']['id']: profile for profile in response.json()}, len(queries)
+
+    def test_profile_list_aggregates_match_each_provider(self):
+        first = self.create_provider([5, 4], in_progress=2)
+        second = self.create_provider([1], in_progress=0)
+        third = self.create_provider([], in_progress=1)
+        profiles, _ = self.get_profiles()
+        self.assertEqual(
+            [(profiles[user.id]['avg_rating'], profiles[user.id]['pending_orders']) for user in (first, second, third)],
+            [(4.5, 2), (1.0, 0), ('-', 1)],
+        )
+
+    def test_profile_list_query_count_is_independent_of_profile_count(self):
+        self.create_provider([3], in_progress=1)
+        _, few = self.get_profiles()
+        for _ in range(4):
+            self.create_provider([4, 2], in_progress=2)
+        profiles, many = self.get_profiles()
+        self.assertEqual(len(profiles), 5)
+        self.assertEqual(many, few)
+
+    def test_single_profile_and_embedded_profiles_use_the_same_aggregates(self):
+        provider = self.create_provider([2, 3], in_progress=1)
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        profile = client.get(f'/api/profiles/business/{provider.id}/').json()
+        embedded = client.get('/api/offers/').json()['results'][0]['business_profile']
+        self.assertEqual((profile['avg_rating'], profile['pending_orders']), (2.5, 1))
+        self.assertEqual((embedded['avg_rating'], embedded['pending_orders']), (2.5, 1))
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class BenchmarkHarnessTests(TestCase):
+    # Ensures that seeded benchmark data is consistent and that reports are measured and compared.
+
+    def seed(self):
+        return seed_benchmark_data(providers=3, customers=5, offers=6, orders=40, reviews=12, batch_size=7)
+
+    def assertNoDerivedDrift(self):
+        self.assertEqual(find_rating_summary_drift(), [])
+        counters = {(counter.key, counter.status): counter.count for counter in OrderStatusCounter.objects.exclude(count=0)}
+        self.assertEqual(counters, dict(expected_order_counters()))
+        minimums = Offer.objects.annotate(expected=Min('details__variant_price')).values_list('min_price', 'expected')
+        self.assertTrue(all(stored == expected for stored, expected in minimums))
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('SELECT COUNT(*) FROM coder_app_offer_search').fetchone()[0], Offer.objects.count())
+        statistics = PlatformStatistics.objects.get()
+        self.assertEqual(
+            (statistics.offer_count, statistics.business_profile_count),
+            (Offer.objects.count(), BusinessProfile.objects.count()),
+        )
+
+    def test_seeding_leaves_no_derived_drift(self):
+        created = self.seed()
+        self.assertEqual(created, {'users': 8, 'offers': 6, 'offer_details': 18, 'orders': 40, 'reviews': 12})
+        self.assertEqual(UserRole.objects.count(), 8)
+        self.assertNoDerivedDrift()
+
+    def test_refresh_repairs_drift_and_clearing_removes_the_data(self):
+        self.seed()
+        RatingSummary.objects.all().delete()
+        OrderStatusCounter.objects.update(count=0)
+        Offer.objects.update(min_price=None)
+        refresh_derived_data()
+        self.assertNoDerivedDrift()
+
+        clear_benchmark_data()
+        self.assertEqual((User.objects.count(), Offer.objects.count(), Order.objects.count()), (0, 0, 0))
+        self.assertNoDerivedDrift()
+
+    def test_seed_command_refuses_to_seed_twice(self):
+        options = {'providers': 1, 'customers': 1, 'offers': 1, 'orders': 1, 'reviews': 1, 'stdout': StringIO()}
+        call_command('seed_benchmark', **options)
+        with self.assertRaises(CommandError):
+            call_command('seed_benchmark', **options)
+        call_command('seed_benchmark', clear=True, **options)
+        self.assertEqual(Offer.objects.count(), 1)
+
+    def test_run_benchmark_reports_the_selected_endpoints(self):
+        self.seed()
+        report = run_benchmark(iterations=2, warmup=0, only={'offers', 'base-info'})
+        self.assertEqual(set(report['endpoints']), {'offers', 'base-info'})
+        self.assertEqual(report['dataset']['orders'], 40)
+        for result in report['endpoints'].values():
+            self.assertEqual(result['status'], 200)
+            self.assertGreater(result['p50_ms'], 0)
+
+    def test_compare_reports_flags_regressions(self):
+        baseline = {'endpoints': {'offers': {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'queries': 4, 'peak_memory_kb': 100.0}}}
+        current = {'endpoints': {
+            'offers': {'p50_ms': 10.5, 'p95_ms': 30.0, 'p99_ms': 30.0, 'queries': 5, 'peak_memory_kb': 100.0},
+            'reviews': {'p50_ms': 1.0, 'p95_ms': 1.0, 'p99_ms': 1.0, 'queries': 1, 'peak_memory_kb': 1.0},
+        }}
+        regressed = {metric for _, metric, _, _, _, is_regression in compare_reports(baseline, current) if is_regression}
+        self.assertEqual(regressed, {'p95_ms', 'queries'})
@@ -4,6 +4,7 @@ from coder_app import views
 urlpatterns = [
     path('registration/', views.RegistrationView.as_view(), name='registration'),  
     path('login/', views.LoginView.as_view(), name='login'),  
+    path('logout/', views.LogoutView.as_view(), name='logout'),
     path('profiles/business/<int:user_id>/', views.BusinessProfileView.as_view(), name='business-profile'),
     path('profile/<int:user_id>/', views.ProfileView.as_view(), name='profile'),  
     path('profiles/business/', views.BusinessProfileListView.as_view(), name='business-profiles'),  
@@ -12,6 +13,8 @@ urlpatterns = [
     path('reviews/', views.ReviewListView.as_view(), name='reviews'),  
     path('reviews/<int:pk>/', views.ReviewDetailView.as_view(), name='review-detail'),
     path('orders/', views.OrderListView.as_view(), name='order-list'),  
+    path('orders/bulk/', views.BulkOrderCreateView.as_view(), name='order-bulk-create'),
+    path('orders/bulk-status/', views.BulkOrderStatusView.as_view(), name='order-bulk-status'),
     path('orders/<int:order_id>/', views.OrderDetailView.as_view(), name='order-detail'),  
     path('order-count/<int:offer_id>/', views.OrderInProgressCountView.as_view(), name='order-count'),
     path('offers/', views.OfferListView.as_view(), name='offers'),  
@@ -19,6 +22,8 @@ urlpatterns = [
     path('base-info/', views.BaseInfoView.as_view(), name='base-info'),  
     path('completed-order-count/<int:user_id>/', views.OrderCompletedCountView.as_view(), name='completed-order-count'),  
     path('user/orders/', views.UserOrdersView.as_view(), name='user-orders'),
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('_metrics/', views.MetricsView.as_view(), name='metrics'),
 ]
 
 
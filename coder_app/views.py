@@ -13,46 +13,40 @@ from rest_framework.filters import OrderingFilter
 from rest_framework.generics import ListCreateAPIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.exceptions import ValidationError
 from coder_app.models import Offer
-from coder_app.filters import OfferFilter
+from coder_app.filters import OfferFilter, OrderFilter
+from coder_app.pagination import (CustomPagination, ReviewPagination, OrderPagination,
+                                  ProfilePagination, PaginatedListMixin)
+from coder_app.renderers import NormalizedResponseMixin
+from coder_app.mixins import FieldSelectionMixin, TimedListMixin
 
 #from utils.utils import error_response
-from utils.functions import ( get_offer_or_none,update_offer,calculate_average_rating,
+from utils.functions import ( get_offer_or_none,update_offer,
                              get_offer_and_delete,
-                             get_orders_for_user, create_order,
-                             get_offers_for_user,get_business_profile_or_error,
+                             get_orders_for_user, create_order, create_bulk_order, bulk_transition_orders,
+                             get_offers_for_user,get_offer_queryset,get_business_profile_or_error,
                              get_profile_data,build_profile_response,
                              update_profile_data,get_customer_profile_or_error,
-                             get_user_orders,
+                             get_user_orders,filter_orders,
                              get_in_progress_count,get_user_or_error,count_completed_orders_for_user,
-                             get_order_or_403,validate_offer_detail,create_order_for_user,get_review_or_404, permission_error_response)
-
+                             get_order_or_403,validate_offer_detail,create_order_for_user,get_review_or_404, permission_error_response,
+                             create_review, update_review, delete_review, get_review_queryset)
+
+from utils.statistics import get_base_info_statistics
+from utils.dashboard import build_dashboard
+from utils.profile_helpers import is_customer, is_provider
+from utils.instrumentation import metrics_registry, timing_serialization
+from coder_app.permissions import CanViewMetrics
+from django.http import HttpResponse
+from rest_framework.authtoken.models import Token
+from utils.conditional import conditional_get, offer_validators, order_list_validators, review_list_validators
+from utils.cache import (cache_response, offer_list_tags, offer_detail_tags, dashboard_tags,
+                         business_profile_tags, review_list_tags)
 from utils.utils import (create_token_for_user, authenticate_user,
                          error_response,serialize_orders)
 
      
-class CustomPagination(PageNumberPagination):
-    # Default number of items per page
-    page_size = 6
-    
-    # Query parameter to allow the client to customize the page size
-    page_size_query_param = 'page_size'
-    
-    # Maximum number of items allowed per page
-    max_page_size = 100
-   
-    def get_paginated_response(self, data):
-        # Returns a custom paginated response including additional metadata
-        return Response({
-            'count': self.page.paginator.count,  # Total number of items
-            'total_pages': self.page.paginator.num_pages,  # Total number of pages
-            'current_page': self.page.number,  # Current page number
-            'results': data  # Paginated data
-        })
-        
-
 class RegistrationView(APIView):
     # Allows any user (authenticated or not) to access this view
     permission_classes = [AllowAny]
@@ -95,7 +89,7 @@ class LoginView(APIView):
             # Create a token for the authenticated user
             token_key = create_token_for_user(user)
             # Determine the profile type based on the user's associated profile
-            profile_type = "business" if hasattr(user, 'business_profile') else "customer"
+            profile_type = "business" if is_provider(user) else "customer"
 
             return Response({
                 'token': token_key,  # Return the authentication token
@@ -107,8 +101,21 @@ class LoginView(APIView):
         # Return an error response if the data is invalid
         return error_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+
+
+class LogoutView(APIView):
+    # Requires the user to be authenticated to access this view
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, format=None):
+        """
+        Delete the user's token. The token cache is cleared by the Token signals.
+        """
+        Token.objects.filter(user_id=request.user.id).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
         
-class OfferListView(ListCreateAPIView):
+class OfferListView(NormalizedResponseMixin, FieldSelectionMixin, TimedListMixin, ListCreateAPIView):
     """
     API endpoint for listing offers and creating new offers.
     """
@@ -116,20 +123,27 @@ class OfferListView(ListCreateAPIView):
     filter_backends = [OrderingFilter, DjangoFilterBackend]
     filterset_fields = ['delivery_time_in_days']  # Fields available for filtering
     filterset_class = OfferFilter  # Custom filter class
-    ordering_fields = ['created_at', 'updated_at', 'price']  # Fields available for ordering
-    ordering = ['-created_at', 'price']  # Default ordering by creation date (descending) and price
+    ordering_fields = ['created_at', 'updated_at', 'price', 'min_price', 'min_delivery_time']  # Fields available for ordering
+    ordering = ['-created_at', 'min_price']  # Default ordering by creation date (descending) and lowest variant price
     permission_classes = [AllowAny]  # Allows access to any user
     pagination_class = CustomPagination  # Custom pagination for offer lists
     
     def get_queryset(self):
         # Retrieves offers based on the 'creator_id' query parameter or for the logged-in user
         creator_id = self.request.query_params.get('creator_id')
+        # Only join and aggregate what the requested fields need
+        selection = self.get_field_selection()
         
         if creator_id:
             # Filter offers by the creator's user ID if provided
-            return Offer.objects.filter(user_id=creator_id) 
+            return get_offer_queryset(selection).filter(user_id=creator_id)
         # Return offers accessible to the current user
-        return get_offers_for_user(self.request.user)
+        return get_offers_for_user(self.request.user, selection)
+
+    @cache_response('offers', tags=offer_list_tags)
+    def get(self, request, *args, **kwargs):
+        # Serves the offer list from the response cache when possible
+        return super().get(request, *args, **kwargs)
     
     def perform_create(self, serializer):
         """
@@ -137,25 +151,34 @@ class OfferListView(ListCreateAPIView):
         """
         user = self.request.user
         # Ensure the user is authenticated and has a business profile
-        if user.is_authenticated and hasattr(user, 'business_profile'):
+        if user.is_authenticated and is_provider(user):
             serializer.save(user=user)  # Save the offer with the associated user
         else:
             # Raise an error if the user is not a business provider
             raise ValidationError("Only providers can create offers.")
         
     
-class OfferDetailView(APIView):
+class OfferDetailView(FieldSelectionMixin, APIView):
     # Requires the user to be authenticated to access this view
     permission_classes = [IsAuthenticated]  
     
+    def get_validator_querysets(self, request, id, **kwargs):
+        # The offer, its provider's profile and aggregates provide the ETag and Last-Modified validators
+        return offer_validators(id)
+
+    @conditional_get
+    @cache_response('offer', tags=offer_detail_tags)
     def get(self, request, id, format=None):
         """
         Retrieve an offer based on its ID.
         """
-        offer = get_offer_or_none(id)  # Fetch the offer or return None if not found
+        selection = self.get_field_selection()  # Fields and expansions requested by the client
+        offer = get_offer_or_none(id, get_offer_queryset(selection))  # Fetch the offer with its relations or return None if not found
         if offer:
-            serializer = OfferSerializer(offer)  # Serialize the offer data
-            return Response(serializer.data, status=status.HTTP_200_OK)  # Return serialized data
+            serializer = OfferSerializer(offer, context=self.get_serializer_context())  # Serialize the selected offer data
+            with timing_serialization(request):  # Record the serialization time for the request metrics
+                data = serializer.data
+            return Response(data, status=status.HTTP_200_OK)  # Return serialized data
         return Response({"error": "Offer not found"}, status=status.HTTP_404_NOT_FOUND)  # Return an error if not found
     
     def patch(self, request, id, format=None):
@@ -169,34 +192,40 @@ class OfferDetailView(APIView):
         return get_offer_and_delete(id, request.user)  # Perform delete operation and handle permissions
 
         
-class BusinessProfileListView(APIView):
+class BusinessProfileListView(PaginatedListMixin, APIView):
     # Requires the user to be authenticated to access this view
     permission_classes = [IsAuthenticated]
+    # Paginate or stream the list when the client asks for it
+    pagination_class = ProfilePagination
 
     def get(self, request):
         try:
-            # Retrieve all business profiles from the database
-            profiles = BusinessProfile.objects.all()  
-            # Serialize the business profiles
-            serializer = BusinessProfileSerializer(profiles, many=True)  
-            # Return serialized data with a 200 OK status
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # Retrieve all business profiles together with their users
+            profiles = BusinessProfile.objects.select_related(
+                'user', 'user__business_profile', 'user__customer_profile'
+            )
+            # Serialize the business profiles and return them with a 200 OK status
+            return self.list_response(
+                request, profiles, lambda items: BusinessProfileSerializer(items, many=True).data
+            )
         except Exception as e:
             # Handle any unexpected errors and return a 500 Internal Server Error
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class CustomerProfileListView(APIView):
+class CustomerProfileListView(PaginatedListMixin, APIView):
     # Requires the user to be authenticated to access this view
     permission_classes = [IsAuthenticated]
+    # Paginate or stream the list when the client asks for it
+    pagination_class = ProfilePagination
 
     def get(self, request):
         # Retrieve all customer profiles from the database
         profiles = CustomerProfile.objects.all()
-        # Serialize the customer profiles
-        serializer = CustomerProfileSerializer(profiles, many=True)
-        # Return serialized data with a 200 OK status
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Serialize the customer profiles and return them with a 200 OK status
+        return self.list_response(
+            request, profiles, lambda items: CustomerProfileSerializer(items, many=True).data
+        )
     
         
 class BusinessProfileView(APIView):
@@ -205,6 +234,7 @@ class BusinessProfileView(APIView):
     # Supports parsing multipart form data (e.g., file uploads) and regular form data
     parser_classes = [MultiPartParser, FormParser] 
     
+    @cache_response('business_profile', tags=business_profile_tags)
     def get(self, request, user_id, format=None):
         # Retrieve the user or return an error response if the user does not exist
         user = get_user_or_error(user_id)
@@ -333,39 +363,29 @@ class CustomerProfileView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     
-class BaseInfoView(APIView):
-    # Allows access to any user (authenticated or not)
-    permission_classes = [AllowAny]
-
-    def get(self, request, format=None):
-        """
-        Retrieve basic application information.
-        """
-        # Define static information about the application
-        data = {
-            "app_name": "Coderr",  # Name of the application
-            "version": "1.0",  # Current version of the application
-            "description": "An app for managing offers and profiles"  # Brief description of the app
-        }
-        # Return the information with a 200 OK status
-        return Response(data, status=status.HTTP_200_OK)
-
-    
-class OrderListView(APIView):
+class OrderListView(NormalizedResponseMixin, FieldSelectionMixin, PaginatedListMixin, APIView):
     # Requires the user to be authenticated to access this view
     permission_classes = [IsAuthenticated]
+    # Paginate or stream the list when the client asks for it
+    pagination_class = OrderPagination
 
+    def get_orders(self, request):
+        # Get orders relevant to the current user, filtered by status and creation date
+        return filter_orders(get_orders_for_user(request.user, self.get_field_selection()), request.query_params)
+
+    def get_validator_querysets(self, request, **kwargs):
+        # The orders, their offers and the profiles of both parties provide the ETag and Last-Modified validators
+        return order_list_validators(self.get_orders(request))
+
+    @conditional_get
     def get(self, request):
         """
         Retrieve orders based on the user type (provider or customer).
         """
-        user = request.user
-        # Get orders relevant to the current user
-        orders = get_orders_for_user(user)
-        # Serialize the list of orders
-        serializer = OrderSerializer(orders, many=True)
-        # Return the serialized data with a 200 OK status
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        orders = self.get_orders(request)
+        # Serialize the list of orders and return it with a 200 OK status
+        context = self.get_serializer_context()
+        return self.list_response(request, orders, lambda items: serialize_orders(items, context), context)
 
     def post(self, request):
         """
@@ -374,30 +394,49 @@ class OrderListView(APIView):
         # Pass the incoming data and the user to the order creation logic
         return create_order(request.data, request.user)
 
+
+class BulkOrderCreateView(APIView):
+    # Requires the user to be authenticated to access this view
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Create several orders from a list of offer detail ids.
+        """
+        # Resolve all offer details at once and insert the orders in a single transaction
+        return create_bulk_order(request.data, request.user)
+
+
+class BulkOrderStatusView(APIView):
+    # Requires the user to be authenticated to access this view
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Move several of the provider's orders to a new status.
+        """
+        # Check ownership in one query and change all orders with a single UPDATE
+        return bulk_transition_orders(request.data, request.user)
+
     
-class UserOrdersView(APIView):
+class UserOrdersView(NormalizedResponseMixin, FieldSelectionMixin, PaginatedListMixin, APIView):
     # Requires the user to be authenticated to access this view
     permission_classes = [IsAuthenticated]
+    # Paginate or stream the list when the client asks for it
+    pagination_class = OrderPagination
 
     def get(self, request):
         """
         Retrieve orders specific to the authenticated user.
         """
-        # Fetch orders associated with the current user
-        orders = get_user_orders(request.user)
-        # Serialize the orders using a custom serialization function
-        serialized_data = serialize_orders(orders)
-        # Return the serialized data with a 200 OK status
-        return Response(serialized_data, status=status.HTTP_200_OK)
-
+        # Fetch orders associated with the current user, filtered by status and creation date
+        orders = filter_orders(get_user_orders(request.user, self.get_field_selection()), request.query_params)
+        # Serialize the orders using a custom serialization function and return them with a 200 OK status
+        context = self.get_serializer_context()
+        return self.list_response(request, orders, lambda items: serialize_orders(items, context), context)
 
-class ReviewPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 50
-    
 
-class ReviewListView(ListCreateAPIView):
+class ReviewListView(NormalizedResponseMixin, FieldSelectionMixin, TimedListMixin, ListCreateAPIView):
     """
     API view for retrieving and creating reviews.
     """
@@ -413,13 +452,29 @@ class ReviewListView(ListCreateAPIView):
     ordering = ['-updated_at']
     # Require the user to be authenticated to access this view
     permission_classes = [IsAuthenticated] 
+    # Paginate only when the client asks for a page
+    pagination_class = ReviewPagination
+
+    def get_validator_querysets(self, request, **kwargs):
+        # The filtered reviews, the profiles of both parties and the rating summaries provide the validators
+        return review_list_validators(self.filter_queryset(self.get_queryset()))
+
+    @conditional_get
+    @cache_response('reviews', tags=review_list_tags)
+    def get(self, request, *args, **kwargs):
+        # Serves the review list from the response cache when possible
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
         """
         Customize the queryset based on query parameters.
         """
-        # Get the base queryset
-        queryset = super().get_queryset()
+        # Get the base queryset, joining the users that are serialized inline
+        selection = self.get_field_selection()
+        embedded_users = [] if self.is_normalized_response() else [
+            name for name in ('business_user', 'reviewer') if selection.expands(name)
+        ]
+        queryset = get_review_queryset(embedded_users)
         
         # Filter by reviewer ID if provided in the query parameters
         reviewer_id = self.request.query_params.get('reviewer_id')
@@ -445,7 +500,7 @@ class ReviewListView(ListCreateAPIView):
         user = self.request.user
 
         # Ensure only customers can write reviews
-        if not hasattr(user, 'customer_profile'):
+        if not is_customer(user):
             raise ValidationError("Only customers can write reviews.")
 
         # Ensure the same reviewer cannot review the same business user more than once
@@ -453,8 +508,8 @@ class ReviewListView(ListCreateAPIView):
         if Review.objects.filter(business_user=business_user, reviewer=user).exists():
             raise ValidationError("You have already reviewed this provider.")
 
-        # Save the review with the current user as the reviewer
-        serializer.save(reviewer=user)
+        # Save the review with the current user as the reviewer and update the rating summaries
+        create_review(serializer, user)
 
 
 class ReviewDetailView(APIView):
@@ -469,7 +524,7 @@ class ReviewDetailView(APIView):
         # Partially update the review
         serializer = ReviewSerializer(review, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            update_review(serializer, review)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -482,8 +537,8 @@ class ReviewDetailView(APIView):
         if review.reviewer != request.user:
             return permission_error_response("You can only delete your own reviews.")
 
-        # Delete the review
-        review.delete()
+        # Delete the review and remove it from the rating summaries
+        delete_review(review)
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 
@@ -539,7 +594,7 @@ class OrderDetailView(APIView):
             # Get the order and ensure the user has permission to modify it
             order = get_order_or_403(order_id, request.user)
             # Partially update the order
-            serializer = OrderSerializer(order, data=request.data, partial=True)
+            serializer = OrderSerializer(order, data=request.data, partial=True, context={'request': request})
             if serializer.is_valid():
                 serializer.save()
                 return Response(serializer.data, status=status.HTTP_200_OK)
@@ -590,48 +645,34 @@ class BaseInfoView(APIView):
         Retrieve basic statistics about the app.
         """
         try:
-            # Fetch counts and statistics
-            offer_count = Offer.objects.count()
-            review_count = Review.objects.count()
-            business_profile_count = BusinessProfile.objects.count()
-            average_rating = calculate_average_rating()
-
-            # Compile the data into a response
-            data = {
-                "offer_count": offer_count,  # Total number of offers
-                "review_count": review_count,  # Total number of reviews
-                "business_profile_count": business_profile_count,  # Total number of business profiles
-                "average_rating": round(average_rating, 1)  # Average rating rounded to one decimal place
-            }
+            # Fetch the statistics from the cache or the counter tables
+            data = get_base_info_statistics()
             return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        
-        
-        
-        
 
+class DashboardView(APIView):
+    # Requires the user to be authenticated to access this view
+    permission_classes = [IsAuthenticated]
 
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
-        
+    @cache_response('dashboard', tags=dashboard_tags, per_user=True)
+    def get(self, request):
+        """
+        Retrieve the profile, order counts, rating summary and recent orders and reviews of the current user.
+        """
+        # Assemble the whole dashboard with a fixed number of queries
+        return Response(build_dashboard(request.user.id), status=status.HTTP_200_OK)
 
-        
+
+class MetricsView(APIView):
+    # Only staff users and scrapers with the metrics token may read the metrics
+    permission_classes = [CanViewMetrics]
+    # Scrapers poll frequently, so the API rate limits do not apply
+    throttle_classes = []
+
+    def get(self, request):
+        """
+        Returns the request metrics of this process in the Prometheus text format.
+        """
+        return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
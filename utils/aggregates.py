@@ -0,0 +1,126 @@
+import asyncio
+from django.contrib.auth.models import User
+from coder_app.models import RatingSummary
+from utils.order_status import aget_order_count, get_order_counts, provider_key
+from utils.rating_summary import aget_rating_summary
+
+# serializers
+
+# businessProfileSerializers_logic.py
+def get_average_ratings(user_ids):
+    """
+    Returns the average rating per business user, read from the rating summaries.
+    Users without reviews map to None.
+    """
+    averages = dict.fromkeys(user_ids)
+    for summary in RatingSummary.objects.filter(business_user_id__in=averages):
+        averages[summary.business_user_id] = summary.average_rating()
+    return averages
+
+def get_pending_order_counts(user_ids):
+    """
+    Returns the number of in-progress orders per business user from the order counters in one query.
+    """
+    keys = {provider_key(user_id): user_id for user_id in user_ids}
+    counts = get_order_counts(keys, 'in_progress')
+    return {user_id: counts[key] for key, user_id in keys.items()}
+
+def _load_into_context(context, key, loader, user_ids):
+    """
+    Stores the loader results for the given users in the serializer context.
+    Users that are already loaded are not queried again.
+    """
+    loaded = context.setdefault(key, {})
+    missing = set(user_ids) - set(loaded)
+    if missing:
+        loaded.update(loader(missing))
+    return loaded
+
+def load_average_ratings(context, user_ids):
+    """
+    Preloads the average ratings of the given business users into the context.
+    """
+    return _load_into_context(context, 'average_ratings', get_average_ratings, user_ids)
+
+def load_business_aggregates(context, user_ids):
+    """
+    Preloads average ratings and in-progress order counts of the given business users.
+    """
+    load_average_ratings(context, user_ids)
+    _load_into_context(context, 'pending_orders', get_pending_order_counts, user_ids)
+
+async def aload_business_aggregates(context, user_id):
+    """
+    Async version of load_business_aggregates for a single business user; the rating
+    summary and the order counter are read concurrently.
+    """
+    summary, pending_orders = await asyncio.gather(
+        aget_rating_summary(user_id),
+        aget_order_count(provider_key(user_id), 'in_progress'),
+    )
+    context.setdefault('average_ratings', {})[user_id] = summary.average_rating()
+    context.setdefault('pending_orders', {})[user_id] = pending_orders
+
+def prime_aggregates_from_offer(context, offer):
+    """
+    Stores the owner aggregates that the offer queryset plan already loaded,
+    so serializing the nested business profile needs no extra query.
+    """
+    user = offer.user
+    if user is None or not hasattr(offer, 'owner_pending_orders'):
+        return
+    context.setdefault('pending_orders', {})[user.id] = offer.owner_pending_orders
+    summary = getattr(user, 'rating_summary', None)
+    context.setdefault('average_ratings', {})[user.id] = summary.average_rating() if summary else None
+
+def get_average_rating_for(context, user_id):
+    """
+    Returns the average rating of a single business user, loading it if necessary.
+    """
+    return load_average_ratings(context, [user_id])[user_id]
+
+def get_pending_orders_for(context, user_id):
+    """
+    Returns the in-progress order count of a single business user, loading it if necessary.
+    """
+    return _load_into_context(context, 'pending_orders', get_pending_order_counts, [user_id])[user_id]
+# End of businessProfileSerializers_logic.py
+
+# orderSerializers_logic.py
+def get_user_summaries(user_ids, serialize):
+    """
+    Serializes every user once, with both profiles joined in the same query.
+    """
+    users = User.objects.filter(id__in=user_ids).select_related('business_profile', 'customer_profile')
+    return {user.id: serialize(user) for user in users}
+
+def load_user_summaries(context, user_ids, serialize):
+    """
+    Preloads the serialized users into the context. Missing users map to None.
+    """
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    return _load_into_context(
+        context, 'user_summaries',
+        lambda missing: {**dict.fromkeys(missing), **get_user_summaries(missing, serialize)},
+        user_ids,
+    )
+
+def prime_user_summary(context, user, serialize):
+    """
+    Stores the summary of an already loaded user, so it is not queried again.
+    """
+    summaries = context.setdefault('user_summaries', {})
+    if user is not None and summaries.get(user.id) is None:
+        summaries[user.id] = serialize(user)
+
+def get_user_summary_for(context, user_id, serialize):
+    """
+    Returns the serialized user, loading it if necessary.
+    """
+    if user_id is None:
+        return None
+    summaries = context.get('user_summaries', {})
+    if user_id in summaries:
+        return summaries[user_id]
+    return load_user_summaries(context, [user_id], serialize)[user_id]
+# End of orderSerializers_logic.py
@@ -0,0 +1,692 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from decimal import Decimal
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+from coder_app.models import BusinessProfile, CustomerProfile, Offer, OfferDetail, Order, Review, UserRole
+from utils.cache import invalidate_tags
+from utils.offer_minimums import rebuild_offer_minimums
+from utils.order_status import order_counters_paused, rebuild_order_counters
+from utils.rating_summary import rating_summaries_paused, rebuild_rating_summaries
+from utils.search import rebuild_search_index
+from utils.statistics import invalidate_base_info_statistics, rebuild_platform_statistics
+
+BENCHMARK_USER_PREFIX = 'bench_'
+BENCHMARK_PASSWORD = 'benchmark'
+# Registration runs the password validators, so it needs a stronger password.
+REGISTRATION_PASSWORD = 'Bench-Registration-2024!'
+OFFER_TYPES = ('basic', 'standard', 'premium')
+ORDER_STATUS_WEIGHTS = {'pending': 2, 'in_progress': 3, 'completed': 4, 'cancelled': 1}
+REPORT_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_memory_kb')
+
+# benchmarkSeed_logic.py
+def chunked(iterable, size):
+    """
+    Yields lists of at most `size` items so large volumes are never held in memory at once.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def bulk_insert(model, objects, batch_size):
+    """
+    Inserts generated objects in batches and returns the number of inserted rows.
+    """
+    count = 0
+    for chunk in chunked(objects, batch_size):
+        model.objects.bulk_create(chunk, batch_size=batch_size)
+        count += len(chunk)
+    return count
+
+def benchmark_users_exist():
+    """
+    Returns True if the database already contains seeded benchmark users.
+    """
+    return User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).exists()
+
+def clear_benchmark_data():
+    """
+    Deletes all seeded benchmark users together with their offers, orders and reviews.
+    """
+    users = User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX)
+    # The order counters and rating summaries are rebuilt below instead of being counted down per deleted row
+    with order_counters_paused(), rating_summaries_paused():
+        Review.objects.filter(reviewer__in=users).delete()
+        Order.objects.filter(user__in=users).delete()
+        users.delete()
+    refresh_derived_data()
+
+def seed_users(role, count, password, batch_size):
+    """
+    Creates `count` users for a role and returns their ids.
+    """
+    prefix = f'{BENCHMARK_USER_PREFIX}{role}_'
+    bulk_insert(User, (
+        User(username=f'{prefix}{index}', email=f'{prefix}{index}@example.com', password=password)
+        for index in range(count)
+    ), batch_size)
+    return list(User.objects.filter(username__startswith=prefix).order_by('id').values_list('id', flat=True))
+
+def seed_profiles(provider_ids, customer_ids, batch_size):
+    """
+    Creates a business profile for every provider and a customer profile for every customer,
+    with their roles. Bulk inserts skip the profiles' save(), so the roles are stored here.
+    """
+    bulk_insert(BusinessProfile, (
+        BusinessProfile(user_id=user_id, company_name=f'Company {user_id}', company_address='Benchmark Street 1')
+        for user_id in provider_ids
+    ), batch_size)
+    bulk_insert(CustomerProfile, (
+        CustomerProfile(user_id=user_id, first_name='Bench', last_name=f'Customer {user_id}')
+        for user_id in customer_ids
+    ), batch_size)
+    UserRole.store('business', provider_ids, batch_size)
+    UserRole.store('customer', customer_ids, batch_size)
+
+def build_offer_variants(rng):
+    """
+    Returns prices, delivery times and features for the three variants of an offer.
+    """
+    base_price = rng.randint(20, 500)
+    base_days = rng.randint(1, 10)
+    return [
+        {
+            'offer_type': offer_type,
+            'price': Decimal(base_price * (index + 1)),
+            'days': base_days + index * 2,
+            'features': [f'Feature {number}' for number in range(index + 1)],
+        }
+        for index, offer_type in enumerate(OFFER_TYPES)
+    ]
+
+def seed_offers(provider_ids, count, rng, batch_size):
+    """
+    Creates offers with three variants each and returns
+    (offer_id, owner_id, [(detail_id, offer_type, features), ...]) for every offer.
+    """
+    offers = []
+    for chunk in chunked(range(count), batch_size):
+        variants = [build_offer_variants(rng) for _ in chunk]
+        created = Offer.objects.bulk_create([
+            Offer(
+                title=f'Benchmark offer {index}',
+                description=f'Seeded offer number {index} for load tests',
+                user_id=rng.choice(provider_ids),
+                price=offer_variants[0]['price'],
+                delivery_time_in_days=offer_variants[0]['days'],
+            )
+            for index, offer_variants in zip(chunk, variants)
+        ])
+        details = OfferDetail.objects.bulk_create([
+            OfferDetail(
+                offer=offer, variant_title=variant['offer_type'].title(), variant_price=variant['price'],
+                delivery_time_in_days=variant['days'], revision_limit=variant['days'],
+                offer_type=variant['offer_type'], features=variant['features'],
+            )
+            for offer, offer_variants in zip(created, variants)
+            for variant in offer_variants
+        ])
+        for offer, offset in zip(created, range(0, len(details), len(OFFER_TYPES))):
+            offer_details = details[offset:offset + len(OFFER_TYPES)]
+            offers.append((offer.id, offer.user_id, [(d.id, d.offer_type, d.features) for d in offer_details]))
+    return offers
+
+def generate_orders(customer_ids, offers, count, rng):
+    """
+    Yields orders with the business user and features set, since bulk_create bypasses Order.save().
+    """
+    statuses = list(ORDER_STATUS_WEIGHTS)
+    weights = list(ORDER_STATUS_WEIGHTS.values())
+    for _ in range(count):
+        offer_id, owner_id, details = rng.choice(offers)
+        detail_id, offer_type, features = rng.choice(details)
+        yield Order(
+            user_id=rng.choice(customer_ids), business_user_id=owner_id, offer_id=offer_id,
+            offer_detail_id_id=detail_id, option=offer_type, features=features,
+            status=rng.choices(statuses, weights)[0],
+        )
+
+def generate_reviews(customer_ids, offers, count, rng):
+    """
+    Yields reviews of random offers by random customers.
+    """
+    for index in range(count):
+        offer_id, owner_id, _ = rng.choice(offers)
+        yield Review(
+            rating=rng.randint(1, 5), description=f'Benchmark review {index}',
+            business_user_id=owner_id, reviewer_id=rng.choice(customer_ids), offer_id=offer_id,
+        )
+
+def refresh_derived_data():
+    """
+    Rebuilds the summaries, the search index and the statistics that signals
+    would have maintained, and invalidates cached responses.
+    """
+    rebuild_rating_summaries()
+    rebuild_offer_minimums()
+    rebuild_order_counters()
+    rebuild_search_index()
+    rebuild_platform_statistics()
+    invalidate_base_info_statistics()
+    invalidate_tags('offers', 'reviews')
+
+def seed_benchmark_data(providers, customers, offers, orders, reviews, batch_size=2000, seed=42, log=None):
+    """
+    Seeds the given volumes with bulk inserts and returns the number of created rows per model.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    # Hashing once keeps seeding fast; every benchmark user can still log in.
+    password = make_password(BENCHMARK_PASSWORD)
+    created = {}
+
+    with transaction.atomic():
+        provider_ids = seed_users('provider', providers, password, batch_size)
+        customer_ids = seed_users('customer', customers, password, batch_size)
+        seed_profiles(provider_ids, customer_ids, batch_size)
+        created['users'] = len(provider_ids) + len(customer_ids)
+        log(f"Created {len(provider_ids)} providers and {len(customer_ids)} customers.")
+
+        offer_rows = seed_offers(provider_ids, offers, rng, batch_size)
+        created['offers'] = len(offer_rows)
+        created['offer_details'] = len(offer_rows) * len(OFFER_TYPES)
+        log(f"Created {created['offers']} offers with {created['offer_details']} variants.")
+
+        if offer_rows:
+            created['orders'] = bulk_insert(Order, generate_orders(customer_ids, offer_rows, orders, rng), batch_size)
+            log(f"Created {created['orders']} orders.")
+            created['reviews'] = bulk_insert(Review, generate_reviews(customer_ids, offer_rows, reviews, rng), batch_size)
+            log(f"Created {created['reviews']} reviews.")
+
+        refresh_derived_data()
+    return created
+# End of benchmarkSeed_logic.py
+
+# benchmarkRunner_logic.py
+def get_benchmark_fixtures():
+    """
+    Picks the seeded rows used to fill URL parameters and to authenticate requests.
+    """
+    review = Review.objects.filter(reviewer__username__startswith=BENCHMARK_USER_PREFIX).order_by('id').first()
+    if review is None:
+        return None
+    order = Order.objects.filter(business_user_id=review.business_user_id).order_by('id').first()
+    return {
+        'provider': review.business_user,
+        'customer': review.reviewer,
+        'offer': review.offer,
+        'review': review,
+        'order': order,
+    }
+
+def get_benchmark_requests(fixtures):
+    """
+    Describes how every named URL of the app is requested:
+    name -> (method, URL kwargs, user, payload). Write requests are rolled back.
+    """
+    provider, customer = fixtures['provider'], fixtures['customer']
+    offer, review, order = fixtures['offer'], fixtures['review'], fixtures['order']
+    return {
+        'registration': ('post', {}, None, {
+            'username': f'{BENCHMARK_USER_PREFIX}registration', 'email': 'registration@example.com',
+            'password': REGISTRATION_PASSWORD, 'repeated_password': REGISTRATION_PASSWORD, 'profile_type': 'customer',
+        }),
+        'login': ('post', {}, None, {'username': customer.username, 'password': BENCHMARK_PASSWORD}),
+        'business-profile': ('get', {'user_id': provider.id}, customer, None),
+        'profile': ('get', {'user_id': customer.id}, customer, None),
+        'business-profiles': ('get', {}, customer, None),
+        'customer-profiles': ('get', {}, customer, None),
+        'customer-profile': ('get', {'user_id': customer.id}, customer, None),
+        'reviews': ('get', {}, customer, None),
+        'review-detail': ('patch', {'pk': review.id}, customer, {'rating': review.rating}),
+        'order-list': ('get', {}, customer, None),
+        'order-detail': ('patch', {'order_id': order.id}, provider, {'status': order.status}) if order else None,
+        'order-count': ('get', {'offer_id': offer.id}, provider, None),
+        'offers': ('get', {}, None, None),
+        'offer-detail': ('get', {'id': offer.id}, customer, None),
+        'base-info': ('get', {}, None, None),
+        'completed-order-count': ('get', {'user_id': provider.id}, provider, None),
+        'user-orders': ('get', {}, customer, None),
+    }
+
+def get_url_names(patterns=None, namespace=''):
+    """
+    Returns the names of all URL patterns of the app in definition order.
+    """
+    if patterns is None:
+        from coder_app.urls import urlpatterns as patterns
+    names = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names += get_url_names(pattern.url_patterns, namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.append(pattern.name)
+    return names
+
+def get_benchmark_host():
+    """
+    Returns a host name accepted by ALLOWED_HOSTS for test client requests.
+    """
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+    return hosts[0] if hosts else 'testserver'
+
+def reset_throttles(users):
+    """
+    Drops the throttle history of the benchmark clients so the rate limits do not skew the results.
+    """
+    from django.core.cache import cache
+    keys = [AnonRateThrottle.cache_format % {'scope': 'anon', 'ident': '127.0.0.1'}]
+    keys += [UserRateThrottle.cache_format % {'scope': 'user', 'ident': user.pk} for user in users if user]
+    cache.delete_many(keys)
+
+def read_content(response):
+    """
+    Consumes the whole response body, including streamed responses, and returns its size.
+    """
+    if getattr(response, 'streaming', False):
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+def send_request(path, method, user, payload):
+    """
+    Sends one request through the test client. Write requests run in a transaction that is rolled back.
+    """
+    client = APIClient(SERVER_NAME=get_benchmark_host(), REMOTE_ADDR='127.0.0.1')
+    if user:
+        client.force_authenticate(user)
+    if method == 'get':
+        response = client.get(path)
+        return response, read_content(response)
+    with transaction.atomic():
+        response = getattr(client, method)(path, payload, format='json')
+        size = read_content(response)
+        transaction.set_rollback(True)
+    return response, size
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of a list of numbers.
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def measure_endpoint(path, method, user, payload, iterations, warmup):
+    """
+    Measures latency percentiles, the query count and the peak traced memory of one endpoint.
+    """
+    for _ in range(warmup):
+        send_request(path, method, user, payload)
+
+    timings, query_counts = [], []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response, size = send_request(path, method, user, payload)
+            timings.append((time.perf_counter() - started) * 1000)
+        query_counts.append(len(queries))
+
+    # Tracing slows every allocation down, so memory is measured in a separate request.
+    tracemalloc.start()
+    try:
+        send_request(path, method, user, payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'method': method.upper(),
+        'path': path,
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries': max(query_counts),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'response_bytes': size,
+    }
+
+def get_dataset_size():
+    """
+    Returns the row counts the report was measured against.
+    """
+    return {
+        'users': User.objects.count(),
+        'offers': Offer.objects.count(),
+        'offer_details': OfferDetail.objects.count(),
+        'orders': Order.objects.count(),
+        'reviews': Review.objects.count(),
+    }
+
+def run_benchmark(iterations=20, warmup=2, only=None, log=None):
+    """
+    Requests every URL of the app and returns a JSON-serializable report.
+    Raises ValueError if no benchmark data has been seeded.
+    """
+    log = log or (lambda message: None)
+    fixtures = get_benchmark_fixtures()
+    if fixtures is None:
+        raise ValueError("No benchmark data found. Run `python manage.py seed_benchmark` first.")
+
+    requests = get_benchmark_requests(fixtures)
+    endpoints = {}
+    for name in get_url_names():
+        if only and name not in only:
+            continue
+        spec = requests.get(name)
+        if spec is None:
+            log(f"Skipping {name}: no request is defined for it.")
+            continue
+        method, kwargs, user, payload = spec
+        reset_throttles([fixtures['provider'], fixtures['customer']])
+        endpoints[name] = measure_endpoint(reverse(name, kwargs=kwargs), method, user, payload, iterations, warmup)
+        result = endpoints[name]
+        log(f"{name}: {result['status']} p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, {result['queries']} queries")
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'database': connection.vendor,
+        'iterations': iterations,
+        'response_cache_timeout': getattr(settings, 'RESPONSE_CACHE_TIMEOUT', None),
+        'dataset': get_dataset_size(),
+        'endpoints': endpoints,
+    }
+
+def load_report(path):
+    """
+    Reads a benchmark report from a JSON file.
+    """
+    with open(path, encoding='utf-8') as report_file:
+        return json.load(report_file)
+
+def save_report(report, path):
+    """
+    Writes a benchmark report to a JSON file.
+    """
+    with open(path, 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, indent=2)
+
+def compare_reports(baseline, current, threshold=0.1):
+    """
+    Compares two reports endpoint by endpoint. Returns rows of
+    (endpoint, metric, baseline, current, relative change, regressed).
+    Query counts regress on any increase; latency and memory beyond the threshold.
+    """
+    rows = []
+    for name, result in current['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None:
+            continue
+        for metric in REPORT_METRICS:
+            before, after = previous.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else (0.0 if after == before else float('inf'))
+            regressed = after > before if metric == 'queries' else change > threshold
+            rows.append((name, metric, before, after, change, regressed))
+    return rows
+# End of benchmarkRunner_logic.py
+
+# loginBenchmark_logic.py
+def get_core_count():
+    """
+    Returns the number of CPU cores this process may run on.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def get_login_users(count):
+    """
+    Returns up to `count` seeded users, each with a token, so concurrent logins never race to create one.
+    """
+    users = list(User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).order_by('id')[:count])
+    for user in users:
+        Token.objects.get_or_create(user=user)
+    return users
+
+def get_client_address(index):
+    """
+    Returns a distinct client address per request, so the anonymous rate limit sees a burst from many clients.
+    """
+    return f'10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}'
+
+def login_sync(username, index):
+    """
+    Sends one login through the WSGI handler and returns its status and latency in milliseconds.
+    """
+    client = APIClient(SERVER_NAME=get_benchmark_host(), REMOTE_ADDR=get_client_address(index))
+    started = time.perf_counter()
+    response = client.post(reverse('login'), {'username': username, 'password': BENCHMARK_PASSWORD}, format='json')
+    return response.status_code, (time.perf_counter() - started) * 1000
+
+def run_threaded(send, requests, concurrency):
+    """
+    Calls `send(index)` for every request from `concurrency` threads, like a threaded WSGI server would.
+    Returns the (status, latency) results.
+    """
+    results, jobs = [], iter(range(requests))
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    index = next(jobs, None)
+                if index is None:
+                    return
+                result = send(index)
+                with lock:
+                    results.append(result)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def run_on_event_loop(send, requests, concurrency):
+    """
+    Awaits `send(index)` for every request through the ASGI URLs from one event loop, at most
+    `concurrency` at a time. Returns the (status, latency) results.
+    """
+    async def run():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def limited(index):
+            async with slots:
+                return await send(index)
+
+        return await asyncio.gather(*(limited(index) for index in range(requests)))
+
+    # The async test client always sends `Host: testserver`
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        return asyncio.run(run())
+
+def summarize_results(results, duration):
+    """
+    Returns the throughput, latency percentiles and status counts of a burst of requests.
+    """
+    timings = [timing for _, timing in results]
+    statuses = {}
+    for status_code, _ in results:
+        statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+    cores = get_core_count()
+    return {
+        'duration_s': round(duration, 3),
+        'requests_per_second': round(len(results) / duration, 2),
+        'requests_per_second_per_core': round(len(results) / duration / cores, 2),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'statuses': statuses,
+    }
+
+def run_sync_logins(usernames, requests, concurrency):
+    """
+    Sends the logins through the WSGI handler from `concurrency` threads.
+    """
+    return run_threaded(lambda index: login_sync(usernames[index % len(usernames)], index), requests, concurrency)
+
+def run_async_logins(usernames, requests, concurrency):
+    """
+    Sends the logins through the ASGI handler from one event loop, at most `concurrency` at a time.
+    """
+    async def login(index):
+        # The client address is part of the ASGI scope, so every request gets its own client
+        client = AsyncClient(client=[get_client_address(index), 0])
+        started = time.perf_counter()
+        response = await client.post(
+            '/api/login/',
+            {'username': usernames[index % len(usernames)], 'password': BENCHMARK_PASSWORD},
+            content_type='application/json',
+        )
+        return response.status_code, (time.perf_counter() - started) * 1000
+
+    return run_on_event_loop(login, requests, concurrency)
+
+def run_login_benchmark(requests=200, concurrency=None, use_asgi=False, log=None):
+    """
+    Sends a burst of logins for seeded users and returns the throughput per core with latency percentiles.
+    Raises ValueError if no benchmark data has been seeded.
+    """
+    log = log or (lambda message: None)
+    concurrency = concurrency or getattr(settings, 'PASSWORD_HASHING_WORKERS', 1)
+    users = get_login_users(max(concurrency * 4, 1))
+    if not users:
+        raise ValueError("No benchmark data found. Run `python manage.py seed_benchmark` first.")
+    usernames = [user.username for user in users]
+
+    # Every login exceeds the request time budget, so instrumentation would log each of them
+    with override_settings(REQUEST_INSTRUMENTATION_ENABLED=False):
+        # Seeded hashes may use another hasher or cost; a first round rehashes them with the configured one
+        for username in usernames:
+            login_sync(username, 0)
+        log(f"Sending {requests} logins with concurrency {concurrency} through {'ASGI' if use_asgi else 'WSGI'}...")
+        started = time.perf_counter()
+        if use_asgi:
+            results = run_async_logins(usernames, requests, concurrency)
+        else:
+            results = run_sync_logins(usernames, requests, concurrency)
+        duration = time.perf_counter() - started
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'server': 'asgi' if use_asgi else 'wsgi',
+        'password_hasher': settings.PASSWORD_HASHERS[0],
+        'password_hash_iterations': getattr(settings, 'PASSWORD_HASH_ITERATIONS', None),
+        'hashing_workers': getattr(settings, 'PASSWORD_HASHING_WORKERS', None),
+        'requests': requests,
+        'concurrency': concurrency,
+        'cores': get_core_count(),
+        **summarize_results(results, duration),
+    }
+# End of loginBenchmark_logic.py
+
+# serverBenchmark_logic.py
+ASYNC_VIEW_NAMES = ('base-info', 'offer-detail', 'business-profile', 'profile')
+
+def get_server_benchmark_paths(fixtures):
+    """
+    Returns the paths of the views that have async counterparts, by URL name.
+    """
+    requests = get_benchmark_requests(fixtures)
+    return {name: reverse(name, kwargs=requests[name][1]) for name in ASYNC_VIEW_NAMES}
+
+def get_sync_sender(path, token):
+    """
+    Returns a function that sends one GET request through the WSGI handler.
+    """
+    def send(index):
+        client = APIClient(
+            SERVER_NAME=get_benchmark_host(), REMOTE_ADDR=get_client_address(index), HTTP_AUTHORIZATION=f'Token {token}'
+        )
+        started = time.perf_counter()
+        response = client.get(path)
+        read_content(response)
+        return response.status_code, (time.perf_counter() - started) * 1000
+    return send
+
+def get_async_sender(path, token):
+    """
+    Returns a coroutine function that sends one GET request through the ASGI handler.
+    """
+    async def send(index):
+        client = AsyncClient(client=[get_client_address(index), 0])
+        started = time.perf_counter()
+        response = await client.get(path, headers={'Authorization': f'Token {token}'})
+        read_content(response)
+        return response.status_code, (time.perf_counter() - started) * 1000
+    return send
+
+def measure_server(run, send, requests, concurrency, user):
+    """
+    Sends a burst of requests with a warmed up cache and a fresh rate limit, and summarizes it.
+    """
+    run(send, 1, 1)
+    reset_throttles([user])
+    started = time.perf_counter()
+    results = run(send, requests, concurrency)
+    return summarize_results(results, time.perf_counter() - started)
+
+def run_server_benchmark(requests=200, concurrency=8, use_response_cache=True, log=None):
+    """
+    Sends the same bursts of reads to the sync views through WSGI and to the async views through
+    ASGI, and returns the throughput and latency percentiles of both per endpoint.
+    Raises ValueError if no benchmark data has been seeded.
+    """
+    log = log or (lambda message: None)
+    fixtures = get_benchmark_fixtures()
+    if fixtures is None:
+        raise ValueError("No benchmark data found. Run `python manage.py seed_benchmark` first.")
+    token, _ = Token.objects.get_or_create(user=fixtures['customer'])
+
+    servers = {'wsgi': (run_threaded, get_sync_sender), 'asgi': (run_on_event_loop, get_async_sender)}
+    endpoints = {}
+    # Waiting requests exceed the time budget, so instrumentation would log most of them
+    overrides = {'REQUEST_INSTRUMENTATION_ENABLED': False}
+    if not use_response_cache:
+        overrides['RESPONSE_CACHE_TIMEOUT'] = 0
+    with override_settings(**overrides):
+        for name, path in get_server_benchmark_paths(fixtures).items():
+            result = {'path': path}
+            for server, (run, get_sender) in servers.items():
+                send = get_sender(path, token.key)
+                result[server] = measure_server(run, send, requests, concurrency, fixtures['customer'])
+                log(f"{name} ({server}): {result[server]['requests_per_second']} req/s, "
+                    f"p50 {result[server]['p50_ms']} ms, p95 {result[server]['p95_ms']} ms")
+            result['asgi_to_wsgi_throughput'] = round(
+                result['asgi']['requests_per_second'] / result['wsgi']['requests_per_second'], 3
+            )
+            endpoints[name] = result
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'database': connection.vendor,
+        'requests': requests,
+        'concurrency': concurrency,
+        'cores': get_core_count(),
+        'response_cache_timeout': getattr(settings, 'RESPONSE_CACHE_TIMEOUT', None) if use_response_cache else 0,
+        'endpoints': endpoints,
+    }
+# End of serverBenchmark_logic.py
@@ -0,0 +1,204 @@
+import hashlib
+from functools import wraps
+from uuid import uuid4
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from utils.profile_helpers import get_profile_type
+
+TAG_KEY_PREFIX = 'cache_tag'
+RESPONSE_KEY_PREFIX = 'response'
+USER_KEYS = ('user', 'business_user', 'reviewer', 'user_details')
+
+# responseCache_logic.py
+def get_response_cache_timeout():
+    """
+    Returns how long responses are cached; 0 disables the response cache.
+    """
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+def get_viewer_identity(user):
+    """
+    Returns the identity class of the viewer. Viewers with the same class get the same responses.
+    Providers get their own class because some lists are limited to their own data.
+    """
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    profile_type = get_profile_type(user)
+    if profile_type == 'business':
+        return f'business:{user.id}'
+    if profile_type == 'customer':
+        return 'customer'
+    return 'user'
+
+def build_response_cache_key(namespace, request, per_user=False):
+    """
+    Builds the cache key from the namespace, the viewer's identity class, the path and the sorted query parameters.
+    Responses that are personal to the viewer are keyed by the user instead of the identity class.
+    """
+    query = '&'.join(
+        f'{key}={value}'
+        for key in sorted(request.query_params)
+        for value in request.query_params.getlist(key)
+    )
+    digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    identity = f'user:{request.user.id}' if per_user else get_viewer_identity(request.user)
+    return f'{RESPONSE_KEY_PREFIX}:{namespace}:{identity}:{digest}'
+
+def _tag_key(tag):
+    """
+    Returns the cache key that holds the version of a tag.
+    """
+    return f'{TAG_KEY_PREFIX}:{tag}'
+
+def get_tag_versions(tags):
+    """
+    Returns the current version of every tag, creating versions for new tags.
+    """
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = cache.get_many(keys)
+    for key in set(keys) - set(versions):
+        cache.add(key, uuid4().hex, None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+def bump_tags(tags):
+    """
+    Gives the tags new versions, which invalidates every response cached under them.
+    """
+    cache.set_many({_tag_key(tag): uuid4().hex for tag in tags}, None)
+
+def invalidate_tags(*tags):
+    """
+    Invalidates the tags right away and again after the current transaction commits,
+    so a response cached from not yet committed data does not survive the commit.
+    """
+    tags = [tag for tag in tags if tag]
+    bump_tags(tags)
+    transaction.on_commit(lambda: bump_tags(tags))
+
+def collect_user_ids(data):
+    """
+    Returns the ids of all users embedded in serialized data.
+    """
+    user_ids = set()
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in USER_KEYS and isinstance(value, dict) and 'id' in value:
+                user_ids.add(value['id'])
+            elif key in USER_KEYS and isinstance(value, int):
+                user_ids.add(value)
+            user_ids |= collect_user_ids(value)
+    elif isinstance(data, list):
+        for item in data:
+            user_ids |= collect_user_ids(item)
+    return user_ids
+
+def user_tags(data):
+    """
+    Returns a tag for every user embedded in serialized data.
+    """
+    return [f'user:{user_id}' for user_id in collect_user_ids(data)]
+
+def get_cached_response_data(key):
+    """
+    Returns the response data cached under a key while all of its tags are unchanged, otherwise None.
+    """
+    entry = cache.get(key)
+    if entry and get_tag_versions(entry['tags']) == entry['tags']:
+        return entry['data']
+    return None
+
+def store_response_data(key, tags, data, timeout):
+    """
+    Caches response data together with the current versions of its tags.
+    """
+    cache.set(key, {'tags': get_tag_versions(set(tags)), 'data': data}, timeout)
+
+def cache_response(namespace, tags, per_user=False):
+    """
+    Caches successful GET responses of a view method; with `per_user`, separately for every user.
+
+    `tags(request, data, **kwargs)` returns the tags a response depends on.
+    A cached response is only served while all of its tags still have the
+    versions they had when it was stored.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            timeout = get_response_cache_timeout()
+            if not timeout:
+                return view_method(view, request, *args, **kwargs)
+
+            key = build_response_cache_key(namespace, request, per_user)
+            data = get_cached_response_data(key)
+            if data is not None:
+                return Response(data, status=status.HTTP_200_OK)
+
+            response = view_method(view, request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+                store_response_data(key, tags(request, response.data, **kwargs), response.data, timeout)
+            return response
+        return wrapper
+    return decorator
+
+def acache_response(namespace, tags, per_user=False):
+    """
+    Async version of cache_response for the async views; the cache is read and written in the sync thread.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        async def wrapper(view, request, *args, **kwargs):
+            timeout = get_response_cache_timeout()
+            if not timeout:
+                return await view_method(view, request, *args, **kwargs)
+
+            key = build_response_cache_key(namespace, request, per_user)
+            data = await sync_to_async(get_cached_response_data)(key)
+            if data is not None:
+                return Response(data, status=status.HTTP_200_OK)
+
+            response = await view_method(view, request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+                await sync_to_async(store_response_data)(
+                    key, tags(request, response.data, **kwargs), response.data, timeout
+                )
+            return response
+        return wrapper
+    return decorator
+# End of responseCache_logic.py
+
+# cachedViews_logic.py
+def offer_list_tags(request, data, **kwargs):
+    """
+    Offer lists depend on all offers and on the users and profiles embedded in them.
+    """
+    return ['offers', *user_tags(data)]
+
+def offer_detail_tags(request, data, id=None, **kwargs):
+    """
+    An offer depends on itself and on the users and profiles embedded in it.
+    """
+    return [f'offer:{id}', *user_tags(data)]
+
+def business_profile_tags(request, data, user_id=None, **kwargs):
+    """
+    A business profile depends on its user, including the user's reviews and orders.
+    """
+    return [f'user:{user_id}']
+
+def review_list_tags(request, data, **kwargs):
+    """
+    Review lists depend on all reviews and on the users embedded in them.
+    """
+    return ['reviews', *user_tags(data)]
+
+def dashboard_tags(request, data, **kwargs):
+    """
+    A dashboard depends on the viewer, including their offers, orders and reviews, and on the users embedded in it.
+    """
+    return [f'user:{request.user.id}', *user_tags(data)]
+# End of cachedViews_logic.py
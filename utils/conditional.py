@@ -0,0 +1,193 @@
+import hashlib
+from functools import wraps
+from django.db.models import Count, IntegerField, Max, Q, Value
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.response import Response
+from coder_app.models import BusinessProfile, CustomerProfile, Offer, OfferDetail, Order, RatingSummary
+
+# validatorSources_logic.py
+def touch(queryset):
+    """
+    Moves the updated_at of rows whose representation embeds changed data without saving them.
+    """
+    queryset.update(updated_at=now())
+
+def profile_validators(*user_ids):
+    """
+    Returns the profiles of embedded users. Their updated_at also moves when the user row changes.
+    """
+    condition = Q()
+    for ids in user_ids:
+        condition |= Q(user_id__in=ids)
+    return [BusinessProfile.objects.filter(condition), CustomerProfile.objects.filter(condition)]
+
+def provider_aggregate_validators(user_ids):
+    """
+    Returns the rows behind the average rating and the pending order count of providers.
+    """
+    return [
+        RatingSummary.objects.filter(business_user_id__in=user_ids),
+        Order.objects.filter(business_user_id__in=user_ids, status='in_progress'),
+    ]
+
+def offer_validators(offer_id):
+    """
+    Returns the rows an offer is built from: the offer, its variants, and the profile and
+    aggregates of its provider. A deleted variant changes the count of the variants.
+    """
+    offers = Offer.objects.filter(id=offer_id)
+    provider_ids = offers.values('user_id')
+    return [
+        offers, OfferDetail.objects.filter(offer_id=offer_id),
+        *profile_validators(provider_ids), *provider_aggregate_validators(provider_ids),
+    ]
+
+def order_list_validators(orders):
+    """
+    Returns the rows an order list is built from: the orders, their offers and the profiles of both parties.
+    """
+    return [
+        orders,
+        Offer.objects.filter(id__in=orders.values('offer_id')),
+        *profile_validators(orders.values('user_id'), orders.values('business_user_id')),
+    ]
+
+def review_list_validators(reviews):
+    """
+    Returns the rows a review list is built from: the reviews, the profiles of both parties
+    and the rating summaries behind the average ratings.
+    """
+    business_user_ids = reviews.values('business_user_id')
+    return [
+        reviews,
+        *profile_validators(business_user_ids, reviews.values('reviewer_id')),
+        RatingSummary.objects.filter(business_user_id__in=business_user_ids),
+    ]
+# End of validatorSources_logic.py
+
+# conditionalGet_logic.py
+def _validator_query(querysets):
+    """
+    Builds one query that returns the row count and the latest updated_at of every queryset.
+    """
+    rows = [
+        queryset.order_by()
+        .annotate(source=Value(index, output_field=IntegerField()))
+        .values('source')
+        .annotate(count=Count('pk'), last_modified=Max('updated_at'))
+        .values_list('source', 'count', 'last_modified')
+        for index, queryset in enumerate(querysets)
+    ]
+    return rows[0].union(*rows[1:], all=True) if len(rows) > 1 else rows[0]
+
+def _combine_validators(rows):
+    """
+    Combines the per-queryset rows into the counts and the latest updated_at over all of them.
+    """
+    rows = sorted(rows, key=lambda row: row[0])
+    modified = [last_modified for _, _, last_modified in rows if last_modified]
+    return {
+        'count': ':'.join(str(count) for _, count, _ in rows),
+        'last_modified': max(modified) if modified else None,
+    }
+
+def get_validators(querysets):
+    """
+    Returns the row counts and the latest updated_at of the querysets a response is built from, in a single query.
+    """
+    return _combine_validators(_validator_query(querysets))
+
+async def aget_validators(querysets):
+    """
+    Async version of get_validators.
+    """
+    return _combine_validators([row async for row in _validator_query(querysets)])
+
+def build_etag(request, validators):
+    """
+    Builds a weak ETag from the URL, the viewer and the validators of the underlying rows.
+    """
+    last_modified = validators['last_modified']
+    parts = [
+        request.get_full_path(),
+        str(request.user.id if request.user.is_authenticated else ''),
+        str(validators['count']),
+        last_modified.isoformat() if last_modified else '',
+    ]
+    return 'W/"%s"' % hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+def is_not_modified(request, etag, last_modified):
+    """
+    Evaluates If-None-Match, or If-Modified-Since if no ETag was sent.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # Weak comparison: the W/ prefixes are ignored
+        etags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+        return '*' in etags or etag.removeprefix('W/') in etags
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return bool(last_modified and if_modified_since and int(last_modified.timestamp()) <= if_modified_since)
+
+def set_validator_headers(response, etag, last_modified):
+    """
+    Adds the ETag and Last-Modified headers to a response.
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+def evaluate_validators(request, validators):
+    """
+    Returns the ETag and Last-Modified built from the validators, and a 304 response
+    if the client's copy is still current, otherwise None.
+    """
+    etag = build_etag(request, validators)
+    last_modified = validators['last_modified']
+    if is_not_modified(request, etag, last_modified):
+        not_modified = Response(status=status.HTTP_304_NOT_MODIFIED)
+        return etag, last_modified, set_validator_headers(not_modified, etag, last_modified)
+    return etag, last_modified, None
+
+def conditional_get(view_method):
+    """
+    Answers GET requests with 304 Not Modified when the client's validators still match.
+
+    The view's `get_validator_querysets(request, **kwargs)` returns the rows the
+    response is built from, including the rows of embedded users and aggregates.
+    Only their counts and latest updated_at are queried, so an unchanged response
+    is answered without loading or serializing anything.
+    """
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        validators = get_validators(view.get_validator_querysets(request, **kwargs))
+        etag, last_modified, not_modified = evaluate_validators(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        response = view_method(view, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_validator_headers(response, etag, last_modified)
+        return response
+    return wrapper
+
+def aconditional_get(view_method):
+    """
+    Async version of conditional_get for the async views.
+    """
+    @wraps(view_method)
+    async def wrapper(view, request, *args, **kwargs):
+        validators = await aget_validators(view.get_validator_querysets(request, **kwargs))
+        etag, last_modified, not_modified = evaluate_validators(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        response = await view_method(view, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_validator_headers(response, etag, last_modified)
+        return response
+    return wrapper
+# End of conditionalGet_logic.py
@@ -0,0 +1,101 @@
+from django.contrib.auth.models import User
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat
+from coder_app.models import Offer, OrderStatusCounter, RatingSummary
+from coder_app.serializers import BusinessProfileSerializer, CustomerProfileSerializer, ReviewSerializer
+from utils.functions import build_profile_response, get_orders_for_user, get_review_queryset
+from utils.order_status import customer_key, provider_key
+from utils.profile_helpers import get_profile_type, get_user_profile
+from utils.utils import serialize_orders
+
+# Number of recent orders and reviews on the dashboard
+RECENT_ITEMS = 5
+
+# dashboardView_logic.py
+def get_dashboard_user(user_id):
+    """
+    Loads the user with both profiles and the rating summary in one query.
+    """
+    return User.objects.select_related('business_profile', 'customer_profile', 'rating_summary').get(pk=user_id)
+
+def get_status_counts(key):
+    """
+    Returns the number of orders per status under a counter key in one query.
+    """
+    counts = {status: 0 for status, _ in OrderStatusCounter._meta.get_field('status').choices}
+    counts.update(OrderStatusCounter.objects.filter(key=key).values_list('status', 'count'))
+    return counts
+
+def get_offer_in_progress_counts(user):
+    """
+    Returns the provider's offers with their in-progress order counts in one query.
+    """
+    in_progress = OrderStatusCounter.objects.filter(
+        key=Concat(Value('offer:'), Cast(OuterRef('id'), CharField())), status='in_progress'
+    ).values('count')[:1]
+    return list(
+        Offer.objects.filter(user=user)
+        .order_by('-created_at')
+        .annotate(in_progress_count=Coalesce(Subquery(in_progress), 0))
+        .values('id', 'title', 'in_progress_count')
+    )
+
+def serialize_rating_summary(summary):
+    """
+    Serializes the rating counters of a provider.
+    """
+    return {
+        'average_rating': summary.average_rating(),
+        'review_count': summary.review_count,
+        'histogram': summary.histogram(),
+    }
+
+def build_dashboard_profile(user, context):
+    """
+    Builds the same profile data as /api/profile/<id>/ from the preloaded user.
+    """
+    profile_type = get_profile_type(user)
+    if profile_type == 'business':
+        profile_data = BusinessProfileSerializer(get_user_profile(user), context=context).data
+        profile_image = profile_data.get('profile_image')
+    elif profile_type == 'customer':
+        profile_data = CustomerProfileSerializer(get_user_profile(user), context=context).data
+        profile_image = profile_data.get('file')
+    else:
+        profile_type, profile_data, profile_image = 'unknown', {}, None
+    return build_profile_response(user, profile_type, profile_data, profile_image)
+
+def get_recent_reviews(user, is_provider, context):
+    """
+    Serializes the latest reviews the provider received or the customer wrote.
+    """
+    reviews = get_review_queryset().filter(**{'business_user' if is_provider else 'reviewer': user})
+    return ReviewSerializer(reviews.order_by('-updated_at')[:RECENT_ITEMS], many=True, context=context).data
+
+def build_dashboard(user_id):
+    """
+    Assembles the dashboard of a user with a fixed number of queries: the user with
+    profiles and rating summary, the order counts, the provider's offers, and the
+    recent orders and reviews with the users embedded in them.
+    """
+    user = get_dashboard_user(user_id)
+    is_provider = get_profile_type(user) == 'business'
+    order_counts = get_status_counts(provider_key(user.id) if is_provider else customer_key(user.id))
+    context, provider_data = {}, {}
+
+    if is_provider:
+        summary = getattr(user, 'rating_summary', None) or RatingSummary(business_user=user)
+        # The business profile reads its aggregates from the context instead of querying them again
+        context['average_ratings'] = {user.id: summary.average_rating()}
+        context['pending_orders'] = {user.id: order_counts['in_progress']}
+        provider_data = {'rating': serialize_rating_summary(summary), 'offers': get_offer_in_progress_counts(user)}
+
+    return {
+        'profile': build_dashboard_profile(user, context),
+        'order_counts': order_counts,
+        'completed_order_count': order_counts['completed'],
+        **provider_data,
+        'recent_orders': serialize_orders(get_orders_for_user(user).order_by('-created_at')[:RECENT_ITEMS], context),
+        'recent_reviews': get_recent_reviews(user, is_provider, context),
+    }
+# End of dashboardView_logic.py
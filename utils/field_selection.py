@@ -0,0 +1,55 @@
+# fieldSelection_logic.py
+def parse_field_list(value):
+    """
+    Splits a comma-separated query parameter into a set of names; None if it was not passed.
+    """
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class FieldSelection:
+    # The fields a client asked for with ?fields= and the nested ones it asked to expand with ?expand=.
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    def includes(self, name):
+        """
+        Returns True if the field is part of the response.
+        """
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        """
+        Returns True if a nested field is rendered as an object rather than a reference.
+        Without ?expand=, every nested field is expanded.
+        """
+        return self.includes(name) and (self.expand is None or name in self.expand)
+
+    def includes_any(self, *names):
+        """
+        Returns True if any of the fields is part of the response.
+        """
+        return any(self.includes(name) for name in names)
+
+
+# Selection used when the client does not restrict the response
+FULL_SELECTION = FieldSelection()
+
+def get_field_selection(query_params):
+    """
+    Reads ?fields= and ?expand= from the query parameters.
+    """
+    return FieldSelection(
+        fields=parse_field_list(query_params.get('fields')),
+        expand=parse_field_list(query_params.get('expand')),
+    )
+
+def get_context_selection(context):
+    """
+    Returns the field selection stored in a serializer context; everything is selected by default.
+    """
+    return context.get('field_selection', FULL_SELECTION)
+# End of fieldSelection_logic.py
@@ -1,16 +1,43 @@
 from rest_framework.response import Response
 from rest_framework import status
 from coder_app.serializers import OfferSerializer,OrderSerializer
-from django.db.models import Avg
-from coder_app.models import Offer, Review,Order,OfferDetail
+from coder_app.models import Offer, Review,Order,OfferDetail, OrderStatusCounter
 from rest_framework.exceptions import ValidationError
 from coder_app.serializers import UserProfileSerializer, BusinessProfileSerializer, CustomerProfileSerializer
 from coder_app.models import Review
+from coder_app.filters import OrderFilter
 from django.contrib.auth.models import User
+import asyncio
+import operator
+from functools import reduce
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from utils.cache import invalidate_tags
+from utils.field_selection import FULL_SELECTION
+from utils.profile_helpers import get_profile_type, get_user_profile, is_provider
+from utils.utils import serialize_orders
+from utils.order_status import (customer_key, customer_offer_key, get_order_count, offer_key, provider_key,
+                                record_orders_created, record_status_changes)
+from utils.rating_summary import get_rating_summary
 
 # view.py
 
 # reviewDetailList_logic.py
+def get_review_queryset(embedded_users=('business_user', 'reviewer')):
+    """
+    Returns reviews with the users that are serialized inline joined, together with both of their profiles.
+    """
+    related = [
+        path for name in embedded_users
+        for path in (name, f'{name}__business_profile', f'{name}__customer_profile')
+    ]
+    queryset = Review.objects.all()
+    return queryset.select_related(*related) if related else queryset
+
 def get_review_or_404(pk):
     """
     Fetches a review by ID. Raises an exception if not found.
@@ -25,14 +52,69 @@ def permission_error_response(message):
     Returns an error response for unauthorized access to review.
     """
     return Response({"error": message}, status=status.HTTP_403_FORBIDDEN)
+
+def create_review(serializer, reviewer):
+    """
+    Saves a new review; the Review signals add it to the rating summaries in the same transaction.
+    """
+    return serializer.save(reviewer=reviewer)
+
+def update_review(serializer, review):
+    """
+    Saves changes to a review; the Review signals update the rating summaries in the same transaction.
+    """
+    return serializer.save()
+
+def delete_review(review):
+    """
+    Deletes a review; the Review signals remove it from the rating summaries in the same transaction.
+    """
+    review.delete()
 # End of reviewDetailList_logic.py
 
 # userOrdersView_logic.py
-def get_user_orders(user):
+# Columns of joined rows that each order field reads, as lookups from the order
+ORDER_RELATED_COLUMNS = {
+    'offer_title': ('offer_detail_id__offer__title',),
+    'offer_provider': ('offer__user__username',),
+    'offer_price': ('offer_detail_id__variant_price',),
+    'offer_delivery_time': ('offer_detail_id__delivery_time_in_days',),
+    'offer_revision_limit': ('offer_detail_id__revision_limit',),
+    'offer_description': ('offer__description',),
+    'features': ('offer_detail_id__features',),
+    'business_user': ('offer__user',),
+}
+
+def get_order_list_queryset(selection=FULL_SELECTION):
+    """
+    Returns orders with the rows and columns that the selected OrderReadSerializer fields read joined in.
+    The embedded users are loaded once per list by OrderReadSerializer.
+    """
+    columns = [
+        column for name, lookups in ORDER_RELATED_COLUMNS.items() if selection.includes(name) for column in lookups
+    ]
+    queryset = Order.objects.all()
+    if not columns:
+        return queryset
+    related = {column.rsplit('__', 1)[0] for column in columns}
+    order_columns = [field.name for field in Order._meta.concrete_fields]
+    return queryset.select_related(*sorted(related)).only(*order_columns, *columns)
+
+def get_user_orders(user, selection=FULL_SELECTION):
     """
     Returns orders associated with a specific user.
     """
-    return Order.objects.filter(user=user)
+    return get_order_list_queryset(selection).filter(user=user)
+
+def filter_orders(orders, query_params):
+    """
+    Applies the status and creation date filters from the query parameters.
+    Raises a ValidationError for invalid filter values.
+    """
+    filterset = OrderFilter(query_params, queryset=orders)
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return filterset.qs
 # End of userOrdersView_logic.py
 
 # customerProfileView_logic.py
@@ -47,12 +129,13 @@ def get_customer_profile_or_error(user):
 # End of customerProfilView_logic.py
 
 # profileView_logic.py
-def get_profile_data(user):
-    """Retrieve profile data based on the user type."""
-    if hasattr(user, 'business_profile'):
-        return 'business', BusinessProfileSerializer(user.business_profile).data
-    elif hasattr(user, 'customer_profile'):
-        return 'customer', CustomerProfileSerializer(user.customer_profile).data
+def get_profile_data(user, context=None):
+    """Retrieve profile data based on the user type, with preloaded aggregates from the context if given."""
+    profile_type = get_profile_type(user)
+    if profile_type == 'business':
+        return 'business', BusinessProfileSerializer(get_user_profile(user), context=context or {}).data
+    elif profile_type == 'customer':
+        return 'customer', CustomerProfileSerializer(get_user_profile(user), context=context or {}).data
     return 'unknown', {}
 
 def build_profile_response(user, profile_type, profile_data, profile_image=None):
@@ -75,10 +158,11 @@ def build_profile_response(user, profile_type, profile_data, profile_image=None)
 
 def get_profile_serializer(user, request_data):
     """Returns the appropriate profile serializer for the user."""
-    if hasattr(user, 'business_profile'):
-        return BusinessProfileSerializer(user.business_profile, data=request_data, partial=True)
-    elif hasattr(user, 'customer_profile'):
-        return CustomerProfileSerializer(user.customer_profile, data=request_data, partial=True)
+    profile_type = get_profile_type(user)
+    if profile_type == 'business':
+        return BusinessProfileSerializer(get_user_profile(user), data=request_data, partial=True)
+    elif profile_type == 'customer':
+        return CustomerProfileSerializer(get_user_profile(user), data=request_data, partial=True)
     return None
 
 def save_user_profile_data(user, request_data):
@@ -104,6 +188,14 @@ def update_profile_data(user, request_data):
         save_profile_serializer(profile_serializer)
         return Response(user_serializer.data, status=status.HTTP_200_OK)
     return Response(user_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+async def aget_user_with_profiles(user_id):
+    """
+    Loads a user with the role and both profiles joined. Returns None if the user does not exist.
+    """
+    return await (
+        User.objects.select_related('role', 'business_profile', 'customer_profile').filter(id=user_id).afirst()
+    )
 # End of profileView_logic.py
 
 # businessProfileView_logic.py
@@ -118,33 +210,60 @@ def get_business_profile_or_error(user):
 # End of businessProfilView_logic.py
 
 # offerListView_logic.py
-def get_offers_for_user(user):
+def get_offer_queryset(selection=FULL_SELECTION):
+    """
+    Returns offers with everything the OfferSerializer reads for the selected fields
+    loaded up front: the user with both profiles and rating summary, the details,
+    and the owner's in-progress order count. Serializing a page then takes a fixed
+    number of queries regardless of its size. Joins and aggregates of fields that
+    are not selected or not expanded are left out.
+    """
+    related = set()
+    if selection.expands('user'):
+        related |= {'user', 'user__business_profile', 'user__customer_profile'}
+    if selection.includes('business_profile'):
+        related |= {'user', 'user__business_profile'}
+
+    queryset = Offer.objects.all()
+    if selection.expands('business_profile'):
+        related |= {'user__customer_profile', 'user__rating_summary'}
+        pending_orders = OrderStatusCounter.objects.filter(
+            key=Concat(Value('provider:'), Cast(OuterRef('user_id'), CharField())), status='in_progress'
+        ).values('count')[:1]
+        queryset = queryset.annotate(owner_pending_orders=Coalesce(Subquery(pending_orders), 0))
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    if selection.includes('details'):
+        queryset = queryset.prefetch_related('details')
+    return queryset
+
+def get_offers_for_user(user, selection=FULL_SELECTION):
     """
     Returns offers created by the authenticated user.
     If the user is not a provider, returns all offers.
     """
-    if hasattr(user, 'business_profile'):
-        return Offer.objects.filter(user=user)
-    return Offer.objects.all()
+    if is_provider(user):
+        return get_offer_queryset(selection).filter(user=user)
+    return get_offer_queryset(selection)
 # End of offerListView_logic.py
 
 # orderListView_logic.py
-def get_orders_for_user(user):
+def get_orders_for_user(user, selection=FULL_SELECTION):
     """
     Returns orders for the user.
     For providers: Orders related to their offers.
     For customers: Their own orders.
     """
-    if hasattr(user, 'business_profile'):
-        return Order.objects.filter(offer__user=user).select_related('user', 'offer', 'offer_detail_id')
-    return Order.objects.filter(user=user).select_related('offer', 'offer_detail_id')
+    if is_provider(user):
+        return get_order_list_queryset(selection).filter(offer__user=user)
+    return get_order_list_queryset(selection).filter(user=user)
 
 def user_can_create_order(user):
     """
     Checks if a user is allowed to create orders.
     Only non-business profiles are allowed to create orders.
     """
-    return not hasattr(user, 'business_profile')
+    return not is_provider(user)
 
 def prepare_order_data(request_data, user):
     """
@@ -199,14 +318,193 @@ def create_order(request_data, user):
     return serialize_and_save_order(data_or_error)
 # End of orderListView_logic.py
 
+# orderBulkCreateView_logic.py
+def parse_offer_detail_ids(request_data):
+    """
+    Reads the list of offer detail ids of a bulk order.
+    Returns a response object in case of error, otherwise the list.
+    """
+    offer_detail_ids = request_data.get('offer_detail_ids')
+    if not isinstance(offer_detail_ids, list) or not offer_detail_ids:
+        return Response({'error': 'The field "offer_detail_ids" must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = getattr(settings, 'BULK_ORDER_LIMIT', 100)
+    if len(offer_detail_ids) > limit:
+        return Response({'error': f'At most {limit} orders can be created at once.'}, status=status.HTTP_400_BAD_REQUEST)
+    return offer_detail_ids
+
+def build_bulk_order(user, offer_detail):
+    """
+    Builds an unsaved order with the values Order.save would otherwise look up.
+    """
+    return Order(
+        user=user,
+        business_user_id=offer_detail.offer.user_id,
+        offer=offer_detail.offer,
+        offer_detail_id=offer_detail,
+        status='pending',
+        option=offer_detail.offer_type or 'basic',
+        features=offer_detail.features or []
+    )
+
+def create_orders_in_bulk(user, offer_detail_ids):
+    """
+    Creates one order per offer detail id: the details and their offers are resolved
+    in one query and all orders are inserted in one transaction. Returns the
+    created orders and a result per item in request order.
+    """
+    valid_ids = {value for value in offer_detail_ids if isinstance(value, int) and not isinstance(value, bool)}
+    # The offer and its provider are read by the serialized order data
+    offer_details = OfferDetail.objects.select_related('offer__user').in_bulk(valid_ids)
+
+    orders, results = [], []
+    for offer_detail_id in offer_detail_ids:
+        offer_detail = offer_details.get(offer_detail_id) if offer_detail_id in valid_ids else None
+        if offer_detail is None:
+            results.append({'offer_detail_id': offer_detail_id, 'error': 'OfferDetail not found.'})
+            continue
+        order = build_bulk_order(user, offer_detail)
+        orders.append(order)
+        results.append({'offer_detail_id': offer_detail_id, 'order': order})
+
+    with transaction.atomic():
+        Order.objects.bulk_create(orders)
+        record_orders_created(orders, actor=user)
+        # bulk_create sends no post_save signals, so the customer's and providers' cached responses are invalidated here
+        transaction.on_commit(lambda: invalidate_tags(f'user:{user.id}', *{f'user:{order.business_user_id}' for order in orders if order.business_user_id}))
+    return orders, results
+
+def create_bulk_order(request_data, user):
+    """
+    Creates several orders for a customer in one request.
+    Returns the order data for created items and an error for the others.
+    """
+    if not user_can_create_order(user):
+        return Response(
+            {'error': 'Business profile owners cannot create orders.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    offer_detail_ids = parse_offer_detail_ids(request_data)
+    if isinstance(offer_detail_ids, Response):
+        return offer_detail_ids
+
+    orders, results = create_orders_in_bulk(user, offer_detail_ids)
+    order_data = iter(serialize_orders(orders))
+    for result in results:
+        if 'order' in result:
+            result['order'] = next(order_data)
+    response_status = status.HTTP_201_CREATED if orders else status.HTTP_400_BAD_REQUEST
+    return Response({'created': len(orders), 'results': results}, status=response_status)
+# End of orderBulkCreateView_logic.py
+
+# orderBulkStatusView_logic.py
+def parse_status_transition(request_data):
+    """
+    Reads the target status and the orders of a bulk status transition.
+    Returns a response object in case of error, otherwise the status and a list of (id, updated_at) pairs.
+    """
+    target_status = request_data.get('status')
+    if target_status not in dict(Order.STATUS_CHOICES):
+        return Response({'error': 'The field "status" must be a valid order status.'}, status=status.HTTP_400_BAD_REQUEST)
+    items = request_data.get('orders')
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'The field "orders" must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = getattr(settings, 'BULK_ORDER_LIMIT', 100)
+    if len(items) > limit:
+        return Response({'error': f'At most {limit} orders can be changed at once.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    versions = []
+    for item in items:
+        order_id = item.get('id') if isinstance(item, dict) else None
+        if not isinstance(order_id, int) or isinstance(order_id, bool):
+            return Response({'error': 'Every order needs an integer "id".'}, status=status.HTTP_400_BAD_REQUEST)
+        expected = item.get('updated_at')
+        expected = parse_datetime(expected) if isinstance(expected, str) else None
+        if item.get('updated_at') is not None and expected is None:
+            return Response({'error': f'Order {order_id} has an invalid "updated_at".'}, status=status.HTTP_400_BAD_REQUEST)
+        versions.append((order_id, expected))
+    return target_status, versions
+
+def check_status_transition(order, user, target_status, expected_updated_at):
+    """
+    Returns the reason why an order cannot move to the target status, or None if it can.
+    """
+    if order is None:
+        return 'Order not found.'
+    if order['offer__user_id'] != user.id:
+        return 'You are not authorized to edit this order.'
+    if expected_updated_at is not None and expected_updated_at != order['updated_at']:
+        return 'The order was changed by another request.'
+    if target_status not in Order.STATUS_TRANSITIONS.get(order['status'], ()):
+        return f"Orders cannot move from '{order['status']}' to '{target_status}'."
+    return None
+
+def transition_orders(user, target_status, versions):
+    """
+    Moves the provider's orders to the target status. Ownership and current status are
+    read in one query, and the orders are changed with a single UPDATE that only matches
+    rows whose updated_at is unchanged since they were read. Returns the ids of the moved
+    orders and the reasons for the others.
+    """
+    orders = {
+        order['id']: order
+        for order in Order.objects.filter(id__in={order_id for order_id, _ in versions})
+        .values('id', 'status', 'updated_at', 'user_id', 'business_user_id', 'offer_id', 'offer__user_id')
+    }
+
+    failed, eligible = {}, {}
+    for order_id, expected_updated_at in versions:
+        error = check_status_transition(orders.get(order_id), user, target_status, expected_updated_at)
+        if error:
+            failed[order_id] = error
+        else:
+            eligible[order_id] = orders[order_id]['updated_at']
+
+    updated = []
+    if eligible:
+        now = timezone.now()
+        unchanged = reduce(operator.or_, (Q(id=order_id, updated_at=updated_at) for order_id, updated_at in eligible.items()))
+        with transaction.atomic():
+            count = Order.objects.filter(unchanged).update(status=target_status, updated_at=now)
+            updated = list(eligible)
+            if count < len(eligible):
+                # Orders changed between the read and the UPDATE kept their previous status
+                moved = set(Order.objects.filter(id__in=eligible, updated_at=now).values_list('id', flat=True))
+                updated = [order_id for order_id in eligible if order_id in moved]
+                failed.update({order_id: 'The order was changed by another request.' for order_id in eligible if order_id not in moved})
+            record_status_changes([(orders[order_id], orders[order_id]['status']) for order_id in updated], target_status, actor=user)
+            # update() sends no post_save signals, so the provider's and customers' cached responses are invalidated here
+            customer_tags = {f"user:{orders[order_id]['user_id']}" for order_id in updated}
+            transaction.on_commit(lambda: invalidate_tags(f'user:{user.id}', *customer_tags))
+    return updated, failed
+
+def bulk_transition_orders(request_data, user):
+    """
+    Moves several of a provider's orders to a new status in one request.
+    Reports the orders that could not be moved.
+    """
+    parsed = parse_status_transition(request_data)
+    if isinstance(parsed, Response):
+        return parsed
+    target_status, versions = parsed
+
+    updated, failed = transition_orders(user, target_status, versions)
+    response_status = status.HTTP_200_OK if updated or not failed else status.HTTP_409_CONFLICT
+    return Response({
+        'status': target_status,
+        'updated': updated,
+        'failed': [{'id': order_id, 'error': error} for order_id, error in failed.items()],
+    }, status=response_status)
+# End of orderBulkStatusView_logic.py
+
 # offerDetailView_logic.py
-def get_offer_or_none(offer_id):
+def get_offer_or_none(offer_id, queryset=None):
     """
-    Attempts to fetch an offer by ID.
+    Attempts to fetch an offer by ID, optionally from a prepared queryset.
     Returns None if it does not exist.
     """
+    queryset = Offer.objects.all() if queryset is None else queryset
     try:
-        return Offer.objects.get(id=offer_id)
+        return queryset.get(id=offer_id)
     except Offer.DoesNotExist:
         return None
 
@@ -234,50 +532,76 @@ def update_offer(offer_id, user, request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     except Offer.DoesNotExist:
         return Response({"error": "Offer not found or you are not authorized"}, status=status.HTTP_404_NOT_FOUND)
+
+def attach_prefetched(instance, name, objects):
+    """
+    Stores separately loaded objects as the prefetched result of a related manager, the way prefetch_related does.
+    """
+    queryset = getattr(instance, name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    instance._prefetched_objects_cache = {**getattr(instance, '_prefetched_objects_cache', {}), name: queryset}
+
+async def aget_offer_or_none(offer_id, selection=FULL_SELECTION):
+    """
+    Async version of get_offer_or_none for get_offer_queryset. Instead of prefetching
+    the details after the offer, the offer and its details are read concurrently.
+    """
+    offers = get_offer_queryset(selection).prefetch_related(None).filter(id=offer_id)
+    if not selection.includes('details'):
+        return await offers.afirst()
+
+    async def load_details():
+        return [detail async for detail in OfferDetail.objects.filter(offer_id=offer_id)]
+
+    offer, details = await asyncio.gather(offers.afirst(), load_details())
+    if offer is not None:
+        attach_prefetched(offer, 'details', details)
+    return offer
 # End of offerDetailView_logic.py
 
 # baseInfoView_logic.py
 def calculate_average_rating(business_user=None):
     """
-    Calculates the average rating. Optionally, can specify a business user.
+    Returns the average rating from the rating summaries. Optionally, can specify a business user.
     """
-    queryset = Review.objects.all()
-    if business_user:
-        queryset = queryset.filter(business_user=business_user)
-    return queryset.aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0.0
+    business_user_id = business_user.id if business_user else None
+    return get_rating_summary(business_user_id).average_rating() or 0.0
 # End of baseInfoView_logic.py
 
 # orderInProgressCountView.py 
 def get_in_progress_count(user, offer):
     """
-    Counts the number of in-progress orders for an offer based on user type.
+    Returns the number of in-progress orders for an offer based on user type, read from the order counters.
     """
-    if hasattr(user, 'customer_profile'):
-        return Order.objects.filter(user=user, offer=offer, status='in_progress').count()
-    elif hasattr(user, 'business_profile'):
-        if offer.user != user:
+    profile_type = get_profile_type(user)
+    if profile_type == 'customer':
+        return get_order_count(customer_offer_key(user.id, offer.id), 'in_progress')
+    elif profile_type == 'business':
+        if offer.user_id != user.id:
             raise ValidationError("You are not authorized to view data for this offer.")
-        return Order.objects.filter(offer=offer, status='in_progress').count()
+        return get_order_count(offer_key(offer.id), 'in_progress')
     else:
         raise ValidationError("User is neither a provider nor a customer.")
 # End of orderInProgressCountView_logic.py
 
 # orderCompletedCountView_logic.py
 def get_user_or_error(user_id):
-    """Fetches a user by ID or returns an error."""
-    user = User.objects.filter(id=user_id).first()
+    """Fetches a user by ID, with the role joined, or returns an error."""
+    user = User.objects.select_related('role').filter(id=user_id).first()
     if not user:
         raise ValidationError({'error': 'User not found.'})
     return user
 
 def count_completed_orders_for_user(user):
     """
-    Counts completed orders for a user based on their profile type.
+    Returns the number of completed orders for a user based on their profile type, read from the order counters.
     """
-    if hasattr(user, 'business_profile'):
-        return Order.objects.filter(business_user_id=user, status='completed').count()
-    elif hasattr(user, 'customer_profile'):
-        return Order.objects.filter(user=user, status='completed').count()
+    profile_type = get_profile_type(user)
+    if profile_type == 'business':
+        return get_order_count(provider_key(user.id), 'completed')
+    elif profile_type == 'customer':
+        return get_order_count(customer_key(user.id), 'completed')
     else:
         raise ValidationError({'error': 'User is neither a provider nor a customer.'})
 # End of orderCompletedCountView_logic.py
@@ -0,0 +1,270 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+logger = logging.getLogger('coder_app.instrumentation')
+
+METRIC_PREFIX = 'coderr'
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+VALUE_LIST = re.compile(r'\(\s*(?:%s|\?|\d+)(?:\s*,\s*(?:%s|\?|\d+))*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+# Recorder of the request running in the current context. Concurrent ASGI requests share the sync
+# thread and its connections, but each runs in its own context, so queries are attributed correctly.
+active_query_recorder = ContextVar('active_query_recorder', default=None)
+
+# queryRecording_logic.py
+def normalize_sql(sql):
+    """
+    Replaces literals and placeholder lists so that queries differing only in their values compare equal.
+    """
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = VALUE_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    # Database execute wrapper that counts and times the queries of one request.
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[normalize_sql(sql)] += 1
+
+    def duplicates(self, threshold):
+        """
+        Returns (normalized sql, count) for every statement executed at least `threshold` times.
+        """
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed once per connection that hands queries to the active recorder, if any.
+    """
+    recorder = active_query_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    """
+    Adds the recording wrapper to a database connection unless it is already installed.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def recording_queries(recorder):
+    """
+    Makes `recorder` the active recorder of the current context, and of the sync threads it calls into.
+    """
+    token = active_query_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        active_query_recorder.reset(token)
+
+@contextmanager
+def timing_serialization(request):
+    """
+    Adds the time spent in the block to the serialization time of the request.
+    Accepts DRF requests as well as the Django requests they wrap.
+    """
+    request = getattr(request, '_request', request)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        request._serialization_time = (getattr(request, '_serialization_time', None) or 0.0) + elapsed
+# End of queryRecording_logic.py
+
+# requestMetrics_logic.py
+class Histogram:
+    # Prometheus-style histogram with cumulative buckets per label set.
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.setdefault(labels, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series['buckets'][index] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['buckets']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{format_labels(labels, le=format_value(bound))} {cumulative}')
+            lines.append(f'{self.name}_bucket{format_labels(labels, le="+Inf")} {series["count"]}')
+            lines.append(f'{self.name}_sum{format_labels(labels)} {format_value(series["sum"])}')
+            lines.append(f'{self.name}_count{format_labels(labels)} {series["count"]}')
+        return lines
+
+
+class CounterMetric:
+    # Prometheus-style counter per label set.
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.series = Counter()
+
+    def inc(self, labels, amount=1):
+        self.series[labels] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        lines += [f'{self.name}{format_labels(labels)} {value}' for labels, value in sorted(self.series.items())]
+        return lines
+
+
+class MetricsRegistry:
+    # Holds the request metrics of this process. Every worker process keeps its own registry.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = CounterMetric(f'{METRIC_PREFIX}_requests_total', 'Handled requests.')
+            self.duplicate_queries = CounterMetric(
+                f'{METRIC_PREFIX}_duplicate_query_requests_total',
+                'Requests that repeated the same normalized SQL statement (N+1 pattern).',
+            )
+            self.over_budget = CounterMetric(
+                f'{METRIC_PREFIX}_over_budget_requests_total', 'Requests that exceeded the time or query budget.'
+            )
+            self.histograms = {
+                'duration': Histogram(
+                    f'{METRIC_PREFIX}_request_duration_seconds', 'Time spent handling the request.', DURATION_BUCKETS
+                ),
+                'sql_duration': Histogram(
+                    f'{METRIC_PREFIX}_request_sql_duration_seconds', 'Time spent executing SQL.', DURATION_BUCKETS
+                ),
+                'queries': Histogram(
+                    f'{METRIC_PREFIX}_request_queries', 'SQL queries executed per request.', QUERY_BUCKETS
+                ),
+                'serialization': Histogram(
+                    f'{METRIC_PREFIX}_response_serialization_seconds',
+                    'Time spent turning model instances into response data (serializer.data).', DURATION_BUCKETS,
+                ),
+                'render': Histogram(
+                    f'{METRIC_PREFIX}_response_render_seconds', 'Time spent rendering the response body.',
+                    DURATION_BUCKETS,
+                ),
+                'size': Histogram(
+                    f'{METRIC_PREFIX}_response_size_bytes', 'Size of the response body.', SIZE_BUCKETS
+                ),
+            }
+
+    def record(self, sample):
+        view = (('view', sample['view']),)
+        with self.lock:
+            self.requests.inc(view + (('method', sample['method']), ('status', str(sample['status']))))
+            self.histograms['duration'].observe(view, sample['duration'])
+            self.histograms['sql_duration'].observe(view, sample['sql_duration'])
+            self.histograms['queries'].observe(view, sample['queries'])
+            if sample['serialization'] is not None:
+                self.histograms['serialization'].observe(view, sample['serialization'])
+            if sample['render'] is not None:
+                self.histograms['render'].observe(view, sample['render'])
+            if sample['size'] is not None:
+                self.histograms['size'].observe(view, sample['size'])
+            if sample['duplicates']:
+                self.duplicate_queries.inc(view)
+            if sample['over_budget']:
+                self.over_budget.inc(view)
+
+    def render(self):
+        with self.lock:
+            lines = self.requests.render() + self.duplicate_queries.render() + self.over_budget.render()
+            for histogram in self.histograms.values():
+                lines += histogram.render()
+        return '\n'.join(lines) + '\n'
+
+
+metrics_registry = MetricsRegistry()
+
+def format_value(value):
+    """
+    Formats a number the way Prometheus expects it.
+    """
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def format_labels(labels, **extra):
+    """
+    Formats label pairs as {name="value",...} with quotes and backslashes escaped.
+    """
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+# End of requestMetrics_logic.py
+
+# requestBudget_logic.py
+def get_instrumentation_setting(name, default):
+    """
+    Returns an instrumentation setting with its default.
+    """
+    return getattr(settings, name, default)
+
+def is_over_budget(sample):
+    """
+    Returns True if a request took longer or ran more queries than the configured budget.
+    """
+    return (
+        sample['duration'] * 1000 > get_instrumentation_setting('REQUEST_TIME_BUDGET_MS', 500)
+        or sample['queries'] > get_instrumentation_setting('REQUEST_QUERY_BUDGET', 50)
+    )
+
+def log_request(sample):
+    """
+    Logs requests that exceeded the budget or repeated the same query.
+    """
+    summary = (
+        f"{sample['method']} {sample['path']} ({sample['view']}): {sample['duration'] * 1000:.1f} ms, "
+        f"{sample['queries']} queries in {sample['sql_duration'] * 1000:.1f} ms"
+    )
+    if sample['over_budget']:
+        logger.warning("Request over budget: %s", summary)
+    for sql, count in sample['duplicates']:
+        logger.warning("Possible N+1 in %s: %d x %s", sample['view'], count, sql)
+# End of requestBudget_logic.py
@@ -0,0 +1,102 @@
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import _clean_credentials, load_backend
+from django.contrib.auth.hashers import make_password, verify_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+from django.contrib.auth.models import User
+from rest_framework.exceptions import Throttled
+
+
+class PasswordHashingPool:
+    # A fixed number of threads for password hashing. At most `queue_size` jobs may wait for a
+    # thread; further jobs are throttled, so a burst of logins cannot pile up unbounded CPU work.
+    # PBKDF2 and scrypt release the GIL, so the threads hash in parallel.
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hashing')
+            return self.executor
+
+    def submit(self, function, *args):
+        """
+        Schedules a hashing job and returns its future. Raises Throttled if the queue is full.
+        """
+        if not self.slots.acquire(blocking=False):
+            raise Throttled(wait=1, detail="Too many logins in progress, please retry shortly.")
+        try:
+            future = self.get_executor().submit(function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def run(self, function, *args):
+        return self.submit(function, *args).result()
+
+    async def arun(self, function, *args):
+        return await asyncio.wrap_future(self.submit(function, *args))
+
+
+password_pool = PasswordHashingPool(
+    getattr(settings, 'PASSWORD_HASHING_WORKERS', 1),
+    getattr(settings, 'PASSWORD_HASHING_QUEUE', 32),
+)
+
+# login_logic.py
+def hash_password(password):
+    """
+    Hashes a password with the preferred hasher in the hashing pool.
+    """
+    return password_pool.run(make_password, password)
+
+def check_user_password(encoded, password):
+    """
+    Verifies a password against a stored hash. Returns whether it matches and, if the hash
+    uses an outdated hasher or cost, the new hash to store. Without a hash, the preferred
+    hasher still runs once, so unknown usernames take as long as wrong passwords.
+    """
+    is_correct, must_update = verify_password(password, encoded)
+    return is_correct, make_password(password) if is_correct and must_update else None
+
+def get_login_queryset(username):
+    """
+    Returns the user with a username, with the role joined for the profile type of the response.
+    """
+    return User.objects.select_related('role').filter(username=username)
+
+async def aauthenticate(request=None, **credentials):
+    """
+    Async version of django.contrib.auth.authenticate(). Backends with an aauthenticate method
+    are awaited, so the event loop stays free while the password is verified; the others run
+    in the sync thread. Failed logins send user_login_failed like authenticate() does.
+    """
+    for backend_path in settings.AUTHENTICATION_BACKENDS:
+        backend = load_backend(backend_path)
+        try:
+            inspect.signature(backend.authenticate).bind(request, **credentials)
+        except TypeError:
+            continue
+        backend_authenticate = getattr(backend, 'aauthenticate', None) or sync_to_async(backend.authenticate)
+        try:
+            user = await backend_authenticate(request, **credentials)
+        except PermissionDenied:
+            break
+        if user is None:
+            continue
+        user.backend = backend_path
+        return user
+    await user_login_failed.asend(sender=__name__, credentials=_clean_credentials(credentials), request=request)
+# End of login_logic.py
@@ -0,0 +1,39 @@
+from django.db.models import F, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from coder_app.models import Offer, OfferDetail
+
+# offerMinimums_logic.py
+def _variant_minimum(field):
+    """
+    Builds a subquery for the smallest value of a variant field of the outer offer.
+    """
+    return Subquery(
+        OfferDetail.objects.filter(offer_id=OuterRef('pk'))
+        .order_by()
+        .values('offer_id')
+        .annotate(minimum=Min(field))
+        .values('minimum')
+    )
+
+def get_minimum_updates():
+    """
+    Returns the expressions for the materialized minimums. Offers without variants
+    fall back to their own price and delivery time.
+    """
+    return {
+        'min_price': Coalesce(_variant_minimum('variant_price'), F('price')),
+        'min_delivery_time': Coalesce(_variant_minimum('delivery_time_in_days'), F('delivery_time_in_days')),
+    }
+
+def refresh_offer_minimums(offer_id):
+    """
+    Recalculates the minimum price and delivery time of a single offer in one UPDATE.
+    """
+    return Offer.objects.filter(pk=offer_id).update(**get_minimum_updates())
+
+def rebuild_offer_minimums():
+    """
+    Recalculates the minimums of all offers and returns the number of updated offers.
+    """
+    return Offer.objects.update(**get_minimum_updates())
+# End of offerMinimums_logic.py
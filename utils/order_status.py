@@ -0,0 +1,192 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db.models import Count, F
+from coder_app.models import Order, OrderEvent, OrderStatusCounter
+
+# Set while bulk deletes are followed by a rebuild, so deleted orders are not counted down one by one
+_counters_paused = ContextVar('order_counters_paused', default=False)
+
+# orderStatus_logic.py
+def can_transition(previous_status, target_status):
+    """
+    Returns True if an order may move from its previous status to the target status.
+    Keeping the current status is always allowed.
+    """
+    return previous_status == target_status or target_status in Order.STATUS_TRANSITIONS.get(previous_status, ())
+
+def provider_key(user_id):
+    """
+    Returns the counter key of a provider.
+    """
+    return f'provider:{user_id}'
+
+def customer_key(user_id):
+    """
+    Returns the counter key of a customer.
+    """
+    return f'customer:{user_id}'
+
+def offer_key(offer_id):
+    """
+    Returns the counter key of an offer.
+    """
+    return f'offer:{offer_id}'
+
+def customer_offer_key(user_id, offer_id):
+    """
+    Returns the counter key of a customer's orders of an offer.
+    """
+    return f'customer:{user_id}:offer:{offer_id}'
+
+def counter_keys(user_id, business_user_id, offer_id):
+    """
+    Returns the counter keys an order with the given ids is counted under.
+    """
+    keys = [customer_key(user_id), offer_key(offer_id), customer_offer_key(user_id, offer_id)]
+    if business_user_id:
+        keys.append(provider_key(business_user_id))
+    return keys
+
+def _order_keys(order):
+    """
+    Returns the counter keys of an order instance or of an order row read with values().
+    """
+    if isinstance(order, dict):
+        return counter_keys(order['user_id'], order['business_user_id'], order['offer_id'])
+    return counter_keys(order.user_id, order.business_user_id, order.offer_id)
+
+def apply_counter_deltas(deltas):
+    """
+    Adds the deltas per (key, status) to the counters, creating counters on first use.
+    Takes one INSERT plus one UPDATE per distinct (status, delta) pair, however many keys change.
+    Must run inside the transaction that changes the orders.
+    """
+    deltas = {pair: delta for pair, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    OrderStatusCounter.objects.bulk_create(
+        [OrderStatusCounter(key=key, status=status) for key, status in deltas], ignore_conflicts=True
+    )
+    keys_by_change = defaultdict(list)
+    for (key, status), delta in deltas.items():
+        keys_by_change[status, delta].append(key)
+    for (status, delta), keys in keys_by_change.items():
+        OrderStatusCounter.objects.filter(status=status, key__in=keys).update(count=F('count') + delta)
+
+def record_orders_created(orders, actor=None):
+    """
+    Logs the creation of the orders and counts them under their status.
+    """
+    OrderEvent.objects.bulk_create([
+        OrderEvent(order_id=order.id, to_status=order.status, actor=actor) for order in orders
+    ])
+    deltas = Counter()
+    for order in orders:
+        order.saved_status = order.status
+        for key in _order_keys(order):
+            deltas[key, order.status] += 1
+    apply_counter_deltas(deltas)
+
+def record_status_changes(changes, target_status, actor=None):
+    """
+    Logs the moves of (order, previous status) pairs to the target status and moves
+    them between the counters. Orders may be instances or rows read with values().
+    """
+    changes = [(order, previous) for order, previous in changes if previous != target_status]
+    OrderEvent.objects.bulk_create([
+        OrderEvent(
+            order_id=order['id'] if isinstance(order, dict) else order.id,
+            from_status=previous, to_status=target_status, actor=actor
+        )
+        for order, previous in changes
+    ])
+    deltas = Counter()
+    for order, previous in changes:
+        for key in _order_keys(order):
+            deltas[key, previous] -= 1
+            deltas[key, target_status] += 1
+    apply_counter_deltas(deltas)
+
+def record_order_saved(order, created):
+    """
+    Logs a single order's creation or status change. Runs from post_save, inside the
+    transaction Order.save opens, and remembers the saved status for the next save.
+    """
+    previous_status = getattr(order, 'saved_status', None)
+    if created:
+        record_orders_created([order], actor=order.event_actor or order.user)
+    elif previous_status is not None and previous_status != order.status:
+        record_status_changes([(order, previous_status)], order.status, actor=order.event_actor)
+    order.saved_status = order.status
+
+def record_order_deleted(order):
+    """
+    Removes a deleted order from its counters.
+    """
+    if _counters_paused.get():
+        return
+    apply_counter_deltas(Counter({(key, order.status): -1 for key in _order_keys(order)}))
+
+@contextmanager
+def order_counters_paused():
+    """
+    Skips counting down deleted orders; the caller rebuilds the counters afterwards.
+    """
+    token = _counters_paused.set(True)
+    try:
+        yield
+    finally:
+        _counters_paused.reset(token)
+
+def get_order_count(key, status):
+    """
+    Returns the number of orders with the status under a counter key with a single indexed lookup.
+    """
+    return OrderStatusCounter.objects.filter(key=key, status=status).values_list('count', flat=True).first() or 0
+
+async def aget_order_count(key, status):
+    """
+    Async version of get_order_count.
+    """
+    return await OrderStatusCounter.objects.filter(key=key, status=status).values_list('count', flat=True).afirst() or 0
+
+def get_order_counts(keys, status):
+    """
+    Returns the number of orders with the status per counter key in one query.
+    """
+    counts = dict.fromkeys(keys, 0)
+    counters = OrderStatusCounter.objects.filter(key__in=counts, status=status).values_list('key', 'count')
+    counts.update(counters)
+    return counts
+
+def expected_order_counters():
+    """
+    Computes the counters per (key, status) directly from the orders.
+    """
+    counters = Counter()
+    groupings = {
+        ('user_id',): lambda row: customer_key(row['user_id']),
+        ('offer_id',): lambda row: offer_key(row['offer_id']),
+        ('user_id', 'offer_id'): lambda row: customer_offer_key(row['user_id'], row['offer_id']),
+        ('business_user_id',): lambda row: provider_key(row['business_user_id']) if row['business_user_id'] else None,
+    }
+    for fields, build_key in groupings.items():
+        for row in Order.objects.order_by().values(*fields, 'status').annotate(count=Count('id')):
+            key = build_key(row)
+            if key:
+                counters[key, row['status']] += row['count']
+    return counters
+
+def rebuild_order_counters():
+    """
+    Rebuilds all order counters from the orders and returns the number of counters.
+    """
+    counters = expected_order_counters()
+    OrderStatusCounter.objects.all().delete()
+    OrderStatusCounter.objects.bulk_create(
+        [OrderStatusCounter(key=key, status=status, count=count) for (key, status), count in counters.items()],
+        batch_size=2000
+    )
+    return len(counters)
+# End of orderStatus_logic.py
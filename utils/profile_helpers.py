@@ -1,10 +1,77 @@
-from coder_app.models import CustomerProfile, BusinessProfile
+from coder_app.models import CustomerProfile, BusinessProfile, UserRole
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.utils.timezone import now
+from utils.login import hash_password
 
 # serializers
 
+# userType_logic.py
+PROFILE_TYPES = ('business', 'customer')
+
+def _get_loaded_profile_type(user):
+    """
+    Returns the profile type if the profiles or the role were already loaded with the user,
+    e.g. by select_related. Returns False if it cannot be told without a query.
+    """
+    relations = [User._meta.get_field(f'{profile_type}_profile') for profile_type in PROFILE_TYPES]
+    for profile_type, relation in zip(PROFILE_TYPES, relations):
+        if relation.get_cached_value(user, None) is not None:
+            return profile_type
+    if all(relation.is_cached(user) for relation in relations):
+        return None
+    role_relation = User._meta.get_field('role')
+    if role_relation.is_cached(user):
+        role = role_relation.get_cached_value(user)
+        return role.profile_type if role else None
+    return False
+
+def get_profile_type(user):
+    """
+    Returns 'business', 'customer' or None. The type is read from the cached token principal,
+    from relations loaded with the user, or from the user's role in one query, and is kept
+    on the instance afterwards.
+    """
+    principal = getattr(user, 'principal', None)
+    if principal is not None:
+        return principal.profile_type
+    if not user.is_authenticated:
+        return None
+    if not hasattr(user, '_profile_type'):
+        profile_type = _get_loaded_profile_type(user)
+        if profile_type is False:
+            role = getattr(user, 'role', None)
+            profile_type = role.profile_type if role else None
+        user._profile_type = profile_type
+    return user._profile_type
+
+def get_user_profile(user):
+    """
+    Returns the business or customer profile of a user, or None. Only the table of the
+    user's profile type is queried, and the profile is cached on the user instance.
+    """
+    profile_type = get_profile_type(user)
+    return getattr(user, f'{profile_type}_profile', None) if profile_type else None
+
+def is_provider(user):
+    """
+    Returns True if the user has a business profile.
+    """
+    return get_profile_type(user) == 'business'
+
+def is_customer(user):
+    """
+    Returns True if the user has a customer profile.
+    """
+    return get_profile_type(user) == 'customer'
+
+def clear_user_role(user_id, profile_type):
+    """
+    Removes the stored profile type of a user after the profile was deleted.
+    """
+    UserRole.objects.filter(user_id=user_id, profile_type=profile_type).delete()
+# End of userType_logic.py
+
 # userProfileSerializers_logic.py
 def get_user_type(obj):
     """
@@ -12,33 +79,27 @@ def get_user_type(obj):
     """
     if obj.is_superuser:
         return "superuser"
-    if hasattr(obj, 'business_profile'):
-        return "business"
-    elif hasattr(obj, 'customer_profile'):
-        return "customer"
-    return "unknown"
+    return get_profile_type(obj) or "unknown"
 
 def get_user_profile_image(obj):
     """
     Returns the URL of the profile image based on the user's profile type.
     """
-    if hasattr(obj, 'business_profile') and obj.business_profile.profile_image:
-        return obj.business_profile.profile_image.url  
-    if hasattr(obj, 'customer_profile') and obj.customer_profile.file:
-        return obj.customer_profile.file.url 
-    return None
+    profile = get_user_profile(obj)
+    image = getattr(profile, 'profile_image' if is_provider(obj) else 'file', None)
+    return image.url if image else None
 # End of userProfileSerializers_logic.py
 
 # registrationSerializers_logic.py
 def create_new_user(validated_data):
     """
-    Creates a new user and sets their password.
+    Creates a new user and sets their password, hashed in the hashing pool.
     """
     user = User(
         username=validated_data['username'],
         email=validated_data['email']
     )
-    user.set_password(validated_data['password'])
+    user.password = hash_password(validated_data['password'])
     user.save()
     return user
 
@@ -0,0 +1,176 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils.timezone import now
+from coder_app.models import GlobalRatingSummary, RatingSummary, Review
+
+_summaries_paused = ContextVar('rating_summaries_paused', default=False)
+
+# reviewSignals_logic.py
+def _rating_deltas(rating, delta):
+    """
+    Builds the F() expressions that add or remove a single rating from a summary.
+    """
+    updates = {
+        'review_count': F('review_count') + delta,
+        'rating_sum': F('rating_sum') + delta * rating,
+        # update() skips auto_now; the ETags of responses showing the average depend on it
+        'updated_at': now(),
+    }
+    star_field = RatingSummary.STAR_FIELDS.get(rating)
+    if star_field:
+        updates[star_field] = F(star_field) + delta
+    return updates
+
+def _apply_to_summary(queryset, create_kwargs, rating, delta):
+    """
+    Applies a rating change to a summary row, creating the row when the first rating is added.
+    A missing row is not recreated for a removed rating: it was deleted together with its
+    business user, whose reviews are being cascade-deleted.
+    """
+    updates = _rating_deltas(rating, delta)
+    if not queryset.filter(**create_kwargs).update(**updates) and delta > 0:
+        queryset.get_or_create(**create_kwargs)
+        queryset.filter(**create_kwargs).update(**updates)
+
+def apply_rating_change(business_user_id, rating, delta):
+    """
+    Adds (delta=1) or removes (delta=-1) a rating from the business user and global summaries.
+    Runs from the Review signals, inside the transaction that writes the review.
+    """
+    _apply_to_summary(RatingSummary.objects, {'business_user_id': business_user_id}, rating, delta)
+    _apply_to_summary(GlobalRatingSummary.objects, {'pk': GlobalRatingSummary.SINGLETON_ID}, rating, delta)
+
+def record_review_saved(review, created):
+    """
+    Adds a new review to the summaries, or moves a changed one from its loaded values to its
+    current values. Runs from post_save, inside the transaction Review.save opens, and
+    remembers the saved values for the next save.
+    """
+    previous = getattr(review, 'saved_rating_key', None)
+    current = (review.business_user_id, review.rating)
+    if created:
+        apply_rating_change(*current, 1)
+    elif previous is not None and previous != current:
+        apply_rating_change(*previous, -1)
+        apply_rating_change(*current, 1)
+    review.saved_rating_key = current
+
+def record_review_deleted(review):
+    """
+    Removes a deleted review, including those of deleted offers and users, from the summaries.
+    """
+    if _summaries_paused.get():
+        return
+    apply_rating_change(review.business_user_id, review.rating, -1)
+
+@contextmanager
+def rating_summaries_paused():
+    """
+    Skips removing deleted reviews from the summaries; the caller rebuilds the summaries afterwards.
+    """
+    token = _summaries_paused.set(True)
+    try:
+        yield
+    finally:
+        _summaries_paused.reset(token)
+# End of reviewSignals_logic.py
+
+# ratingSummary_logic.py
+def get_rating_summary(business_user_id=None):
+    """
+    Returns the summary of a business user, or the global summary if no user is given.
+    Returns an empty unsaved summary if no reviews have been recorded yet.
+    """
+    if business_user_id is None:
+        summary = GlobalRatingSummary.objects.filter(pk=GlobalRatingSummary.SINGLETON_ID).first()
+        return summary or GlobalRatingSummary(pk=GlobalRatingSummary.SINGLETON_ID)
+    summary = RatingSummary.objects.filter(business_user_id=business_user_id).first()
+    return summary or RatingSummary(business_user_id=business_user_id)
+
+async def aget_rating_summary(business_user_id=None):
+    """
+    Async version of get_rating_summary.
+    """
+    if business_user_id is None:
+        summary = await GlobalRatingSummary.objects.filter(pk=GlobalRatingSummary.SINGLETON_ID).afirst()
+        return summary or GlobalRatingSummary(pk=GlobalRatingSummary.SINGLETON_ID)
+    summary = await RatingSummary.objects.filter(business_user_id=business_user_id).afirst()
+    return summary or RatingSummary(business_user_id=business_user_id)
+
+def _star_counts():
+    """
+    Returns the aggregate expressions that count reviews per star.
+    """
+    return {
+        field: Count('id', filter=Q(rating=star))
+        for star, field in RatingSummary.STAR_FIELDS.items()
+    }
+
+def _summary_counters(summary):
+    """
+    Returns the counters of a summary as a dictionary.
+    """
+    counters = {'review_count': summary.review_count, 'rating_sum': summary.rating_sum}
+    counters.update({field: getattr(summary, field) for field in RatingSummary.STAR_FIELDS.values()})
+    return counters
+
+def _normalize_counters(counters):
+    """
+    Replaces missing aggregate values with zero.
+    """
+    return {key: value or 0 for key, value in counters.items()}
+
+def expected_rating_summaries():
+    """
+    Computes the per business user and global counters directly from the reviews.
+    """
+    star_counts = _star_counts()
+    per_user = {
+        row.pop('business_user_id'): _normalize_counters(row)
+        for row in Review.objects.order_by().values('business_user_id').annotate(
+            review_count=Count('id'), rating_sum=Sum('rating'), **star_counts
+        )
+    }
+    global_counters = _normalize_counters(Review.objects.aggregate(
+        review_count=Count('id'), rating_sum=Sum('rating'), **star_counts
+    ))
+    return per_user, global_counters
+
+def find_rating_summary_drift():
+    """
+    Compares the stored summaries with the reviews.
+    Returns a list of (scope, stored, expected) tuples for every mismatch.
+    """
+    per_user, global_counters = expected_rating_summaries()
+    empty = _summary_counters(RatingSummary())
+    drift = []
+
+    stored = {summary.business_user_id: summary for summary in RatingSummary.objects.all()}
+    for user_id in set(per_user) | set(stored):
+        actual = _summary_counters(stored[user_id]) if user_id in stored else empty
+        expected = per_user.get(user_id, empty)
+        if actual != expected:
+            drift.append((f'user {user_id}', actual, expected))
+
+    actual_global = _summary_counters(get_rating_summary())
+    if actual_global != global_counters:
+        drift.append(('global', actual_global, global_counters))
+    return drift
+
+@transaction.atomic
+def rebuild_rating_summaries():
+    """
+    Rebuilds all rating summaries from the reviews.
+    """
+    per_user, global_counters = expected_rating_summaries()
+    RatingSummary.objects.all().delete()
+    RatingSummary.objects.bulk_create([
+        RatingSummary(business_user_id=user_id, **counters) for user_id, counters in per_user.items()
+    ])
+    GlobalRatingSummary.objects.update_or_create(
+        pk=GlobalRatingSummary.SINGLETON_ID, defaults=global_counters
+    )
+    return len(per_user)
+# End of ratingSummary_logic.py
@@ -0,0 +1,221 @@
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from coder_app.models import Offer
+
+SEARCH_TABLE = 'coder_app_offer_search'
+OFFER_ID = f'"{Offer._meta.db_table}"."id"'
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+# Ids of the offers to index when the innermost indexing_offers_once() block exits
+pending_offer_ids = ContextVar('pending_offer_ids', default=None)
+
+# offerSearch_logic.py
+def tokenize(value):
+    """
+    Splits a search string into lowercase word tokens, dropping any query syntax.
+    """
+    return [token.lower() for token in TOKEN_PATTERN.findall(value or '')]
+
+def build_offer_document(offer):
+    """
+    Collects the searchable text of an offer and its variants.
+    """
+    details = list(offer.details.all())
+    return {
+        'title': offer.title or '',
+        'description': offer.description or '',
+        'details': ' '.join(
+            part for detail in details
+            for part in (detail.variant_title, detail.additional_details) if part
+        ),
+        'features': ' '.join(
+            str(feature) for detail in details for feature in (detail.features or [])
+        ),
+    }
+
+
+class SQLiteSearchBackend:
+    # Uses an FTS5 virtual table whose rowid is the offer id.
+    vendor = 'sqlite'
+
+    def build_query(self, tokens):
+        # Every token must match; each one is a prefix so partial words match while typing.
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def filter(self, queryset, query):
+        # The MATCH runs once, in an uncorrelated subquery that yields the matching offer ids.
+        matches = RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", (query,))
+        # bm25 weights: title, description, details, features. Lower ranks are better. The rank is an
+        # alias, so it is only computed when ordered by, and reads each offer's row of the match by rowid.
+        rank = RawSQL(
+            f"SELECT bm25({SEARCH_TABLE}, 10.0, 1.0, 2.0, 3.0) FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = {OFFER_ID}",
+            (query,),
+        )
+        return queryset.filter(id__in=matches).alias(search_rank=rank)
+
+    def index(self, cursor, offer_id, document):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [offer_id])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, description, details, features) VALUES (%s, %s, %s, %s, %s)",
+            [offer_id, document['title'], document['description'], document['details'], document['features']],
+        )
+
+    def remove(self, cursor, offer_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [offer_id])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+
+class PostgresSearchBackend:
+    # Uses a weighted tsvector column with a GIN index.
+    vendor = 'postgresql'
+    document_sql = (
+        "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'C') || "
+        "setweight(to_tsvector('simple', %s), 'B') || setweight(to_tsvector('simple', %s), 'B')"
+    )
+
+    def build_query(self, tokens):
+        # Every token must match; each one is a prefix so partial words match while typing.
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def filter(self, queryset, query):
+        # The GIN index serves the match, which runs once in an uncorrelated subquery.
+        matches = RawSQL(
+            f"SELECT offer_id FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)", (query,)
+        )
+        # Negated so that, as with SQLite, lower ranks are better. The rank is an alias, so it is only
+        # computed when ordered by, and reads each offer's document by its primary key.
+        rank = RawSQL(
+            f"SELECT -ts_rank(document, to_tsquery('simple', %s)) FROM {SEARCH_TABLE} WHERE offer_id = {OFFER_ID}",
+            (query,),
+        )
+        return queryset.filter(id__in=matches).alias(search_rank=rank)
+
+    def index(self, cursor, offer_id, document):
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (offer_id, document) VALUES (%s, {self.document_sql}) "
+            "ON CONFLICT (offer_id) DO UPDATE SET document = EXCLUDED.document",
+            [offer_id, document['title'], document['description'], document['details'], document['features']],
+        )
+
+    def remove(self, cursor, offer_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE offer_id = %s", [offer_id])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+
+class FallbackSearchBackend:
+    # Used on databases without a full-text index; scans with icontains.
+    vendor = None
+
+    def build_query(self, tokens):
+        return tokens
+
+    def filter(self, queryset, tokens):
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(title__icontains=token) | Q(description__icontains=token)
+                | Q(details__features__icontains=token)
+            )
+        return queryset.distinct()
+
+    def index(self, cursor, offer_id, document):
+        pass
+
+    def remove(self, cursor, offer_id):
+        pass
+
+    def clear(self, cursor):
+        pass
+
+
+SEARCH_BACKENDS = {
+    SQLiteSearchBackend.vendor: SQLiteSearchBackend,
+    PostgresSearchBackend.vendor: PostgresSearchBackend,
+}
+
+def get_search_backend(db_connection=None):
+    """
+    Returns the search backend matching the database vendor.
+    """
+    vendor = (db_connection or connection).vendor
+    return SEARCH_BACKENDS.get(vendor, FallbackSearchBackend)()
+
+def search_offers(queryset, value):
+    """
+    Filters offers by a search string using the full-text index.
+    Matching offers get a `search_rank` alias to order by, where lower is better.
+    """
+    tokens = tokenize(value)
+    if not tokens:
+        return queryset
+    backend = get_search_backend()
+    return backend.filter(queryset, backend.build_query(tokens))
+
+def index_offer(offer_id):
+    """
+    Writes the current state of an offer to the search index, or removes it if it no longer exists.
+    """
+    backend = get_search_backend()
+    offer = Offer.objects.filter(id=offer_id).prefetch_related('details').first()
+    with connection.cursor() as cursor:
+        if offer is None:
+            backend.remove(cursor, offer_id)
+        else:
+            backend.index(cursor, offer.id, build_offer_document(offer))
+
+def schedule_offer_indexing(offer_id):
+    """
+    Re-indexes an offer, or only marks it inside an indexing_offers_once() block.
+    """
+    pending = pending_offer_ids.get()
+    if pending is None:
+        index_offer(offer_id)
+    else:
+        pending.add(offer_id)
+
+@contextmanager
+def indexing_offers_once():
+    """
+    Indexes every offer changed inside the block once when it exits, e.g. an offer written
+    together with its details, instead of once per saved row.
+    """
+    if pending_offer_ids.get() is not None:
+        yield
+        return
+    token = pending_offer_ids.set(set())
+    try:
+        yield
+        offer_ids = pending_offer_ids.get()
+    finally:
+        pending_offer_ids.reset(token)
+    for offer_id in sorted(offer_ids):
+        index_offer(offer_id)
+
+def remove_offer_from_index(offer_id):
+    """
+    Removes an offer from the search index.
+    """
+    with connection.cursor() as cursor:
+        get_search_backend().remove(cursor, offer_id)
+
+@transaction.atomic
+def rebuild_search_index():
+    """
+    Indexes all offers from scratch and returns the number of indexed offers.
+    """
+    backend = get_search_backend()
+    count = 0
+    with connection.cursor() as cursor:
+        backend.clear(cursor)
+        for offer in Offer.objects.prefetch_related('details').iterator(chunk_size=500):
+            backend.index(cursor, offer.id, build_offer_document(offer))
+            count += 1
+    return count
+# End of offerSearch_logic.py
@@ -0,0 +1,32 @@
+# normalizedResponse_logic.py
+def is_normalized(context):
+    """
+    Returns True if the serializer context asks for the normalized format.
+    """
+    return bool(context.get('normalized'))
+
+def include_entity(context, kind, key, build):
+    """
+    Adds an entity to the `included` map once and returns its key for the referencing row.
+    `build()` is only called for entities that are not included yet.
+    """
+    entities = context.setdefault('included', {}).setdefault(kind, {})
+    if key not in entities:
+        entities[key] = build()
+    return key
+
+def build_included(context):
+    """
+    Returns the `included` map: every serialized user plus all other included entities.
+    """
+    users = {user_id: summary for user_id, summary in context.get('user_summaries', {}).items() if summary is not None}
+    return {'users': users, **context.get('included', {})}
+
+def attach_included(data, context):
+    """
+    Adds the `included` map to serialized list data. Plain lists are wrapped in `results`.
+    """
+    if isinstance(data, dict):
+        return {**data, 'included': build_included(context)}
+    return {'results': data, 'included': build_included(context)}
+# End of normalizedResponse_logic.py
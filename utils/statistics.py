@@ -0,0 +1,94 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from coder_app.models import BusinessProfile, Offer, PlatformStatistics
+from utils.rating_summary import aget_rating_summary, get_rating_summary
+
+BASE_INFO_CACHE_KEY = 'base_info_statistics'
+
+# baseInfoView_logic.py
+def get_base_info_timeout():
+    """
+    Returns how long the base info statistics may be served from the cache.
+    """
+    return getattr(settings, 'BASE_INFO_CACHE_TIMEOUT', 60)
+
+def rebuild_platform_statistics():
+    """
+    Recounts the offers and business profiles and stores the result.
+    """
+    statistics, _ = PlatformStatistics.objects.update_or_create(
+        pk=PlatformStatistics.SINGLETON_ID,
+        defaults={
+            'offer_count': Offer.objects.count(),
+            'business_profile_count': BusinessProfile.objects.count(),
+        },
+    )
+    return statistics
+
+def adjust_platform_counter(field, delta):
+    """
+    Adds delta to a platform counter in the current transaction and drops the cached statistics.
+    """
+    updated = PlatformStatistics.objects.filter(pk=PlatformStatistics.SINGLETON_ID).update(
+        **{field: F(field) + delta}
+    )
+    if not updated:
+        rebuild_platform_statistics()
+    invalidate_base_info_statistics()
+
+def invalidate_base_info_statistics():
+    """
+    Drops the cached statistics right away and again once the current transaction has been committed.
+    """
+    cache.delete(BASE_INFO_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(BASE_INFO_CACHE_KEY))
+
+def build_base_info_statistics(statistics, rating_summary):
+    """
+    Builds the landing page statistics from the platform counters and the global rating summary.
+    """
+    return {
+        "offer_count": statistics.offer_count,  # Total number of offers
+        "review_count": rating_summary.review_count,  # Total number of reviews
+        "business_profile_count": statistics.business_profile_count,  # Total number of business profiles
+        "average_rating": round(rating_summary.average_rating() or 0.0, 1)  # Average rating rounded to one decimal place
+    }
+
+def get_base_info_statistics():
+    """
+    Returns the landing page statistics from the cache or from the counter tables,
+    without counting the offers, reviews or business profiles.
+    """
+    data = cache.get(BASE_INFO_CACHE_KEY)
+    if data is not None:
+        return data
+
+    statistics = PlatformStatistics.objects.filter(pk=PlatformStatistics.SINGLETON_ID).first()
+    if statistics is None:
+        statistics = rebuild_platform_statistics()
+    data = build_base_info_statistics(statistics, get_rating_summary())
+    cache.set(BASE_INFO_CACHE_KEY, data, get_base_info_timeout())
+    return data
+
+async def aget_base_info_statistics():
+    """
+    Async version of get_base_info_statistics; the counters and the rating summary are read concurrently.
+    """
+    data = await cache.aget(BASE_INFO_CACHE_KEY)
+    if data is not None:
+        return data
+
+    statistics, rating_summary = await asyncio.gather(
+        PlatformStatistics.objects.filter(pk=PlatformStatistics.SINGLETON_ID).afirst(),
+        aget_rating_summary(),
+    )
+    if statistics is None:
+        statistics = await sync_to_async(rebuild_platform_statistics)()
+    data = build_base_info_statistics(statistics, rating_summary)
+    await cache.aset(BASE_INFO_CACHE_KEY, data, get_base_info_timeout())
+    return data
+# End of baseInfoView_logic.py
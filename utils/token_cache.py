@@ -0,0 +1,157 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+
+TOKEN_KEY_PREFIX = 'auth_token'
+# Every User column except the password, which is loaded lazily if ever needed
+PRINCIPAL_USER_FIELDS = tuple(field.attname for field in User._meta.concrete_fields if field.attname != 'password')
+
+
+class LRUCache:
+    # A small thread-safe in-process cache that drops the least recently used entry when full
+    # and treats entries older than `timeout` seconds as missing.
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TokenPrincipal:
+    # The identity behind a token: the user's columns, and the type and id of the user's profile.
+
+    def __init__(self, user_fields, profile_type=None, profile_id=None):
+        self.user_fields = user_fields
+        self.profile_type = profile_type
+        self.profile_id = profile_id
+
+    @property
+    def user_id(self):
+        return self.user_fields['id']
+
+    @property
+    def username(self):
+        return self.user_fields['username']
+
+    @classmethod
+    def from_user(cls, user):
+        """
+        Builds the principal of a user whose profiles are already loaded.
+        """
+        for profile_type in ('business', 'customer'):
+            profile = getattr(user, f'{profile_type}_profile', None)
+            if profile is not None:
+                return cls(cls.read_user_fields(user), profile_type, profile.id)
+        return cls(cls.read_user_fields(user))
+
+    @staticmethod
+    def read_user_fields(user):
+        return {name: getattr(user, name) for name in PRINCIPAL_USER_FIELDS}
+
+    def to_cache(self):
+        return {'user': self.user_fields, 'profile_type': self.profile_type, 'profile_id': self.profile_id}
+
+    @classmethod
+    def from_cache(cls, data):
+        return cls(data['user'], data['profile_type'], data['profile_id'])
+
+    def build_user(self):
+        """
+        Returns a User instance without a query. The password stays deferred, so saving
+        the instance never overwrites it.
+        """
+        user = User.from_db('default', list(PRINCIPAL_USER_FIELDS), [self.user_fields[name] for name in PRINCIPAL_USER_FIELDS])
+        user.principal = self
+        return user
+
+
+# Principals resolved by this process; a short timeout bounds how long another process's logout goes unnoticed
+_local_principals = LRUCache(
+    getattr(settings, 'TOKEN_CACHE_SIZE', 1024),
+    getattr(settings, 'TOKEN_CACHE_LOCAL_TIMEOUT', 30),
+)
+
+# tokenCache_logic.py
+def _token_cache_key(key):
+    """
+    Returns the shared cache key of a token; the token itself is never used as a key.
+    """
+    return f'{TOKEN_KEY_PREFIX}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+def load_principal(key):
+    """
+    Resolves a token with its user and both profiles in one query. Returns None for unknown tokens.
+    """
+    token = (
+        Token.objects.select_related('user', 'user__business_profile', 'user__customer_profile')
+        .filter(key=key).first()
+    )
+    return TokenPrincipal.from_user(token.user) if token else None
+
+def get_principal(key):
+    """
+    Returns the principal of a token from the in-process cache, then the shared cache,
+    then the database. Returns None for unknown tokens.
+    """
+    principal = _local_principals.get(key)
+    if principal is not None:
+        return principal
+    cache_key = _token_cache_key(key)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        principal = TokenPrincipal.from_cache(cached)
+    else:
+        principal = load_principal(key)
+        if principal is None:
+            return None
+        cache.set(cache_key, principal.to_cache(), getattr(settings, 'TOKEN_CACHE_TIMEOUT', 300))
+    _local_principals.set(key, principal)
+    return principal
+
+def invalidate_token(key):
+    """
+    Drops a token from both caches, e.g. after logout or rotation.
+    """
+    _local_principals.delete(key)
+    cache.delete(_token_cache_key(key))
+
+def invalidate_user_tokens(user_id):
+    """
+    Drops all tokens of a user from both caches, e.g. after a profile change.
+    """
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        invalidate_token(key)
+# End of tokenCache_logic.py
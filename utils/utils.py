@@ -1,18 +1,43 @@
-from django.contrib.auth import authenticate
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.exceptions import ValidationError
 #from django.contrib.auth.models import User
-from coder_app.serializers import OrderSerializer
+from coder_app.serializers import OrderReadSerializer
+from django.contrib.auth import authenticate
+from utils.login import aauthenticate
+from rest_framework.utils.encoders import JSONEncoder
+import json
 
-def serialize_orders(orders):
+def serialize_orders(orders, context=None):
     """
     Serializes a list of orders.
     """
-    serializer = OrderSerializer(orders, many=True)
+    serializer = OrderReadSerializer(orders, many=True, context=context if context is not None else {})
     return serializer.data
 
+def stream_json_array(queryset, serialize, chunk_size=500):
+    """
+    Yields a JSON array chunk by chunk, so large lists are never fully materialized.
+    """
+    yield '['
+    chunk, first = [], True
+    for item in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield _encode_chunk(serialize(chunk), first)
+            chunk, first = [], False
+    if chunk:
+        yield _encode_chunk(serialize(chunk), first)
+    yield ']'
+
+def _encode_chunk(rows, first):
+    """
+    Encodes serialized rows as part of a JSON array.
+    """
+    encoded = ','.join(json.dumps(row, cls=JSONEncoder) for row in rows)
+    return encoded if first or not encoded else ',' + encoded
+
 def error_response(message, status_code=status.HTTP_400_BAD_REQUEST):
     """Utility function for standardized error responses."""
     return Response({'error': message}, status=status_code)
@@ -28,4 +53,16 @@ def authenticate_user(username, password):
     if not user:
         raise ValidationError("Invalid credentials")
     return user
+
+async def acreate_token_for_user(user):
+    """Async version of create_token_for_user."""
+    token, created = await Token.objects.aget_or_create(user=user)
+    return token.key
+
+async def aauthenticate_user(username, password):
+    """Async version of authenticate_user."""
+    user = await aauthenticate(username=username, password=password)
+    if not user:
+        raise ValidationError("Invalid credentials")
+    return user
 # End of CreateOrderView.logic.py
\ No newline at end of file